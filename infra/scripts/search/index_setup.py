@@ -1,6 +1,7 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 import os
+import urllib.request
 from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
 from azure.search.documents.indexes import SearchIndexClient, SearchIndexerClient
 from azure.search.documents.indexes.models import (
@@ -191,3 +192,13 @@ indexer_client = SearchIndexerClient(endpoint=endpoint, credential=credential)
 indexer_result = indexer_client.create_or_update_indexer(indexer)
 
 print(f"{indexer_name} is created and running. Give the indexer a few minutes before running a query.")
+
+# Invalidate the app's retrieval cache so stale search results are not served:
+cache_invalidate_url = os.environ.get('RETRIEVAL_CACHE_INVALIDATE_URL')
+if cache_invalidate_url:
+    try:
+        request = urllib.request.Request(cache_invalidate_url, method='POST')
+        with urllib.request.urlopen(request, timeout=10) as response:
+            print(f"Retrieval cache invalidated: {response.read().decode()}")
+    except Exception as e:
+        print(f"Retrieval cache invalidation failed: {e}")
@@ -0,0 +1,117 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+from collections import deque
+
+"""
+Aho-Corasick multi-pattern replacement.
+
+Replaces every occurrence of a set of patterns in one linear pass over
+the text. Matches are chosen leftmost-longest and never overlap, so a
+pattern that is a substring of another (e.g. a given name inside a full
+name) cannot corrupt the longer match. The automaton is built over the
+reversed patterns and run from the end of the text: the state reached at
+position i then gives the longest pattern starting at i in O(1).
+"""
+
+
+class AhoCorasickReplacer:
+    """
+    Immutable automaton for a pattern -> replacement mapping.
+    """
+
+    def __init__(
+        self,
+        replacements: dict[str, str]
+    ) -> None:
+        self.replacements = {pattern: value for pattern, value in replacements.items() if pattern}
+        self._patterns = list(self.replacements)
+        # Trie over reversed patterns:
+        self._goto: list[dict[str, int]] = [{}]
+        # Longest pattern (index into _patterns, -1 if none) recognized in each state:
+        self._longest: list[int] = [-1]
+        for index, pattern in enumerate(self._patterns):
+            state = 0
+            for char in reversed(pattern):
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._longest.append(-1)
+                state = next_state
+            self._longest[state] = index
+        self._fail = self._build_failure_links()
+
+    def _build_failure_links(self) -> list[int]:
+        fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            # A state's own pattern is always the longest; otherwise inherit from the suffix state
+            if self._longest[state] == -1:
+                self._longest[state] = self._longest[fail[state]]
+            for char, next_state in self._goto[state].items():
+                fallback = fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = self._goto[fallback].get(char, 0) if state else 0
+                queue.append(next_state)
+        return fail
+
+    def _longest_at(
+        self,
+        text: str
+    ) -> list[tuple[int, int]]:
+        """
+        (position, pattern index) of the longest pattern starting at each
+        matching position of text, last position first.
+        """
+        goto, fail, longest = self._goto, self._fail, self._longest
+        starts = []
+        state = 0
+        for i in range(len(text) - 1, -1, -1):
+            char = text[i]
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if longest[state] != -1:
+                starts.append((i, longest[state]))
+        return starts
+
+    def find(
+        self,
+        text: str
+    ) -> list[tuple[int, int, str]]:
+        """
+        Leftmost-longest, non-overlapping matches as (start, end, pattern).
+        """
+        if not self._patterns:
+            return []
+        matches = []
+        end = 0
+        for start, index in reversed(self._longest_at(text)):
+            if start < end:
+                # Overlaps the previous (leftmost) match
+                continue
+            pattern = self._patterns[index]
+            end = start + len(pattern)
+            matches.append((start, end, pattern))
+        return matches
+
+    def replace(
+        self,
+        text: str
+    ) -> str:
+        """
+        Replace all matches in a single pass.
+        """
+        parts = []
+        position = 0
+        for start, end, pattern in self.find(text):
+            parts.append(text[position:start])
+            parts.append(self.replacements[pattern])
+            position = end
+        if not parts:
+            return text
+        parts.append(text[position:])
+        return "".join(parts)
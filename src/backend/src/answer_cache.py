@@ -0,0 +1,208 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import time
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+"""
+Semantic answer cache for first-turn consultation questions.
+
+Stores grounded answers keyed by the question's embedding. A new question
+whose embedding is close enough (cosine similarity) to a cached one gets
+the stored answer back without calling the model.
+"""
+
+_logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_ENABLED = os.environ.get("ANSWER_CACHE_ENABLED", "false").lower() == "true"
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.environ.get("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", "512"))
+ANSWER_CACHE_TTL_SECONDS = float(os.environ.get("ANSWER_CACHE_TTL_SECONDS", "86400"))
+
+
+@dataclass
+class _AnswerEntry:
+    query: str
+    embedding: np.ndarray
+    answer: str
+    expires_at: float
+
+
+class SemanticAnswerCache:
+    """
+    Embedding-similarity answer cache with size cap and per-entry TTL.
+    """
+
+    def __init__(
+        self,
+        embed_function: Callable[[str], Awaitable[list[float]]],
+        similarity_threshold: float = ANSWER_CACHE_SIMILARITY_THRESHOLD,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS
+    ) -> None:
+        self.embed_function = embed_function
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: OrderedDict[int, _AnswerEntry] = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        # Stacked, normalized embeddings of all entries (rebuilt lazily):
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ids: list[int] = []
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.embed_failures = 0
+
+    async def embed(
+        self,
+        query: str
+    ) -> np.ndarray:
+        """
+        Embed and L2-normalize query text.
+        """
+        vector = np.asarray(await self.embed_function(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    async def lookup(
+        self,
+        query: str
+    ) -> tuple[Optional[np.ndarray], Optional[str]]:
+        """
+        Embed query and look up its answer: (embedding, cached answer or None).
+
+        The cache is an optimization only: when embedding fails the error is
+        logged and (None, None) returned, so the caller answers normally
+        without caching.
+        """
+        try:
+            embedding = await self.embed(query)
+        except Exception as e:
+            _logger.warning(f"Answer cache embedding failed, bypassing cache: {e}")
+            self.embed_failures += 1
+            return None, None
+        return embedding, self.get(embedding)
+
+    def get(
+        self,
+        embedding: np.ndarray
+    ) -> Optional[str]:
+        """
+        Return the cached answer of the most similar question above threshold.
+        """
+        with self._lock:
+            self._expire()
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            if self._matrix is None:
+                self._matrix_ids = list(self._entries.keys())
+                self._matrix = np.stack([self._entries[i].embedding for i in self._matrix_ids])
+
+            similarities = self._matrix @ embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            entry_id = self._matrix_ids[best]
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            entry = self._entries[entry_id]
+            _logger.info(f"Answer cache hit (similarity={similarities[best]:.3f}): {entry.query[:50]}")
+            return entry.answer
+
+    def put(
+        self,
+        query: str,
+        embedding: np.ndarray,
+        answer: str
+    ) -> None:
+        """
+        Store an answer for a question embedding.
+        """
+        if not answer:
+            return
+        with self._lock:
+            self._entries[self._next_id] = _AnswerEntry(
+                query=query,
+                embedding=embedding,
+                answer=answer,
+                expires_at=time.monotonic() + self.ttl_seconds
+            )
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        expired = [i for i, entry in self._entries.items() if entry.expires_at <= now]
+        for entry_id in expired:
+            del self._entries[entry_id]
+        if expired:
+            self._matrix = None
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "similarity_threshold": self.similarity_threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "embed_failures": self.embed_failures
+        }
+
+
+def create_answer_cache(
+    embed_function_factory: Callable[[], Callable[[str], Awaitable[list[float]]]],
+    enabled: bool = ANSWER_CACHE_ENABLED,
+    pii_enabled: bool = False
+) -> Optional[SemanticAnswerCache]:
+    """
+    Create the answer cache based on settings (None when disabled).
+
+    Not used together with PII redaction: questions would be embedded
+    unredacted, and the process-wide cache would hand answers quoting one
+    patient's details to other sessions.
+    """
+    if not enabled:
+        return None
+    if pii_enabled:
+        _logger.warning("ANSWER_CACHE_ENABLED is ignored while PII_ENABLED is set")
+        return None
+    return SemanticAnswerCache(embed_function=embed_function_factory())
+
+
+def is_first_turn(
+    history: list
+) -> bool:
+    """
+    True when history carries no prior messages (placeholders are ignored).
+
+    Accepts ChatMessage objects or chat-completion message dicts.
+    """
+    return not any(
+        msg.get("content") if isinstance(msg, dict) else getattr(msg, "content", "")
+        for msg in history or []
+    )
@@ -0,0 +1,337 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Callable, Optional
+from token_budget import count_message_tokens, count_tokens
+from retry_policy import ErrorClass, classify, retry_after
+
+"""
+Token-rate-aware load balancing over several AOAI deployments.
+
+Each deployment has a tokens-per-minute quota and a weight. Tokens used
+(from response.usage) are tracked over a sliding window, and tokens of
+requests still in flight are reserved from an estimate, so a burst is
+spread out before any usage has been reported. Every request goes to the
+deployment with the most weighted headroom; a throttled deployment is
+taken out of rotation until its Retry-After (or a default cooldown) has
+passed, and the request fails over to the next one.
+"""
+
+_logger = logging.getLogger(__name__)
+
+# JSON list of {"endpoint": ..., "deployment": ..., "weight": 1, "tpm": 120000}; unset = single deployment
+AOAI_DEPLOYMENTS = os.environ.get("AOAI_DEPLOYMENTS", "")
+AOAI_DEFAULT_TPM = int(os.environ.get("AOAI_DEFAULT_TPM", "120000"))
+AOAI_USAGE_WINDOW_SECONDS = float(os.environ.get("AOAI_USAGE_WINDOW_SECONDS", "60"))
+AOAI_THROTTLE_COOLDOWN_SECONDS = float(os.environ.get("AOAI_THROTTLE_COOLDOWN_SECONDS", "10"))
+
+
+class DeploymentsThrottledError(Exception):
+    """
+    Every deployment is cooling down; looks like a 429 with Retry-After to retry_policy.
+    """
+    status_code = 429
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"All AOAI deployments are throttled, next available in {retry_in:.1f}s")
+        self.response = SimpleNamespace(status_code=429, headers={"retry-after": f"{retry_in:.3f}"})
+
+
+def estimate_prompt_tokens(
+    messages: list
+) -> int:
+    """
+    Estimated prompt tokens of chat messages (dicts or SDK message objects).
+    """
+    total = 0
+    for message in messages:
+        content = message.get("content") if isinstance(message, dict) else getattr(message, "content", None)
+        total += count_message_tokens(content if isinstance(content, str) else "")
+    return total
+
+
+class DeploymentTarget:
+    """
+    One deployment with its quota, sliding-window usage and cooldown.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        deployment: str,
+        client: Any,
+        weight: float = 1.0,
+        tpm: int = AOAI_DEFAULT_TPM,
+        window_seconds: float = AOAI_USAGE_WINDOW_SECONDS
+    ) -> None:
+        self.endpoint = endpoint
+        self.deployment = deployment
+        self.client = client
+        self.weight = weight
+        # Quota scaled to the window length:
+        self.window_quota = tpm * window_seconds / 60
+        self.tpm = tpm
+        self.window_seconds = window_seconds
+        self._usage: deque[tuple[float, int]] = deque()
+        self.used = 0
+        self.reserved = 0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.throttled = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.deployment}@{self.endpoint}"
+
+    def _expire(
+        self,
+        now: float
+    ) -> None:
+        cutoff = now - self.window_seconds
+        while self._usage and self._usage[0][0] <= cutoff:
+            self.used -= self._usage.popleft()[1]
+
+    def headroom(
+        self,
+        now: float
+    ) -> float:
+        self._expire(now)
+        return (self.window_quota - self.used - self.reserved) * self.weight
+
+    def add_usage(
+        self,
+        tokens: int,
+        now: float
+    ) -> None:
+        self._usage.append((now, tokens))
+        self.used += tokens
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        self._expire(now)
+        return {
+            "endpoint": self.endpoint,
+            "deployment": self.deployment,
+            "weight": self.weight,
+            "tpm": self.tpm,
+            "window_tokens": self.used,
+            "reserved_tokens": self.reserved,
+            "cooling_down_seconds": round(max(0.0, self.cooldown_until - now), 1),
+            "requests": self.requests,
+            "throttled": self.throttled
+        }
+
+
+class Lease:
+    """
+    Tokens reserved on a deployment for one request, settled when it ends.
+    """
+
+    def __init__(
+        self,
+        balancer: "AOAIBalancer",
+        target: DeploymentTarget,
+        reserved: int
+    ) -> None:
+        self.balancer = balancer
+        self.target = target
+        self.reserved = reserved
+        self._settled = False
+
+    def complete(
+        self,
+        tokens: Optional[int]
+    ) -> None:
+        """
+        Replace the reservation with the tokens actually used (estimate if unknown).
+        """
+        self.balancer._settle(self, self.reserved if tokens is None else tokens)
+
+    def release(self) -> None:
+        """
+        Request failed before using tokens.
+        """
+        self.balancer._settle(self, 0)
+
+    def throttled(
+        self,
+        retry_after: Optional[float]
+    ) -> None:
+        """
+        Deployment answered 429: take it out of rotation.
+        """
+        self.balancer._settle(self, 0, cooldown=retry_after or AOAI_THROTTLE_COOLDOWN_SECONDS)
+
+
+class AOAIBalancer:
+    """
+    Picks the deployment with the most weighted token headroom.
+    """
+
+    def __init__(
+        self,
+        targets: list[DeploymentTarget]
+    ) -> None:
+        if not targets:
+            raise ValueError("AOAIBalancer needs at least one deployment")
+        self.targets = targets
+        self._lock = threading.Lock()
+        self.failovers = 0
+
+    def acquire(
+        self,
+        estimated_tokens: int,
+        exclude: set[str] = frozenset()
+    ) -> Lease:
+        """
+        Reserve estimated_tokens on the best available deployment.
+
+        Raises DeploymentsThrottledError while every candidate is cooling down.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [target for target in self.targets if target.name not in exclude]
+            available = [target for target in candidates if target.cooldown_until <= now]
+            if not available:
+                soonest = min((target.cooldown_until for target in candidates), default=now + AOAI_THROTTLE_COOLDOWN_SECONDS)
+                raise DeploymentsThrottledError(max(0.0, soonest - now))
+            target = max(available, key=lambda target: target.headroom(now))
+            target.reserved += estimated_tokens
+            target.requests += 1
+        return Lease(self, target, estimated_tokens)
+
+    def _settle(
+        self,
+        lease: Lease,
+        tokens: int,
+        cooldown: float = None
+    ) -> None:
+        with self._lock:
+            if lease._settled:
+                return
+            lease._settled = True
+            target = lease.target
+            target.reserved -= lease.reserved
+            now = time.monotonic()
+            if tokens:
+                target.add_usage(tokens, now)
+            if cooldown is not None:
+                target.throttled += 1
+                target.cooldown_until = max(target.cooldown_until, now + cooldown)
+                _logger.warning(f"AOAI deployment {target.name} throttled, out of rotation for {cooldown:.1f}s")
+
+    async def create_completion(
+        self,
+        kwargs: dict,
+        on_target: Callable[[DeploymentTarget, dict], dict] = None
+    ) -> Any:
+        """
+        chat.completions.create on the best deployment, failing over on throttling.
+
+        on_target(target, kwargs) is called before each attempt and returns
+        the request body for that deployment, so the caller can attribute
+        the call to the deployment that served it and adapt the body to it.
+
+        Re-raises the last 429 once every deployment has throttled the
+        request, so retry_policy backs off and the breaker sees it.
+        """
+        estimated = estimate_prompt_tokens(kwargs.get("messages", []))
+        tried: set[str] = set()
+        while True:
+            lease = self.acquire(estimated, exclude=tried)
+            target = lease.target
+            request = on_target(target, kwargs) if on_target is not None else kwargs
+            try:
+                response = await target.client.chat.completions.create(**{**request, "model": target.deployment})
+            except Exception as e:
+                if classify(e) != ErrorClass.THROTTLED:
+                    lease.release()
+                    raise
+                lease.throttled(retry_after(e))
+                tried.add(target.name)
+                if len(tried) == len(self.targets):
+                    raise
+                self.failovers += 1
+                continue
+
+            if request.get("stream"):
+                return self._settle_stream(response, lease, estimated)
+            usage = getattr(response, "usage", None)
+            lease.complete(getattr(usage, "total_tokens", None))
+            return response
+
+    @staticmethod
+    async def _settle_stream(
+        stream: AsyncIterator,
+        lease: Lease,
+        prompt_tokens: int
+    ) -> AsyncIterator:
+        """
+        Pass stream chunks through, charging prompt + streamed completion tokens at the end.
+        """
+        completion_tokens = 0
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    completion_tokens += count_tokens(chunk.choices[0].delta.content)
+                yield chunk
+        finally:
+            lease.complete(prompt_tokens + completion_tokens)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "failovers": self.failovers,
+                "deployments": [target.get_stats() for target in self.targets]
+            }
+
+
+def load_deployments(
+    config: str = AOAI_DEPLOYMENTS
+) -> list[dict]:
+    """
+    Parse the AOAI_DEPLOYMENTS list (empty when unset).
+    """
+    if not config:
+        return []
+    deployments = json.loads(config)
+    for deployment in deployments:
+        if not deployment.get("endpoint") or not deployment.get("deployment"):
+            raise ValueError(f"AOAI_DEPLOYMENTS entries need endpoint and deployment: {deployment}")
+    return deployments
+
+
+def create_aoai_balancer(
+    client_factory: Callable[[str], Any],
+    config: str = AOAI_DEPLOYMENTS
+) -> Optional[AOAIBalancer]:
+    """
+    Balancer over AOAI_DEPLOYMENTS, None when a single deployment is configured.
+
+    client_factory(endpoint) creates the AOAI client of an endpoint; one
+    client is shared by all deployments on the same endpoint.
+    """
+    deployments = load_deployments(config)
+    if not deployments:
+        return None
+    clients = {}
+    targets = []
+    for deployment in deployments:
+        endpoint = deployment["endpoint"]
+        if endpoint not in clients:
+            clients[endpoint] = client_factory(endpoint)
+        targets.append(DeploymentTarget(
+            endpoint=endpoint,
+            deployment=deployment["deployment"],
+            client=clients[endpoint],
+            weight=float(deployment.get("weight", 1.0)),
+            tpm=int(deployment.get("tpm", AOAI_DEFAULT_TPM))
+        ))
+    _logger.info(f"AOAI balancer over {len(targets)} deployments")
+    return AOAIBalancer(targets)
@@ -1,14 +1,27 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
+import os
 import logging
 import json
-from typing import Callable
-from openai import AzureOpenAI
+import inspect
+import httpx
+from typing import AsyncIterator, Callable, Optional
+from openai import AzureOpenAI, AsyncAzureOpenAI, DefaultAsyncHttpxClient
 from azure.core.credentials import TokenCredential
+from azure.core.credentials_async import AsyncTokenCredential
 from azure.identity import get_bearer_token_provider
+from azure.identity.aio import get_bearer_token_provider as get_async_bearer_token_provider
 from azure.search.documents import SearchClient
+from azure.search.documents.aio import SearchClient as AsyncSearchClient
 from azure.search.documents.models import VectorizableTextQuery
-from utils import get_azure_credential
+from utils import get_azure_credential, get_async_azure_credential
+from retrieval_cache import RetrievalCache, normalize_query
+from single_flight import request_key, single_flight, sync_single_flight
+from retry_policy import call_with_retry, acall_with_retry
+from deployment_capabilities import capability_registry, is_unsupported, JSON_MODE, TOOLS, STREAMING
+from aoai_balancer import AOAIBalancer, DeploymentTarget, estimate_prompt_tokens
+from token_budget import count_tokens
+from usage_ledger import usage_ledger, CallTracker
 
 def get_prompt(
     prompt: str,
@@ -24,40 +37,111 @@ def get_prompt(
 
 RAG_GROUNDING_PROMPT = get_prompt("rag_grounding.txt")
 
+# Shared connection pool for async clients:
+AOAI_MAX_CONNECTIONS = int(os.environ.get("AOAI_MAX_CONNECTIONS", "100"))
+AOAI_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("AOAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+AOAI_TIMEOUT_SECONDS = float(os.environ.get("AOAI_TIMEOUT_SECONDS", "60"))
 
-class AOAIClient(AzureOpenAI):
+_async_http_client = None
+
+
+def get_async_http_client() -> httpx.AsyncClient:
     """
-    Chat-only AOAI Client.
+    Get HTTP connection pool shared by all async AOAI clients.
+    """
+    global _async_http_client
+    if _async_http_client is None or _async_http_client.is_closed:
+        _async_http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=AOAI_MAX_CONNECTIONS,
+                max_keepalive_connections=AOAI_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            timeout=AOAI_TIMEOUT_SECONDS
+        )
+    return _async_http_client
 
-    AzureOpenAI wrapper with function-calling and RAG support.
+
+async def close_async_http_client() -> None:
+    """
+    Close shared HTTP connection pool (call on app shutdown).
     """
+    global _async_http_client
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+        _async_http_client = None
 
-    def __init__(
+
+def create_async_deployment_client(
+    endpoint: str,
+    azure_credential: AsyncTokenCredential,
+    api_version: str = "2023-12-01-preview",
+    scope: str = "https://cognitiveservices.azure.com/.default"
+) -> AsyncAzureOpenAI:
+    """
+    Plain async AOAI client for one endpoint of an AOAIBalancer (shared connection pool).
+    """
+    return AsyncAzureOpenAI(
+        api_version=api_version,
+        azure_ad_token_provider=get_async_bearer_token_provider(azure_credential, scope),
+        azure_endpoint=endpoint,
+        http_client=get_async_http_client(),
+        # Retries are handled by retry_policy:
+        max_retries=0
+    )
+
+
+def format_sources(
+    documents: list[dict]
+) -> str:
+    """
+    Format search results as RAG grounding sources.
+    """
+    return "=================\n".join(
+        [f'TITLE: {doc["title"]}, CONTENT: {doc["chunk"]}' for doc in documents]
+    )
+
+
+def split_rag_prompt(
+    query: str,
+    sources_formatted: str
+) -> tuple[str, str]:
+    """
+    Fill RAG grounding prompt and split it into (system_prompt, user_prompt).
+    """
+    full_prompt = RAG_GROUNDING_PROMPT.format(
+        query=query,
+        sources=sources_formatted
+    )
+
+    # Extract system part (everything before # Query)
+    system_part = full_prompt.split("# Query")[0].strip()
+
+    # Extract user part (Query and Sources sections)
+    user_part = full_prompt.split("# Query")[1].strip() if "# Query" in full_prompt else f"# Query\n{query}\n\n# Sources\n{sources_formatted}"
+
+    return system_part, user_part
+
+
+class _AOAIChatMixin:
+    """
+    Request-building helpers shared by sync and async AOAI clients.
+    """
+
+    def _init_chat_state(
         self,
-        endpoint: str,
         deployment: str,
-        api_version: str = "2023-12-01-preview",
-        scope: str = "https://cognitiveservices.azure.com/.default",
-        azure_credential: TokenCredential = None,
+        api_version: str,
         system_message: str = None,
         function_calling: bool = False,
         tools: list = None,
         functions: dict[str, Callable] = None,
         return_functions: bool = False,
         use_rag: bool = False,
-        search_client: SearchClient = None
+        search_client=None,
+        retrieval_cache: RetrievalCache = None,
+        usage_stage: str = None,
+        balancer: AOAIBalancer = None
     ) -> None:
-        self.logger = logging.getLogger(self.__class__.__name__)
-        if not azure_credential:
-            azure_credential = get_azure_credential()
-        token_provider = get_bearer_token_provider(azure_credential, scope)
-        AzureOpenAI.__init__(
-            self,
-            api_version=api_version,
-            azure_ad_token_provider=token_provider,
-            azure_endpoint=endpoint
-        )
-
         # Function-calling:
         self.function_calling = function_calling
         self.tools = tools
@@ -67,108 +151,172 @@ class AOAIClient(AzureOpenAI):
         # RAG:
         self.use_rag = use_rag
         self.search_client = search_client
+        self.retrieval_cache = retrieval_cache
 
         # General:
         self.deployment = self.model_name = deployment
         self.api_version = api_version
         self.chat_api = True
         self.messages = []
+        # Pipeline stage of this client's calls in the usage ledger (unless set by the caller):
+        self.usage_stage = usage_stage
+        # Chat completions go to the balancer's deployments when set:
+        self.balancer = balancer
 
         if system_message:
             # Prepend system message:
             self.messages = [{"role": "system", "content": system_message}]
 
-    def call_functions(
-        self,
-        language: str,
-        id: str
-    ) -> list:
+    def _track(self) -> CallTracker:
         """
-        AOAI function calling.
+        Record the tokens and wall time of one call in the usage ledger.
+        """
+        return usage_ledger.track(self.deployment, self.usage_stage)
 
-        Returns function-call responses.
+    @property
+    def _upstream(self) -> str:
         """
-        # Call chat API with function-calling enabled:
-        response = self.chat.completions.create(
-            model=self.deployment,
-            messages=self.messages,
-            tools=self.tools,
-            tool_choice="auto",
+        Circuit breaker name of this client's deployment.
+
+        With a balancer it guards the pool as a whole; throttled
+        deployments are taken out of rotation by the balancer itself.
+        """
+        return f"aoai:{self.deployment}"
+
+    def _search_index(self) -> tuple[str, str]:
+        """
+        (endpoint, index name) of the search client.
+        """
+        config = getattr(self.search_client, "_config", None)
+        return (
+            getattr(config, "endpoint", None) or getattr(self.search_client, "_endpoint", ""),
+            getattr(config, "index_name", None) or getattr(self.search_client, "_index_name", "")
         )
 
-        # Process model's response:
-        response_message = response.choices[0].message
-        self.messages.append(response_message)
-        self.logger.info(f"Model response: {response_message}")
+    @property
+    def _search_upstream_name(self) -> str:
+        return f"search:{self._search_index()[1]}"
 
-        # Handle function calls:
-        function_responses = []
-        if response_message.tool_calls:
-            for tool_call in response_message.tool_calls:
-                function_name = tool_call.function.name
-                function_args = json.loads(tool_call.function.arguments)
-                self.logger.info(f"Function call: {function_name}")
-                self.logger.info(f"Function arguments: {function_args}")
+    def _capability_key(
+        self,
+        target: DeploymentTarget = None
+    ) -> tuple[str, str, str]:
+        if target is not None:
+            return (target.endpoint, target.deployment, self.api_version)
+        return (str(self.base_url), self.deployment, self.api_version)
 
-                if function_name in self.functions:
-                    # All functions require single extracted parameter:
-                    func_input = next(iter(function_args.values()))
-                    func = self.functions[function_name]
-                    func_response = func(func_input, language, id)
-                else:
-                    func_response = json.dumps({"error": "Unknown function"})
+    def _supports(
+        self,
+        capability: str,
+        target: DeploymentTarget = None
+    ) -> bool | None:
+        """
+        Learned capability of this deployment (None until first used).
 
-                function_responses.append(func_response)
-                self.logger.info(f"Function response: {str(func_response)}")
-                self.messages.append({
-                    "tool_call_id": tool_call.id,
-                    "role": "tool",
-                    "name": function_name,
-                    "content": str(func_response)
-                })
-        else:
-            self.logger.info("No tool calls made by model.")
+        Without a target, a balanced client reports what all of its
+        deployments agree on (None while they differ or are unknown).
+        """
+        if target is None and self.balancer is not None:
+            learned = {
+                capability_registry.supports(self._capability_key(t), capability)
+                for t in self.balancer.targets
+            }
+            return learned.pop() if len(learned) == 1 else None
+        return capability_registry.supports(self._capability_key(target), capability)
 
-        return function_responses
+    def _learn(
+        self,
+        capability: str,
+        error: BaseException = None,
+        target: DeploymentTarget = None
+    ) -> None:
+        """
+        Remember the outcome of a request using capability (error = rejected).
+        """
+        if error is not None:
+            name = target.name if target is not None else self.deployment
+            self.logger.warning(f"Deployment {name} does not support {capability}, remembering: {error}")
+        capability_registry.record(
+            self._capability_key(target),
+            capability,
+            supported=error is None,
+            detail=str(error)[:300] if error is not None else None
+        )
 
-    def generate_rag_prompt(
+    def _completion_kwargs(
+        self,
+        messages: list[dict],
+        response_format: dict | None
+    ) -> dict:
+        """
+        Chat request body; response_format is left out for deployments known to reject it.
+        """
+        kwargs = {"model": self.deployment, "messages": messages}
+        if response_format is not None and self._supports(JSON_MODE) is not False:
+            kwargs["response_format"] = response_format
+        return kwargs
+
+    def _completion_flight_key(
+        self,
+        kwargs: dict
+    ) -> str:
+        """
+        Single-flight key of a chat completion: endpoint, deployment and request body.
+        """
+        return request_key("chat", str(self.base_url), kwargs)
+
+    def _search_flight_key(
         self,
         query: str
-    ) -> tuple[str, str]:
+    ) -> str:
         """
-        Generates RAG grounding prompt given query and search client.
-        Returns (system_prompt, user_prompt) tuple.
+        Single-flight key of a search: endpoint, index and normalized query (as cached).
         """
-        self.logger.info("Calling search client")
-        vector_query = VectorizableTextQuery(
-            text=query,
-            k_nearest_neighbors=50,
-            fields="text_vector"
-        )
-        search_results = self.search_client.search(
-            search_text=query,
-            vector_queries=[vector_query],
-            select=["title", "chunk"],
-            top=5
-        )
+        return request_key("search", *self._search_index(), normalize_query(query))
 
-        sources_formatted = "=================\n".join(
-            [f'TITLE: {doc["title"]}, CONTENT: {doc["chunk"]}' for doc in search_results]
-        )
+    @staticmethod
+    def _history_messages(
+        history: list = None
+    ) -> list[dict]:
+        """
+        Convert ChatMessage history to OpenAI format.
 
-        # Split the RAG prompt into system and user parts
-        full_prompt = RAG_GROUNDING_PROMPT.format(
-            query=query,
-            sources=sources_formatted
-        )
-        
-        # Extract system part (everything before # Query)
-        system_part = full_prompt.split("# Query")[0].strip()
-        
-        # Extract user part (Query and Sources sections)
-        user_part = full_prompt.split("# Query")[1].strip() if "# Query" in full_prompt else f"# Query\n{query}\n\n# Sources\n{sources_formatted}"
+        Messages that are already dicts (e.g. SessionState.prompt_messages) are passed through.
+        """
+        messages = []
+        if history:
+            for msg in history:
+                if isinstance(msg, dict):
+                    messages.append(msg)
+                    continue
+                role = "assistant" if msg.role.lower() in ["system", "assistant"] else "user"
+                messages.append({"role": role, "content": msg.content})
+        return messages
 
-        return system_part, user_part
+    def _build_messages(
+        self,
+        message: str,
+        history: list = None,
+        rag_prompt: tuple[str, str] = None
+    ) -> list[dict]:
+        """
+        Build chat messages from system prompt, history and current message.
+
+        When rag_prompt is given, its system part replaces the client's system message.
+        """
+        if rag_prompt:
+            system_prompt, user_prompt = rag_prompt
+            messages = [{"role": "system", "content": system_prompt}]
+            messages.extend(self._history_messages(history))
+            messages.append({"role": "user", "content": user_prompt})
+            return messages
+
+        messages = []
+        if hasattr(self, 'messages') and self.messages and self.messages[0].get('role') == 'system':
+            messages.append(self.messages[0])
+        messages.extend(self._history_messages(history))
+        messages.append({"role": "user", "content": message})
+        return messages
 
     def _fix_json_response(self, content: str) -> str:
         """
@@ -214,6 +362,204 @@ class AOAIClient(AzureOpenAI):
         
         return content
 
+
+class AOAIClient(_AOAIChatMixin, AzureOpenAI):
+    """
+    Chat-only AOAI Client.
+
+    AzureOpenAI wrapper with function-calling and RAG support.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        deployment: str,
+        api_version: str = "2023-12-01-preview",
+        scope: str = "https://cognitiveservices.azure.com/.default",
+        azure_credential: TokenCredential = None,
+        system_message: str = None,
+        function_calling: bool = False,
+        tools: list = None,
+        functions: dict[str, Callable] = None,
+        return_functions: bool = False,
+        use_rag: bool = False,
+        search_client: SearchClient = None,
+        retrieval_cache: RetrievalCache = None,
+        usage_stage: str = None
+    ) -> None:
+        self.logger = logging.getLogger(self.__class__.__name__)
+        if not azure_credential:
+            azure_credential = get_azure_credential()
+        token_provider = get_bearer_token_provider(azure_credential, scope)
+        AzureOpenAI.__init__(
+            self,
+            api_version=api_version,
+            azure_ad_token_provider=token_provider,
+            azure_endpoint=endpoint,
+            # Retries are handled by retry_policy:
+            max_retries=0
+        )
+        self._init_chat_state(
+            deployment=deployment,
+            api_version=api_version,
+            system_message=system_message,
+            function_calling=function_calling,
+            tools=tools,
+            functions=functions,
+            return_functions=return_functions,
+            use_rag=use_rag,
+            search_client=search_client,
+            retrieval_cache=retrieval_cache,
+            usage_stage=usage_stage
+        )
+
+    def call_functions(
+        self,
+        messages: list,
+        language: str,
+        id: str
+    ) -> list:
+        """
+        AOAI function calling.
+
+        The model's tool calls and the function results are appended to
+        messages (the caller's list; the client's own state is not touched).
+        Returns function-call responses.
+        """
+        # Call chat API with function-calling enabled:
+        try:
+            with self._track() as call:
+                response = call_with_retry(self._upstream, lambda: self.chat.completions.create(
+                    model=self.deployment,
+                    messages=messages,
+                    tools=self.tools,
+                    tool_choice="auto",
+                ))
+                call.usage = response.usage
+        except Exception as e:
+            if is_unsupported(e, TOOLS):
+                self._learn(TOOLS, e)
+            raise
+        if self._supports(TOOLS) is None:
+            self._learn(TOOLS)
+
+        # Process model's response:
+        response_message = response.choices[0].message
+        messages.append(response_message)
+        self.logger.info(f"Model response: {response_message}")
+
+        # Handle function calls:
+        function_responses = []
+        if response_message.tool_calls:
+            for tool_call in response_message.tool_calls:
+                function_name = tool_call.function.name
+                function_args = json.loads(tool_call.function.arguments)
+                self.logger.info(f"Function call: {function_name}")
+                self.logger.info(f"Function arguments: {function_args}")
+
+                if function_name in self.functions:
+                    # All functions require single extracted parameter:
+                    func_input = next(iter(function_args.values()))
+                    func = self.functions[function_name]
+                    func_response = func(func_input, language, id)
+                else:
+                    func_response = json.dumps({"error": "Unknown function"})
+
+                function_responses.append(func_response)
+                self.logger.info(f"Function response: {str(func_response)}")
+                messages.append({
+                    "tool_call_id": tool_call.id,
+                    "role": "tool",
+                    "name": function_name,
+                    "content": str(func_response)
+                })
+        else:
+            self.logger.info("No tool calls made by model.")
+
+        return function_responses
+
+    def search_documents(
+        self,
+        query: str
+    ) -> list[dict]:
+        """
+        Hybrid (text + vector) search, served from the retrieval cache when possible.
+        """
+        if self.retrieval_cache:
+            documents = self.retrieval_cache.get(query)
+            if documents is not None:
+                self.logger.info("Retrieval cache hit")
+                return documents
+
+        # Identical searches already in flight share one upstream call:
+        return sync_single_flight.do(self._search_flight_key(query), lambda: self._search_upstream(query))
+
+    def _search_upstream(
+        self,
+        query: str
+    ) -> list[dict]:
+        self.logger.info("Calling search client")
+        vector_query = VectorizableTextQuery(
+            text=query,
+            k_nearest_neighbors=50,
+            fields="text_vector"
+        )
+
+        def search() -> list[dict]:
+            # Results are paged lazily, so reading them is part of the retried call
+            search_results = self.search_client.search(
+                search_text=query,
+                vector_queries=[vector_query],
+                select=["title", "chunk"],
+                top=5
+            )
+            return [{"title": doc["title"], "chunk": doc["chunk"]} for doc in search_results]
+
+        documents = call_with_retry(self._search_upstream_name, search)
+
+        if self.retrieval_cache:
+            self.retrieval_cache.set(query, documents)
+        return documents
+
+    def generate_rag_prompt(
+        self,
+        query: str
+    ) -> tuple[str, str]:
+        """
+        Generates RAG grounding prompt given query and search client.
+        Returns (system_prompt, user_prompt) tuple.
+        """
+        sources_formatted = format_sources(self.search_documents(query))
+        return split_rag_prompt(query, sources_formatted)
+
+    def _create_completion(
+        self,
+        kwargs: dict
+    ):
+        """
+        Create a chat completion under the retry policy.
+
+        The first request using response_format probes JSON mode support:
+        if the deployment rejects the parameter, the request is retried
+        without it and later requests leave it out from the start.
+        """
+        kwargs = dict(kwargs)
+        with self._track() as call:
+            try:
+                self.logger.info(f"Attempting chat completion with kwargs: {kwargs}")
+                response = call_with_retry(self._upstream, lambda: self.chat.completions.create(**kwargs))
+            except Exception as e:
+                if "response_format" not in kwargs or not is_unsupported(e, JSON_MODE):
+                    raise
+                self._learn(JSON_MODE, e)
+                kwargs.pop("response_format")
+                response = call_with_retry(self._upstream, lambda: self.chat.completions.create(**kwargs))
+            else:
+                if "response_format" in kwargs and self._supports(JSON_MODE) is None:
+                    self._learn(JSON_MODE)
+            call.usage = response.usage
+        return response
+
     def chat_completion(
         self,
         message: str,
@@ -227,80 +573,425 @@ class AOAIClient(AzureOpenAI):
         """
         AOAI chat completion with conversation history.
         """
-        # Initialize messages with system prompt and conversation history
-        messages = []
-        
-        # Add system message if available
-        if hasattr(self, 'messages') and self.messages and self.messages[0].get('role') == 'system':
-            messages.append(self.messages[0])
-        
-        # Add conversation history if provided
-        if history:
-            for msg in history:
-                # Convert ChatMessage to OpenAI format
-                role = "assistant" if msg.role.lower() in ["system", "assistant"] else "user"
-                messages.append({"role": role, "content": msg.content})
-        
-        # Add current user message:
         effective_use_rag = self.use_rag if use_rag is None else use_rag
-        if effective_use_rag:
-            # For RAG, split into system and user messages for better instruction following
-            system_prompt, user_prompt = self.generate_rag_prompt(message)
-            # Add system prompt as system message (overrides any existing system message)
-            messages = [{"role": "system", "content": system_prompt}]
-            # Re-add conversation history after system message
-            if history:
-                for msg in history:
-                    role = "assistant" if msg.role.lower() in ["system", "assistant"] else "user"
-                    messages.append({"role": role, "content": msg.content})
-            # Add user prompt as user message
-            messages.append({"role": "user", "content": user_prompt})
-        else:
-            messages.append({"role": "user", "content": message})
+        rag_prompt = self.generate_rag_prompt(message) if effective_use_rag else None
+        messages = self._build_messages(message, history=history, rag_prompt=rag_prompt)
 
         effective_function_calling = self.function_calling if function_calling is None else function_calling
-        if effective_function_calling:
-            # For function calling, use the instance messages
-            self.messages = messages
-            function_results = self.call_functions(language=language, id=id)
+        if effective_function_calling and self._supports(TOOLS) is False:
+            self.logger.warning(f"Deployment {self.deployment} does not support tools, skipping function calling")
+            if self.return_functions:
+                return []
+        elif effective_function_calling:
+            # Tool calls and results are appended to this request's messages
+            function_results = self.call_functions(messages, language=language, id=id)
             if self.return_functions:
                 # Return function-call results directly:
                 return function_results
 
         # Call chat API with full conversation context:
         try:
-            kwargs = {"model": self.deployment, "messages": messages}
-            if response_format is not None:
-                kwargs["response_format"] = response_format
+            kwargs = self._completion_kwargs(messages, response_format)
+
+            # Identical completions already in flight share one upstream call:
+            response = sync_single_flight.do(self._completion_flight_key(kwargs), lambda: self._create_completion(kwargs))
+
+            response_message = response.choices[0].message
+            self.logger.info(f"Model response: {response_message}")
+            
+            content = response_message.content
+            
+            # JSON 형태 검증 및 수정 (response_format이 json_object인 경우)
+            if response_format and response_format.get("type") == "json_object":
+                content = self._fix_json_response(content)
+            
+            return content
+        except Exception as e:
+            # Log minimal context to help debug upstream callers
+            snippet = message[:400] if isinstance(message, str) else str(message)[:400]
+            self.logger.error(f"chat_completion failed definitively: {e} | prompt_snippet={snippet}")
+            raise
+
+
+class _ChatRoute:
+    """
+    Deployment one chat request went to: the balancer's pick, else the client's own.
+    """
+
+    def __init__(
+        self,
+        client: _AOAIChatMixin,
+        call: CallTracker
+    ) -> None:
+        self.client = client
+        self.call = call
+        self.target: Optional[DeploymentTarget] = None
+
+    def __call__(
+        self,
+        target: DeploymentTarget,
+        kwargs: dict
+    ) -> dict:
+        """
+        Balancer hook: attribute the attempt to target and leave out what it is known to reject.
+        """
+        self.target = target
+        self.call.deployment = target.name
+        if "response_format" in kwargs and self.client._supports(JSON_MODE, target) is False:
+            kwargs = {key: value for key, value in kwargs.items() if key != "response_format"}
+        return kwargs
+
+
+class AsyncAOAIClient(_AOAIChatMixin, AsyncAzureOpenAI):
+    """
+    Chat-only async AOAI Client.
+
+    AsyncAzureOpenAI wrapper with function-calling and RAG support.
+    All instances share one size-limited HTTP connection pool, so
+    completions never block the event loop. With a balancer, chat
+    completions are spread over its deployments by token headroom.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        deployment: str,
+        api_version: str = "2023-12-01-preview",
+        scope: str = "https://cognitiveservices.azure.com/.default",
+        azure_credential: AsyncTokenCredential = None,
+        system_message: str = None,
+        function_calling: bool = False,
+        tools: list = None,
+        functions: dict[str, Callable] = None,
+        return_functions: bool = False,
+        use_rag: bool = False,
+        search_client: AsyncSearchClient = None,
+        retrieval_cache: RetrievalCache = None,
+        http_client: httpx.AsyncClient = None,
+        balancer: AOAIBalancer = None,
+        usage_stage: str = None
+    ) -> None:
+        self.logger = logging.getLogger(self.__class__.__name__)
+        if not azure_credential:
+            azure_credential = get_async_azure_credential()
+        token_provider = get_async_bearer_token_provider(azure_credential, scope)
+        AsyncAzureOpenAI.__init__(
+            self,
+            api_version=api_version,
+            azure_ad_token_provider=token_provider,
+            azure_endpoint=endpoint,
+            http_client=http_client or get_async_http_client(),
+            # Retries are handled by retry_policy:
+            max_retries=0
+        )
+        self._init_chat_state(
+            deployment=deployment,
+            api_version=api_version,
+            system_message=system_message,
+            function_calling=function_calling,
+            tools=tools,
+            functions=functions,
+            return_functions=return_functions,
+            use_rag=use_rag,
+            search_client=search_client,
+            retrieval_cache=retrieval_cache,
+            usage_stage=usage_stage,
+            balancer=balancer
+        )
+
+    def _chat_create(
+        self,
+        route: _ChatRoute,
+        **kwargs
+    ):
+        """
+        chat.completions.create, on the balancer's deployments when one is set.
+
+        route records the deployment that served the request, so usage and
+        learned capabilities are attributed to it rather than to the pool.
+        """
+        if self.balancer is None:
+            return self.chat.completions.create(**kwargs)
+        return self.balancer.create_completion(kwargs, on_target=route)
+
+    async def call_functions(
+        self,
+        messages: list,
+        language: str,
+        id: str
+    ) -> list:
+        """
+        AOAI function calling.
+
+        The model's tool calls and the function results are appended to
+        messages (the caller's list; the client's own state is not touched).
+        Returns function-call responses.
+        """
+        # Call chat API with function-calling enabled:
+        try:
+            with self._track() as call:
+                route = _ChatRoute(self, call)
+                response = await acall_with_retry(self._upstream, lambda: self._chat_create(
+                    route,
+                    model=self.deployment,
+                    messages=messages,
+                    tools=self.tools,
+                    tool_choice="auto",
+                ))
+                call.usage = response.usage
+        except Exception as e:
+            if is_unsupported(e, TOOLS):
+                self._learn(TOOLS, e, route.target)
+            raise
+        if self._supports(TOOLS, route.target) is None:
+            self._learn(TOOLS, target=route.target)
+
+        # Process model's response:
+        response_message = response.choices[0].message
+        messages.append(response_message)
+        self.logger.info(f"Model response: {response_message}")
+
+        # Handle function calls:
+        function_responses = []
+        if response_message.tool_calls:
+            for tool_call in response_message.tool_calls:
+                function_name = tool_call.function.name
+                function_args = json.loads(tool_call.function.arguments)
+                self.logger.info(f"Function call: {function_name}")
+                self.logger.info(f"Function arguments: {function_args}")
+
+                if function_name in self.functions:
+                    # All functions require single extracted parameter:
+                    func_input = next(iter(function_args.values()))
+                    func = self.functions[function_name]
+                    func_response = func(func_input, language, id)
+                    if inspect.isawaitable(func_response):
+                        func_response = await func_response
+                else:
+                    func_response = json.dumps({"error": "Unknown function"})
+
+                function_responses.append(func_response)
+                self.logger.info(f"Function response: {str(func_response)}")
+                messages.append({
+                    "tool_call_id": tool_call.id,
+                    "role": "tool",
+                    "name": function_name,
+                    "content": str(func_response)
+                })
+        else:
+            self.logger.info("No tool calls made by model.")
+
+        return function_responses
+
+    async def search_documents(
+        self,
+        query: str
+    ) -> list[dict]:
+        """
+        Hybrid (text + vector) search, served from the retrieval cache when possible.
+        """
+        if self.retrieval_cache:
+            documents = await self.retrieval_cache.aget(query)
+            if documents is not None:
+                self.logger.info("Retrieval cache hit")
+                return documents
+
+        # Identical searches already in flight share one upstream call:
+        return await single_flight.do(self._search_flight_key(query), lambda: self._search_upstream(query))
+
+    async def _search_upstream(
+        self,
+        query: str
+    ) -> list[dict]:
+        self.logger.info("Calling search client")
+        vector_query = VectorizableTextQuery(
+            text=query,
+            k_nearest_neighbors=50,
+            fields="text_vector"
+        )
+
+        async def search() -> list[dict]:
+            # Results are paged lazily, so reading them is part of the retried call
+            search_results = await self.search_client.search(
+                search_text=query,
+                vector_queries=[vector_query],
+                select=["title", "chunk"],
+                top=5
+            )
+            return [{"title": doc["title"], "chunk": doc["chunk"]} async for doc in search_results]
+
+        documents = await acall_with_retry(self._search_upstream_name, search)
+
+        if self.retrieval_cache:
+            await self.retrieval_cache.aset(query, documents)
+        return documents
+
+    async def generate_rag_prompt(
+        self,
+        query: str
+    ) -> tuple[str, str]:
+        """
+        Generates RAG grounding prompt given query and async search client.
+        Returns (system_prompt, user_prompt) tuple.
+        """
+        sources_formatted = format_sources(await self.search_documents(query))
+        return split_rag_prompt(query, sources_formatted)
+
+    async def _create_completion(
+        self,
+        kwargs: dict
+    ):
+        """
+        Create a chat completion under the retry policy.
 
+        The first request using response_format probes JSON mode support:
+        if the deployment rejects the parameter, the request is retried
+        without it and later requests leave it out from the start.
+        """
+        kwargs = dict(kwargs)
+        with self._track() as call:
+            route = _ChatRoute(self, call)
             try:
                 self.logger.info(f"Attempting chat completion with kwargs: {kwargs}")
-                response = self.chat.completions.create(**kwargs)
+                response = await acall_with_retry(self._upstream, lambda: self._chat_create(route, **kwargs))
             except Exception as e:
-                self.logger.warning(
-                    f"Initial chat completion call failed with error: {e}. "
-                    "Retrying without response_format if it was used."
-                )
-                if "response_format" in kwargs:
-                    kwargs.pop("response_format")
-                    self.logger.info(f"Retrying chat completion with kwargs: {kwargs}")
-                    response = self.chat.completions.create(**kwargs)
-                else:
-                    # If response_format wasn't the issue, re-raise the original error
+                if "response_format" not in kwargs or not is_unsupported(e, JSON_MODE):
                     raise
+                self._learn(JSON_MODE, e, route.target)
+                kwargs.pop("response_format")
+                response = await acall_with_retry(self._upstream, lambda: self._chat_create(route, **kwargs))
+            else:
+                if "response_format" in kwargs and self._supports(JSON_MODE, route.target) is None:
+                    self._learn(JSON_MODE, target=route.target)
+            call.usage = response.usage
+        return response
+
+    async def chat_completion(
+        self,
+        message: str,
+        language: str = None,
+        id: str = None,
+        history: list = None,
+        use_rag: bool | None = None,
+        function_calling: bool | None = None,
+        response_format: dict | None = None,
+        rag_prompt: tuple[str, str] | None = None
+    ) -> str:
+        """
+        AOAI chat completion with conversation history.
+
+        A precomputed rag_prompt (see generate_rag_prompt) skips retrieval.
+        """
+        effective_use_rag = self.use_rag if use_rag is None else use_rag
+        if rag_prompt is None and effective_use_rag:
+            rag_prompt = await self.generate_rag_prompt(message)
+        messages = self._build_messages(message, history=history, rag_prompt=rag_prompt)
+
+        effective_function_calling = self.function_calling if function_calling is None else function_calling
+        if effective_function_calling and self._supports(TOOLS) is False:
+            self.logger.warning(f"Deployment {self.deployment} does not support tools, skipping function calling")
+            if self.return_functions:
+                return []
+        elif effective_function_calling:
+            # Tool calls and results are appended to this request's messages
+            function_results = await self.call_functions(messages, language=language, id=id)
+            if self.return_functions:
+                # Return function-call results directly:
+                return function_results
+
+        # Call chat API with full conversation context:
+        try:
+            kwargs = self._completion_kwargs(messages, response_format)
+
+            # Identical completions already in flight share one upstream call:
+            response = await single_flight.do(self._completion_flight_key(kwargs), lambda: self._create_completion(kwargs))
 
             response_message = response.choices[0].message
             self.logger.info(f"Model response: {response_message}")
-            
+
             content = response_message.content
-            
+
             # JSON 형태 검증 및 수정 (response_format이 json_object인 경우)
             if response_format and response_format.get("type") == "json_object":
                 content = self._fix_json_response(content)
-            
+
             return content
         except Exception as e:
             # Log minimal context to help debug upstream callers
             snippet = message[:400] if isinstance(message, str) else str(message)[:400]
             self.logger.error(f"chat_completion failed definitively: {e} | prompt_snippet={snippet}")
             raise
+
+    async def embed(
+        self,
+        text: str
+    ) -> list[float]:
+        """
+        Create an embedding for text with this client's (embedding) deployment.
+        """
+        key = request_key("embedding", str(self.base_url), self.deployment, text)
+        response = await single_flight.do(key, lambda: acall_with_retry(
+            self._upstream,
+            lambda: self.embeddings.create(model=self.deployment, input=text)
+        ))
+        return response.data[0].embedding
+
+    async def chat_completion_stream(
+        self,
+        message: str,
+        history: list = None,
+        use_rag: bool | None = None,
+        rag_prompt: tuple[str, str] | None = None
+    ) -> AsyncIterator[str]:
+        """
+        Streaming AOAI chat completion with conversation history.
+
+        Yields content deltas as soon as the model produces them.
+        A precomputed rag_prompt (see generate_rag_prompt) skips retrieval.
+        """
+        effective_use_rag = self.use_rag if use_rag is None else use_rag
+        if rag_prompt is None and effective_use_rag:
+            rag_prompt = await self.generate_rag_prompt(message)
+        messages = self._build_messages(message, history=history, rag_prompt=rag_prompt)
+
+        if self._supports(STREAMING) is False:
+            # Deployment cannot stream: deliver the whole answer as one delta
+            yield await self.chat_completion(message, history=history, use_rag=False, rag_prompt=rag_prompt)
+            return
+
+        self.logger.info(f"Attempting streaming chat completion with {len(messages)} messages")
+        with self._track() as call:
+            route = _ChatRoute(self, call)
+            try:
+                # Only opening the stream is retried, never a partially delivered answer
+                stream = await acall_with_retry(self._upstream, lambda: self._chat_create(
+                    route,
+                    model=self.deployment,
+                    messages=messages,
+                    stream=True
+                ))
+            except Exception as e:
+                if not is_unsupported(e, STREAMING):
+                    raise
+                self._learn(STREAMING, e, route.target)
+                stream = None
+
+            if stream is not None:
+                if self._supports(STREAMING, route.target) is None:
+                    self._learn(STREAMING, target=route.target)
+                # Streams carry no usage: count what was delivered, even if the client stops reading
+                prompt_tokens = estimate_prompt_tokens(messages)
+                completion_tokens = 0
+                call.set_estimate(prompt_tokens, completion_tokens)
+                async for chunk in stream:
+                    # Azure may send chunks without choices (e.g. content-filter results):
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        completion_tokens += count_tokens(delta)
+                        call.set_estimate(prompt_tokens, completion_tokens)
+                        yield delta
+
+        if stream is None:
+            yield await self.chat_completion(message, history=history, use_rag=False, rag_prompt=rag_prompt)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+"""
+예약 저장소 조회/가용 슬롯 벤치마크
+
+cd src/backend/src/
+python benchmarks/bench_appointment_repository.py [--appointments 200000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.appointment import AppointmentRequest, AppointmentStatus
+from services.appointment_service import AppointmentService
+from services.appointment_repository import BASE_SLOTS
+
+DEPARTMENTS = ["내과", "외과", "소화기내과", "정신과", "정형외과", "피부과"]
+
+
+def populate(service: AppointmentService, count: int) -> list[str]:
+    ids = []
+    for i in range(count):
+        appointment = AppointmentRequest(
+            appointment_id=service.repository.next_appointment_id(),
+            patient_name="홍길동",
+            phone_number=f"010-{i // 10000:04d}-{i % 10000:04d}",
+            preferred_date=f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+            preferred_time=BASE_SLOTS[i % len(BASE_SLOTS)],
+            department=DEPARTMENTS[i % len(DEPARTMENTS)],
+            consultation_summary="",
+            status=AppointmentStatus.CONFIRMED
+        )
+        service.repository.add(appointment)
+        ids.append(appointment.appointment_id)
+    return ids
+
+
+def timed(label: str, lookups: int, func) -> None:
+    start = time.perf_counter()
+    for _ in range(lookups):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label}: {elapsed / lookups * 1e6:.2f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Appointment repository benchmark")
+    parser.add_argument("--appointments", type=int, default=200000)
+    parser.add_argument("--lookups", type=int, default=10000)
+    args = parser.parse_args()
+
+    service = AppointmentService()
+    start = time.perf_counter()
+    ids = populate(service, args.appointments)
+    print(f"appointments: {service.count_appointments()}, populate: {time.perf_counter() - start:.2f}s")
+
+    rng = random.Random(0)
+    timed("get_appointment", args.lookups, lambda: service.get_appointment(rng.choice(ids)))
+    timed("get_available_slots", args.lookups, lambda: service.get_available_slots(
+        rng.choice(DEPARTMENTS), f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"))
+    timed("is_slot_available", args.lookups, lambda: service.is_slot_available(
+        rng.choice(DEPARTMENTS), f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", rng.choice(BASE_SLOTS)))
+
+
+if __name__ == "__main__":
+    main()
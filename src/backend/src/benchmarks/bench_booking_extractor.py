@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+"""
+예약 정보 추출기 마이크로 벤치마크
+
+cd src/backend/src/
+python benchmarks/bench_booking_extractor.py [--iterations 2000]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from booking_extractor import booking_extractor, PATIENT_NAME, PHONE_NUMBER, PREFERRED_DATE, PREFERRED_TIME
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "booking_utterances.txt")
+
+
+def load_corpus(path: str = CORPUS_PATH) -> list[str]:
+    with open(path, "r", encoding="utf-8") as fp:
+        return [line.strip() for line in fp if line.strip() and not line.startswith("#")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Booking field extractor micro-benchmark")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+
+    # 필드별 추출 건수
+    coverage = {PATIENT_NAME: 0, PHONE_NUMBER: 0, PREFERRED_DATE: 0, PREFERRED_TIME: 0}
+    for utterance in corpus:
+        for name in booking_extractor.extract(utterance):
+            coverage[name] += 1
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        for utterance in corpus:
+            booking_extractor.extract(utterance)
+    elapsed = time.perf_counter() - start
+
+    calls = args.iterations * len(corpus)
+    print(f"utterances: {len(corpus)}, iterations: {args.iterations}")
+    print(f"total: {elapsed:.3f}s, per utterance: {elapsed / calls * 1e6:.2f}us, throughput: {calls / elapsed:,.0f}/s")
+    for name, count in coverage.items():
+        print(f"  {name}: {count}/{len(corpus)}")
+
+
+if __name__ == "__main__":
+    main()
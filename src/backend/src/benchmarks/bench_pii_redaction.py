@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+"""
+긴 CPX 대화 기록의 PII 치환 벤치마크 (엔티티별 str.replace vs 단일 패스 Aho-Corasick)
+
+cd src/backend/src/
+python benchmarks/bench_pii_redaction.py [--turns 400] [--entities 60] [--repeat 20]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aho_corasick import AhoCorasickReplacer
+
+SURNAMES = ["김", "이", "박", "최", "정", "강", "조", "윤", "장", "임"]
+GIVEN_NAMES = ["민준", "서연", "도윤", "지우", "하준", "서윤", "철수", "영희", "지호", "수아"]
+DOCTOR_LINES = [
+    "어디가 불편해서 오셨어요?",
+    "언제부터 증상이 있으셨나요?",
+    "복용 중인 약이 있으신가요?",
+    "가족 중에 비슷한 병을 앓은 분이 있나요?",
+    "검사 결과는 {phone}로 연락드리겠습니다.",
+    "{name}님, 숨을 크게 들이쉬어 보세요."
+]
+PATIENT_LINES = [
+    "저는 {name}이고 {address}에 살아요.",
+    "사흘 전부터 배가 아프고 열이 났어요.",
+    "보호자는 {name} 씨이고 번호는 {phone}입니다.",
+    "혈압약을 먹고 있어요.",
+    "어머니가 당뇨가 있으세요.",
+    "{name} 선생님께 진료받은 적이 있어요."
+]
+
+
+def make_entities(count: int, rng: random.Random) -> list[tuple[str, str]]:
+    """이름(성 포함/미포함 → 부분 문자열 중첩), 전화번호, 주소 엔티티"""
+    entities = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            given = rng.choice(GIVEN_NAMES)
+            entities.append(("PERSON", rng.choice(SURNAMES) + given))
+            entities.append(("PERSON", given))
+        elif kind == 1:
+            entities.append(("PHONENUMBER", f"010-{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}"))
+        else:
+            entities.append(("ADDRESS", f"서울시 {rng.choice(['강남구', '마포구', '종로구'])} {rng.randint(1, 300)}번길"))
+    # 중복 제거 (세션 매핑과 동일하게 엔티티 텍스트당 키 하나)
+    return list({text: (category, text) for category, text in entities}.values())
+
+
+def make_transcript(turns: int, entities: list[tuple[str, str]], rng: random.Random) -> str:
+    by_category = {}
+    for category, text in entities:
+        by_category.setdefault(category, []).append(text)
+    lines = []
+    for turn in range(turns):
+        speaker, templates = ("의사", DOCTOR_LINES) if turn % 2 == 0 else ("환자", PATIENT_LINES)
+        lines.append(f"{speaker}: " + rng.choice(templates).format(
+            name=rng.choice(by_category["PERSON"]),
+            phone=rng.choice(by_category["PHONENUMBER"]),
+            address=rng.choice(by_category["ADDRESS"])
+        ))
+    return "\n".join(lines)
+
+
+def replace_per_entity(text: str, mapping: dict[str, str], redact: bool) -> str:
+    """기존 방식: 매핑 항목마다 str.replace"""
+    for redaction, entity in mapping.items():
+        text = text.replace(entity, redaction) if redact else text.replace(redaction, entity)
+    return text
+
+
+def timed(func, repeat: int) -> tuple[float, str]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PII redaction benchmark")
+    parser.add_argument("--turns", type=int, default=400)
+    parser.add_argument("--entities", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    entities = make_entities(args.entities, rng)
+    transcript = make_transcript(args.turns, entities, rng)
+    # 짧은 이름이 먼저 매핑된 경우 (대화 초반에 이름만 언급) 기존 방식은 긴 이름을 깨뜨림
+    entities.sort(key=lambda entity: len(entity[1]))
+    mapping = {f"{{PII_{category}_{i}}}": text for i, (category, text) in enumerate(entities, start=1)}
+    print(f"transcript: {len(transcript)} chars, {args.turns} turns, mapping: {len(mapping)} entities")
+
+    baseline_redact, baseline_redacted = timed(lambda: replace_per_entity(transcript, mapping, True), args.repeat)
+    baseline_restore, baseline_restored = timed(lambda: replace_per_entity(baseline_redacted, mapping, False), args.repeat)
+
+    build, (redacter, restorer) = timed(lambda: (
+        AhoCorasickReplacer({entity: redaction for redaction, entity in mapping.items()}),
+        AhoCorasickReplacer(mapping)
+    ), args.repeat)
+    automaton_redact, redacted = timed(lambda: redacter.replace(transcript), args.repeat)
+    automaton_restore, restored = timed(lambda: restorer.replace(redacted), args.repeat)
+
+    print(f"  str.replace per entity: redact {baseline_redact * 1e3:.2f}ms, reconstruct {baseline_restore * 1e3:.2f}ms, "
+          f"round trip exact: {baseline_restored == transcript}")
+    print(f"  aho-corasick (cached):  redact {automaton_redact * 1e3:.2f}ms, reconstruct {automaton_restore * 1e3:.2f}ms, "
+          f"round trip exact: {restored == transcript}")
+    print(f"  automaton build (both directions, once per mapping change): {build * 1e3:.2f}ms")
+    # 대화에 등장했지만 자기 키로 치환되지 않은 엔티티 (더 짧은 엔티티에 의해 쪼개짐 → 성 등 일부 노출)
+    longest = [text for text in mapping.values() if not any(text != other and text in other for other in mapping.values())]
+    present = {key: text for key, text in mapping.items() if text in longest and text in transcript}
+    split_baseline = [text for key, text in present.items() if key not in baseline_redacted]
+    split_automaton = [text for key, text in present.items() if key not in redacted]
+    print(f"  entities split by a shorter entity: str.replace {len(split_baseline)}/{len(present)}, "
+          f"aho-corasick {len(split_automaton)}/{len(present)}")
+    if restored != transcript or split_automaton:
+        raise SystemExit("aho-corasick redaction mismatch")
+
+
+if __name__ == "__main__":
+    main()
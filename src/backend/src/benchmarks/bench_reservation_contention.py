@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+"""
+동시 예약 확정 경합 벤치마크 (같은 슬롯에 수백 건 동시 확정 → 슬롯당 1건만 성공해야 함)
+
+cd src/backend/src/
+python benchmarks/bench_reservation_contention.py [--contenders 300] [--slots 4] [--connections 4]
+"""
+import os
+import sys
+import time
+import tempfile
+import argparse
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.appointment import AppointmentRequest, AppointmentStatus
+from services.appointment_repository import InMemoryAppointmentRepository, SlotUnavailableError, BASE_SLOTS
+from services.sqlite_appointment_repository import SQLiteAppointmentRepository
+
+
+def run(label: str, repositories: list, contenders: int, slots: list[str]) -> None:
+    barrier = threading.Barrier(contenders)
+    latencies: list[float] = []
+    outcomes: list[tuple[str, bool]] = []
+    lock = threading.Lock()
+
+    def confirm(i: int) -> None:
+        repository = repositories[i % len(repositories)]
+        slot = slots[i % len(slots)]
+        appointment = AppointmentRequest(
+            appointment_id=repository.next_appointment_id(),
+            patient_name="홍길동",
+            phone_number=f"010-0000-{i:04d}",
+            preferred_date="2026-10-20",
+            preferred_time=slot,
+            department="내과",
+            consultation_summary="",
+            status=AppointmentStatus.CONFIRMED
+        )
+        holder = f"chat-{i}"
+        barrier.wait()
+        start = time.perf_counter()
+        try:
+            # 확인 요청 시 hold, 확정 시 claim (실제 예약 흐름과 동일)
+            repository.try_hold(appointment.department, appointment.preferred_date, slot, holder=holder)
+            repository.claim(appointment, holder=holder)
+            won = True
+        except SlotUnavailableError:
+            won = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            outcomes.append((slot, won))
+
+    threads = [threading.Thread(target=confirm, args=(i,)) for i in range(contenders)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    winners = {slot: sum(1 for s, won in outcomes if s == slot and won) for slot in slots}
+    stored = repositories[0].count()
+    latencies.sort()
+    print(f"{label}:")
+    print(f"  confirmations: {contenders}, slots: {len(slots)}, winners per slot: {winners}, stored: {stored}")
+    print(f"  wall: {wall * 1e3:.1f}ms, p50: {latencies[len(latencies) // 2] * 1e3:.2f}ms, "
+          f"p99: {latencies[int(len(latencies) * 0.99)] * 1e3:.2f}ms")
+    if any(count != 1 for count in winners.values()) or stored != len(slots):
+        raise SystemExit(f"{label}: double booking or lost booking detected")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reservation contention benchmark")
+    parser.add_argument("--contenders", type=int, default=300)
+    parser.add_argument("--slots", type=int, default=4)
+    parser.add_argument("--connections", type=int, default=4, help="SQLite connections sharing one DB file")
+    args = parser.parse_args()
+
+    slots = BASE_SLOTS[:args.slots]
+    run("memory", [InMemoryAppointmentRepository()], args.contenders, slots)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "appointments.db")
+        repositories = [SQLiteAppointmentRepository(path) for _ in range(args.connections)]
+        try:
+            run(f"sqlite ({args.connections} connections)", repositories, args.contenders, slots)
+        finally:
+            for repository in repositories:
+                repository.close()
+
+
+if __name__ == "__main__":
+    main()
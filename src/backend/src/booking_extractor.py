@@ -0,0 +1,128 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import re
+from dataclasses import dataclass
+from typing import Optional
+from korean_datetime import KoreanDateTimeNormalizer, korean_datetime, DATE_EXPRESSION, TIME_EXPRESSION
+
+"""
+Single-pass booking field extractor.
+
+All field patterns are compiled once into a single alternation, so a
+message is scanned exactly once. Every extracted field carries the span
+it matched and a confidence score.
+"""
+
+PATIENT_NAME = "patient_name"
+PHONE_NUMBER = "phone_number"
+PREFERRED_DATE = "preferred_date"
+PREFERRED_TIME = "preferred_time"
+
+# 이름으로 오인되기 쉬운 단어
+_NAME_STOPWORDS = frozenset([
+    "내일", "모레", "글피", "오늘", "예약", "접수", "진료", "오전", "오후", "아침", "점심", "저녁",
+    "감사", "좋아요", "괜찮", "맞아요", "부탁", "전화", "번호", "연락처", "시간", "날짜", "다음",
+    "이번", "그럼", "그러면", "제가", "저는", "환자", "보호자", "선생님", "의사"
+])
+
+# One alternation over all fields; earlier alternatives win at the same position.
+_BOOKING_FIELDS = re.compile(
+    # 전화번호: 010-1234-5678, 010 1234 5678, 01012345678
+    r"(?P<phone>(?<!\d)\d{3}[-\s]?\d{3,4}[-\s]?\d{4}(?!\d))"
+    # 날짜: 10월 27일, 내일, 다음주 화요일, 27일 ... (korean_datetime.py)
+    r"|(?P<date>" + DATE_EXPRESSION + r")"
+    # 시간: 오후 3시 반, 3시, 오전 열한시, 14:30, 점심 ... (korean_datetime.py)
+    r"|(?P<time>" + TIME_EXPRESSION + r")"
+    # 이름: 성함은 홍길동, 홍길동입니다, 홍길동, 010-...
+    r"|(?:성함|이름)\s*(?:은|는|이|:)?\s*(?P<name_intro>[가-힣]{2,4}?)(?=[^가-힣]|$|이고|이요|요|입니다|이에요|예요|이라고|라고)"
+    r"|(?<![가-힣])(?P<name_copula>[가-힣]{2,4})(?=입니다|이에요|예요|이라고|라고)"
+    r"|^\s*(?P<name_lead>[가-힣]{2,4})(?=\s*,|\s+0\d)"
+    r"|(?<![가-힣])(?P<name_before_phone>[가-힣]{2,4})(?=\s+01\d)",
+    re.MULTILINE
+)
+
+
+@dataclass
+class ExtractedField:
+    """Extracted booking field with matched span and confidence."""
+    value: str
+    span: tuple[int, int]
+    confidence: float
+
+
+class BookingFieldExtractor:
+    """정규식 기반 예약 정보 단일 패스 추출기"""
+
+    def __init__(self, normalizer: KoreanDateTimeNormalizer = korean_datetime):
+        self.normalizer = normalizer
+
+    def extract(
+        self,
+        message: str
+    ) -> dict[str, ExtractedField]:
+        """메시지를 한 번 스캔하여 필드별 최고 신뢰도 추출 결과 반환"""
+        fields: dict[str, ExtractedField] = {}
+        for match in _BOOKING_FIELDS.finditer(message):
+            extracted = self._to_field(match)
+            if extracted is None:
+                continue
+            name, field = extracted
+            current = fields.get(name)
+            if current is None or field.confidence > current.confidence:
+                fields[name] = field
+        return fields
+
+    def extract_values(
+        self,
+        message: str,
+        min_confidence: float = 0.0
+    ) -> dict[str, str]:
+        """필드 값만 반환 (min_confidence 미만은 제외)"""
+        return {
+            name: field.value
+            for name, field in self.extract(message).items()
+            if field.confidence >= min_confidence
+        }
+
+    def _to_field(
+        self,
+        match: re.Match
+    ) -> Optional[tuple[str, ExtractedField]]:
+        kind = match.lastgroup
+        span = match.span(kind)
+
+        if kind == "phone":
+            digits = re.sub(r"\D", "", match.group("phone"))
+            if len(digits) == 11:
+                value = f"{digits[:3]}-{digits[3:7]}-{digits[7:]}"
+            else:
+                value = f"{digits[:3]}-{digits[3:6]}-{digits[6:]}"
+            return PHONE_NUMBER, ExtractedField(value, span, 0.95 if digits.startswith("01") else 0.7)
+
+        if kind == "date":
+            # Date/time groups end with nested groups, so lastgroup is the outer one
+            resolved = self.normalizer.resolve_date_match(match)
+            if resolved is None:
+                return None
+            value, confidence = resolved
+            return PREFERRED_DATE, ExtractedField(value.isoformat(), span, confidence)
+
+        if kind == "time":
+            resolved = self.normalizer.resolve_time_match(match)
+            if resolved is None:
+                return None
+            value, confidence = resolved
+            return PREFERRED_TIME, ExtractedField(value.strftime("%H:%M"), span, confidence)
+
+        if kind.startswith("name_"):
+            name = match.group(kind)
+            if name in _NAME_STOPWORDS or any(name.startswith(word) for word in _NAME_STOPWORDS):
+                return None
+            confidence = {"name_intro": 0.95, "name_copula": 0.8}.get(kind, 0.7)
+            return PATIENT_NAME, ExtractedField(name, span, confidence)
+
+        return None
+
+
+# 전역 추출기 인스턴스
+booking_extractor = BookingFieldExtractor()
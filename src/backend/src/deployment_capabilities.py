@@ -0,0 +1,109 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import time
+import threading
+from typing import Optional
+from retry_policy import ErrorClass, classify
+
+"""
+Per-deployment capability cache.
+
+Not every deployment / API version accepts JSON mode (response_format),
+tools or streaming. The first request that uses a feature doubles as the
+probe: its outcome is remembered per (endpoint, deployment, API version),
+so later requests are built the right way on the first attempt instead of
+paying for a rejected request every time.
+"""
+
+JSON_MODE = "json_mode"
+TOOLS = "tools"
+STREAMING = "streaming"
+
+# Request parameter that a deployment rejects when it lacks the capability:
+CAPABILITY_PARAMETERS = {
+    JSON_MODE: "response_format",
+    TOOLS: "tools",
+    STREAMING: "stream"
+}
+
+
+def is_unsupported(
+    error: BaseException,
+    capability: str
+) -> bool:
+    """
+    Whether error is a 400 rejecting the capability's request parameter
+    (not e.g. a content-filter or context-length rejection).
+    """
+    if classify(error) != ErrorClass.BAD_REQUEST:
+        return False
+    parameter = CAPABILITY_PARAMETERS[capability]
+    return getattr(error, "param", None) == parameter or parameter in str(error)
+
+
+class CapabilityRegistry:
+    """
+    Learned capabilities per deployment: True / False, absent while unknown.
+    """
+
+    def __init__(self) -> None:
+        self._deployments: dict[tuple[str, str, str], dict[str, dict]] = {}
+        self._lock = threading.Lock()
+
+    def supports(
+        self,
+        key: tuple[str, str, str],
+        capability: str
+    ) -> Optional[bool]:
+        """
+        True / False once learned, None while the capability has not been probed.
+        """
+        entry = self._deployments.get(key, {}).get(capability)
+        return None if entry is None else entry["supported"]
+
+    def record(
+        self,
+        key: tuple[str, str, str],
+        capability: str,
+        supported: bool,
+        detail: str = None
+    ) -> None:
+        with self._lock:
+            capabilities = self._deployments.setdefault(key, {})
+            current = capabilities.get(capability)
+            if current is not None and current["supported"] == supported:
+                return
+            capabilities[capability] = {
+                "supported": supported,
+                "learned_at": time.time(),
+                "detail": detail
+            }
+
+    def forget(
+        self,
+        key: tuple[str, str, str] = None
+    ) -> None:
+        """
+        Re-probe a deployment (or all) on next use, e.g. after an upgrade.
+        """
+        with self._lock:
+            if key is None:
+                self._deployments.clear()
+            else:
+                self._deployments.pop(key, None)
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "endpoint": endpoint,
+                    "deployment": deployment,
+                    "api_version": api_version,
+                    "capabilities": {name: dict(entry) for name, entry in capabilities.items()}
+                }
+                for (endpoint, deployment, api_version), capabilities in self._deployments.items()
+            ]
+
+
+# Shared by all AOAI clients:
+capability_registry = CapabilityRegistry()
@@ -0,0 +1,169 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+"""
+Rule-based fast-path intent classifier (BOOKING / CONSULTATION).
+
+Handles unambiguous messages deterministically so the LLM intent call
+is only needed for ambiguous input.
+"""
+
+BOOKING = "BOOKING"
+CONSULTATION = "CONSULTATION"
+
+FAST_PATH_THRESHOLD = float(os.environ.get("INTENT_FAST_PATH_THRESHOLD", "0.85"))
+
+# 명시적 예약 키워드
+_EXPLICIT_BOOKING = re.compile(
+    r"예약|접수|잡아\s*(?:주|줘|드)|진료\s*(?:받고|보고)\s*싶"
+)
+# 예약 거절 표현 (예약 키워드가 있어도 LLM에 맡김)
+_BOOKING_NEGATION = re.compile(
+    r"예약\s*(?:은|는)?\s*(?:안|말고|필요\s*없|괜찮|나중|취소)|안\s*할래|필요\s*없|싫어|아니"
+)
+# 예약 정보 (전화번호, 날짜/시간)
+_PHONE = re.compile(r"01[016789][-\s]?\d{3,4}[-\s]?\d{4}")
+_DATE = re.compile(
+    r"내일|모레|글피|오늘|\d{1,2}\s*월\s*\d{1,2}\s*일|\d{1,2}\s*일\s*(?:에|로|날)"
+    r"|(?:이번|다음|담)\s*주|[월화수목금토일]요일"
+)
+_TIME = re.compile(
+    r"(?:오전|오후|아침|점심|저녁)\s*\d{0,2}\s*시?|\d{1,2}\s*시(?!간)|\d{1,2}:\d{2}"
+)
+_NAME_INTRO = re.compile(r"(?:성함|이름)\s*은|[가-힣]{2,4}\s*(?:입니다|이에요|예요)\s*[.,!]?\s*$")
+# 짧은 긍정 응답 (예약 제안에 대한 답변)
+_AFFIRMATIVE = re.compile(
+    r"^\s*(?:네|예|응|넵|좋아요|좋습니다|좋아|그래요|그래|그렇게\s*해\s*주세요|맞아요|맞습니다|해\s*주세요|해\s*줘|부탁\s*드려요|부탁합니다)"
+    r"\s*[.,!~]*\s*$"
+)
+# 예약 확정 표현
+_CONFIRMATION = re.compile(
+    r"예약\s*(?:할게|할래|하겠|해\s*주|해\s*줘|진행)|진행\s*해\s*주|그대로\s*(?:해|진행)|그걸로\s*해"
+)
+# 예약 제안 문구 (직전 어시스턴트 메시지)
+_BOOKING_OFFER = re.compile(r"예약을?\s*(?:잡아|도와)\s*드릴까요|예약\s*하시겠|진행하시겠습니까|맞으신가요")
+# 증상/의학적 질문 표현
+_SYMPTOM = re.compile(
+    r"아파|아프|아픈|통증|쑤시|저리|결리|답답|어지러|메스꺼|울렁|구토|토했|설사|변비|기침|가래|콧물"
+    r"|열이|발열|오한|두통|복통|가려|붓|부었|피가|출혈|숨이|숨쉬|체했|소화|증상|약을|먹어도|괜찮을까"
+    r"|\d{1,2}\s*점|며칠\s*전|일주일|어제부터|부터\s*(?:아|계속)"
+)
+
+
+@dataclass
+class IntentPrediction:
+    """Fast-path classification result."""
+    intent: Optional[str]
+    confidence: float
+    rule: str
+
+    def is_confident(self, threshold: float = FAST_PATH_THRESHOLD) -> bool:
+        return self.intent is not None and self.confidence >= threshold
+
+
+class RuleBasedIntentClassifier:
+    """규칙 기반 의도 사전 분류기"""
+
+    def __init__(self, threshold: float = FAST_PATH_THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._counters = {
+            "total": 0,
+            "fast_path_booking": 0,
+            "fast_path_consultation": 0,
+            "llm_fallback": 0,
+        }
+
+    def classify(
+        self,
+        message: str,
+        last_assistant_message: str = "",
+        booking_in_progress: bool = False
+    ) -> IntentPrediction:
+        """메시지를 BOOKING/CONSULTATION으로 분류 (애매하면 intent=None)"""
+        text = message.strip()
+        if not text:
+            return IntentPrediction(None, 0.0, "empty")
+
+        has_symptom = bool(_SYMPTOM.search(text))
+        has_phone = bool(_PHONE.search(text))
+        has_datetime = bool(_DATE.search(text) or _TIME.search(text))
+
+        if _EXPLICIT_BOOKING.search(text):
+            if _BOOKING_NEGATION.search(text):
+                return IntentPrediction(None, 0.5, "booking_negation")
+            if has_symptom and not booking_in_progress:
+                # "예약 전에 물어볼게요, 배가 아픈데..." 같은 혼합 문장
+                return IntentPrediction(BOOKING, 0.7, "booking_keyword_with_symptom")
+            return IntentPrediction(BOOKING, 0.95, "booking_keyword")
+
+        if has_phone:
+            return IntentPrediction(BOOKING, 0.95, "phone_number")
+
+        offered = bool(_BOOKING_OFFER.search(last_assistant_message or ""))
+        if _AFFIRMATIVE.match(text):
+            if booking_in_progress or offered:
+                return IntentPrediction(BOOKING, 0.95, "affirmative_to_offer")
+            return IntentPrediction(None, 0.4, "affirmative_without_offer")
+
+        if booking_in_progress and (has_datetime or _NAME_INTRO.search(text)) and not has_symptom:
+            return IntentPrediction(BOOKING, 0.9, "booking_field")
+
+        if has_symptom and not has_datetime:
+            return IntentPrediction(CONSULTATION, 0.9, "symptom")
+        if has_symptom:
+            # "어제 오후부터 아파요" 처럼 시간 표현이 증상 설명에 포함될 수 있음
+            return IntentPrediction(CONSULTATION, 0.8 if booking_in_progress else 0.85, "symptom_with_time")
+
+        return IntentPrediction(None, 0.0, "no_rule")
+
+    def predict(
+        self,
+        message: str,
+        last_assistant_message: str = "",
+        booking_in_progress: bool = False
+    ) -> Optional[str]:
+        """
+        Fast-path prediction with counters.
+
+        Returns the intent when confident, otherwise None (caller falls back to LLM).
+        """
+        prediction = self.classify(message, last_assistant_message, booking_in_progress)
+        confident = prediction.is_confident(self.threshold)
+        with self._lock:
+            self._counters["total"] += 1
+            if not confident:
+                self._counters["llm_fallback"] += 1
+            elif prediction.intent == BOOKING:
+                self._counters["fast_path_booking"] += 1
+            else:
+                self._counters["fast_path_consultation"] += 1
+        return prediction.intent if confident else None
+
+    def is_booking_request(self, message: str) -> bool:
+        """키워드 기반 예약 요청 여부 (LLM 실패 시 안전장치)"""
+        return self.classify(message).intent == BOOKING
+
+    def is_confirmation(self, message: str) -> bool:
+        """예약 확정 의도 여부 (짧은 긍정 응답 또는 명시적 확정 표현)"""
+        text = message.strip()
+        if _BOOKING_NEGATION.search(text):
+            return False
+        return bool(_AFFIRMATIVE.match(text) or _CONFIRMATION.search(text))
+
+    def get_stats(self) -> dict:
+        """Fast-path hit counters."""
+        with self._lock:
+            stats = dict(self._counters)
+        fast_path = stats["fast_path_booking"] + stats["fast_path_consultation"]
+        stats["fast_path_rate"] = round(fast_path / stats["total"], 4) if stats["total"] else 0.0
+        return stats
+
+
+# 전역 분류기 인스턴스
+intent_classifier = RuleBasedIntentClassifier()
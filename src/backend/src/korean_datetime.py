@@ -0,0 +1,256 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import re
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Optional
+
+"""
+Korean date/time expression normalization.
+
+Resolves expressions such as 내일, 다음주 화요일, 이번 금요일, 10월 27일,
+오후 3시 반 or 14:30 against an injectable clock. Booking dates are
+stored as ISO dates (YYYY-MM-DD) and times as HH:MM; format_korean_date
+and format_korean_time render them for users.
+"""
+
+BOOKING_TIMEZONE = os.environ.get("BOOKING_TIMEZONE", "Asia/Seoul")
+
+# Pattern sources are shared with the booking field extractor, which embeds
+# them into its single-pass alternation; group names must stay unique.
+DATE_EXPRESSION = (
+    r"(?<!\d)(?P<iso_year>\d{4})[-./](?P<iso_month>\d{1,2})[-./](?P<iso_day>\d{1,2})(?!\d)"
+    r"|(?:(?P<year>\d{4})\s*년\s*)?(?<!\d)(?P<month>\d{1,2})\s*월\s*(?P<day>\d{1,2})\s*일"
+    r"|(?P<month_rel>이번|다음|담)\s*달\s*(?P<month_rel_day>\d{1,2})\s*일"
+    r"|(?:(?P<week>다다음\s*주|다음\s*주|담\s*주|이번\s*주|금주|다음|이번)\s*)?(?P<weekday>[월화수목금토일])요일"
+    r"|(?P<relative>오늘|내일|모레|글피)"
+    r"|(?<!\d)(?P<days_after>\d{1,2})\s*일\s*(?:후|뒤)"
+    r"|(?<!\d)(?P<day_only>\d{1,2})\s*일(?!\s*(?:간|동안|전|째|부터|정도|후|뒤))"
+)
+TIME_EXPRESSION = (
+    r"(?:(?P<period>오전|오후|아침|점심|저녁|밤|새벽)\s*)?"
+    r"(?:(?P<hour>(?<!\d)\d{1,2})|(?P<native_hour>열한|열두|한|두|셋|세|넷|네|다섯|여섯|일곱|여덟|아홉|열))\s*시(?!간)"
+    r"(?:\s*(?P<half>반)|\s*(?P<minute>\d{1,2})\s*분)?"
+    r"|(?<!\d)(?P<hh>\d{1,2}):(?P<mm>\d{2})(?!\d)"
+    r"|(?P<period_only>오전|오후|아침|점심|저녁)"
+)
+
+_DATE = re.compile(DATE_EXPRESSION)
+_TIME = re.compile(TIME_EXPRESSION)
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_HHMM = re.compile(r"^(\d{2}):(\d{2})$")
+
+_WEEKDAYS = "월화수목금토일"
+_RELATIVE_DAYS = {"오늘": 0, "내일": 1, "모레": 2, "글피": 3}
+_WEEK_OFFSETS = {"이번": 0, "이번주": 0, "금주": 0, "다음": 1, "다음주": 1, "담주": 1, "다다음주": 2}
+_NATIVE_HOURS = {
+    "한": 1, "두": 2, "세": 3, "셋": 3, "네": 4, "넷": 4, "다섯": 5, "여섯": 6,
+    "일곱": 7, "여덟": 8, "아홉": 9, "열": 10, "열한": 11, "열두": 12
+}
+_PERIOD_DEFAULT_TIMES = {"오전": time(9), "아침": time(9), "점심": time(12), "오후": time(14), "저녁": time(18)}
+# 진료 시간 기준: 시간대 없이 "3시"라고 하면 오후 3시
+_AFTERNOON_HOURS_WITHOUT_PERIOD = range(1, 8)
+
+
+def _default_clock() -> datetime:
+    try:
+        from zoneinfo import ZoneInfo
+        return datetime.now(ZoneInfo(BOOKING_TIMEZONE)).replace(tzinfo=None)
+    except Exception:
+        return datetime.now()
+
+
+class KoreanDateTimeNormalizer:
+    """한국어 날짜/시간 표현 정규화기"""
+
+    def __init__(
+        self,
+        clock: Callable[[], datetime] = _default_clock
+    ) -> None:
+        self.clock = clock
+
+    def today(self) -> date:
+        return self.clock().date()
+
+    def resolve_date(
+        self,
+        text: str
+    ) -> Optional[tuple[date, float]]:
+        """
+        Resolve the first date expression in text to (date, confidence).
+        """
+        match = _DATE.search(text or "")
+        return self.resolve_date_match(match) if match else None
+
+    def resolve_date_match(
+        self,
+        match: re.Match
+    ) -> Optional[tuple[date, float]]:
+        """
+        Resolve a match of DATE_EXPRESSION (or a pattern embedding it).
+        """
+        try:
+            return self._resolve_date_match(match, self.today())
+        except ValueError:
+            # e.g. 2월 30일
+            return None
+
+    def _resolve_date_match(
+        self,
+        match: re.Match,
+        today: date
+    ) -> tuple[date, float]:
+        if match.group("iso_year"):
+            return date(int(match.group("iso_year")), int(match.group("iso_month")), int(match.group("iso_day"))), 0.95
+
+        if match.group("month"):
+            month, day = int(match.group("month")), int(match.group("day"))
+            if match.group("year"):
+                return date(int(match.group("year")), month, day), 0.95
+            resolved = date(today.year, month, day)
+            if resolved < today:
+                resolved = date(today.year + 1, month, day)
+            return resolved, 0.95
+
+        if match.group("month_rel"):
+            first = today.replace(day=1)
+            if match.group("month_rel") != "이번":
+                first = (first + timedelta(days=32)).replace(day=1)
+            return first.replace(day=int(match.group("month_rel_day"))), 0.95
+
+        if match.group("weekday"):
+            weekday = _WEEKDAYS.index(match.group("weekday"))
+            week = re.sub(r"\s+", "", match.group("week") or "")
+            if not week:
+                # 가장 가까운 다음 해당 요일
+                return today + timedelta(days=(weekday - today.weekday() - 1) % 7 + 1), 0.85
+            monday = today - timedelta(days=today.weekday())
+            resolved = monday + timedelta(days=7 * _WEEK_OFFSETS[week] + weekday)
+            if resolved < today:
+                # 이미 지난 "이번 주 X요일"은 다음 해당 요일로
+                resolved += timedelta(days=7)
+            return resolved, 0.95
+
+        if match.group("relative"):
+            return today + timedelta(days=_RELATIVE_DAYS[match.group("relative")]), 0.95
+
+        if match.group("days_after"):
+            return today + timedelta(days=int(match.group("days_after"))), 0.9
+
+        day = int(match.group("day_only"))
+        resolved = today.replace(day=day)
+        if resolved < today:
+            resolved = (today.replace(day=1) + timedelta(days=32)).replace(day=day)
+        return resolved, 0.7
+
+    def resolve_time(
+        self,
+        text: str
+    ) -> Optional[tuple[time, float]]:
+        """
+        Resolve the first time expression in text to (time, confidence).
+        """
+        match = _TIME.search(text or "")
+        return self.resolve_time_match(match) if match else None
+
+    def resolve_time_match(
+        self,
+        match: re.Match
+    ) -> Optional[tuple[time, float]]:
+        """
+        Resolve a match of TIME_EXPRESSION (or a pattern embedding it).
+        """
+        if match.group("hh"):
+            hour, minute = int(match.group("hh")), int(match.group("mm"))
+            if hour > 23 or minute > 59:
+                return None
+            return time(hour, minute), 0.95
+
+        if match.group("period_only"):
+            return _PERIOD_DEFAULT_TIMES[match.group("period_only")], 0.6
+
+        hour = int(match.group("hour")) if match.group("hour") else _NATIVE_HOURS[match.group("native_hour")]
+        minute = 30 if match.group("half") else int(match.group("minute") or 0)
+        period = match.group("period")
+        if period in ("오후", "저녁", "밤") and hour < 12:
+            hour += 12
+        elif period == "점심" and hour <= 5:
+            hour += 12
+        elif period is None and hour in _AFTERNOON_HOURS_WITHOUT_PERIOD:
+            hour += 12
+        if hour > 23 or minute > 59:
+            return None
+        return time(hour, minute), 0.95 if period else 0.85
+
+    def parse_date(
+        self,
+        text: str
+    ) -> Optional[date]:
+        resolved = self.resolve_date(text)
+        return resolved[0] if resolved else None
+
+    def parse_time(
+        self,
+        text: str
+    ) -> Optional[time]:
+        resolved = self.resolve_time(text)
+        return resolved[0] if resolved else None
+
+    def parse(
+        self,
+        text: str
+    ) -> Optional[datetime]:
+        """
+        Resolve date and time in text to a datetime (None unless both are present).
+        """
+        parsed_date, parsed_time = self.parse_date(text), self.parse_time(text)
+        if parsed_date is None or parsed_time is None:
+            return None
+        return datetime.combine(parsed_date, parsed_time)
+
+    def normalize_date(
+        self,
+        text: str
+    ) -> Optional[str]:
+        """날짜 표현 → YYYY-MM-DD (해석 불가 시 None)"""
+        if text and _ISO_DATE.match(text):
+            return text
+        parsed = self.parse_date(text)
+        return parsed.isoformat() if parsed else None
+
+    def normalize_time(
+        self,
+        text: str
+    ) -> Optional[str]:
+        """시간 표현 → HH:MM (해석 불가 시 None)"""
+        if text and _HHMM.match(text):
+            return text
+        parsed = self.parse_time(text)
+        return parsed.strftime("%H:%M") if parsed else None
+
+
+def format_korean_date(
+    value: Optional[str]
+) -> str:
+    """YYYY-MM-DD → "10월 27일 (월)" (ISO 형식이 아니면 그대로 반환)"""
+    if not value or not _ISO_DATE.match(value):
+        return value or ""
+    parsed = date.fromisoformat(value)
+    return f"{parsed.month}월 {parsed.day}일 ({_WEEKDAYS[parsed.weekday()]})"
+
+
+def format_korean_time(
+    value: Optional[str]
+) -> str:
+    """HH:MM → "오후 3시 30분" (HH:MM 형식이 아니면 그대로 반환)"""
+    match = _HHMM.match(value or "")
+    if not match:
+        return value or ""
+    hour, minute = int(match.group(1)), int(match.group(2))
+    period = "오전" if hour < 12 else "오후"
+    display_hour = hour if hour <= 12 else hour - 12
+    return f"{period} {display_hour}시" + (f" {minute}분" if minute else "")
+
+
+# 전역 정규화기 인스턴스
+korean_datetime = KoreanDateTimeNormalizer()
@@ -2,6 +2,7 @@ from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional, List
 from enum import Enum
+from korean_datetime import format_korean_date, format_korean_time
 
 class AppointmentStatus(str, Enum):
     PENDING = "pending"
@@ -40,9 +41,9 @@ class BookingInfo(BaseModel):
         if self.phone_number:
             summary.append(f"  - 연락처: {self.phone_number}")
         if self.preferred_date:
-            summary.append(f"  - 희망 날짜: {self.preferred_date}")
+            summary.append(f"  - 희망 날짜: {format_korean_date(self.preferred_date)}")
         if self.preferred_time:
-            summary.append(f"  - 희망 시간: {self.preferred_time}")
+            summary.append(f"  - 희망 시간: {format_korean_time(self.preferred_time)}")
         
         if not summary:
             return "  - 아직 수집된 정보가 없습니다."
@@ -77,3 +78,15 @@ class AppointmentRequest(BaseModel):
     recommendations: str = Field(default="", description="권장사항")
     created_at: datetime = Field(default_factory=datetime.now)
     status: AppointmentStatus = Field(default=AppointmentStatus.PENDING)
+    
+    def to_listing_dict(self) -> dict:
+        """예약 목록 API 응답 항목"""
+        return {
+            "appointment_id": self.appointment_id,
+            "patient_name": self.patient_name,
+            "department": self.department,
+            "appointment_date": self.preferred_date,
+            "appointment_time": self.preferred_time,
+            "status": self.status.value,
+            "created_at": self.created_at.isoformat()
+        }
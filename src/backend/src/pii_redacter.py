@@ -1,9 +1,16 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 import os
+import sys
+import time
+import asyncio
 import logging
+from collections import OrderedDict
 from azure.ai.textanalytics import TextAnalyticsClient
-from utils import get_azure_credential
+from azure.ai.textanalytics.aio import TextAnalyticsClient as AsyncTextAnalyticsClient
+from utils import get_azure_credential, get_async_azure_credential
+from aho_corasick import AhoCorasickReplacer
+from retry_policy import call_with_retry, acall_with_retry
 
 """
 Azure AI Language PII recognition, redaction, and reconstruction.
@@ -11,13 +18,27 @@ Azure AI Language PII recognition, redaction, and reconstruction.
 
 CATEGORIES = os.environ.get("PII_CATEGORIES", "").upper().split(",")
 CONFIDENCE_THRESHOLD = float(os.environ.get("PII_CONFIDENCE_THRESHOLD", "0.5"))
+# Mappings of abandoned sessions are expired after this idle time:
+PII_MAPPING_TTL_SECONDS = float(os.environ.get("PII_MAPPING_TTL_SECONDS", "3600"))
+# Service limits for synchronous PII requests: documents per request, characters per document
+PII_BATCH_SIZE = int(os.environ.get("PII_BATCH_SIZE", "5"))
+PII_MAX_DOCUMENT_CHARS = int(os.environ.get("PII_MAX_DOCUMENT_CHARS", "5120"))
+# Retries are handled by retry_policy:
 TA_CLIENT = TextAnalyticsClient(
     endpoint=os.environ.get("LANGUAGE_ENDPOINT"),
-    credential=get_azure_credential()
+    credential=get_azure_credential(),
+    retry_total=0
 )
+# Async client is created on first use (needs a running event loop), see close():
+_async_client: AsyncTextAnalyticsClient | None = None
+_async_credential = None
 
 entity_id = 0
 redaction_mappings = dict()
+# Last use of each mapping, least recently used first (expiry only looks at the head):
+_mapping_last_used: OrderedDict[str, float] = OrderedDict()
+# Redaction / reconstruction automata per mapping, rebuilt only when the mapping changes:
+_replacers: dict[str, dict[bool, AhoCorasickReplacer]] = dict()
 
 _logger = logging.getLogger(__name__)
 
@@ -33,24 +54,119 @@ def create_redaction_key(
     return f"{{PII_{category}_{entity_id}}}"
 
 
+def _get_replacer(
+    id: str,
+    redact: bool
+) -> AhoCorasickReplacer:
+    replacers = _replacers.setdefault(id, dict())
+    replacer = replacers.get(redact)
+    if replacer is None:
+        mapping = redaction_mappings[id]
+        if redact:
+            replacer = AhoCorasickReplacer({entity: redaction for redaction, entity in mapping.items()})
+        else:
+            replacer = AhoCorasickReplacer(mapping)
+        replacers[redact] = replacer
+    return replacer
+
+
 def apply_mapping(
     text: str,
     id: str,
     redact: bool = True
 ) -> str:
     """
-    Redact or reconstruct text.
+    Redact or reconstruct text (single pass, longest entity wins).
     """
-    result = text
-    mapping = redaction_mappings[id]
+    result = _get_replacer(id, redact).replace(text)
+    _touch(id)
+    return result
 
-    for redaction, entity in mapping.items():
-        if redact:
-            result = result.replace(entity, redaction)
-        else:
-            result = result.replace(redaction, entity)
 
-    return result
+def split_documents(
+    text: str,
+    max_chars: int = PII_MAX_DOCUMENT_CHARS
+) -> list[str]:
+    """
+    Split text into documents within the service character limit,
+    preferring line and word boundaries so entities are not cut.
+    """
+    documents = []
+    while len(text) > max_chars:
+        cut = text.rfind("\n", 0, max_chars)
+        if cut <= 0:
+            cut = text.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        documents.append(text[:cut])
+        text = text[cut:]
+    documents.append(text)
+    return documents
+
+
+def _batches(
+    documents: list[str]
+) -> list[list[str]]:
+    return [documents[i:i + PII_BATCH_SIZE] for i in range(0, len(documents), PII_BATCH_SIZE)]
+
+
+def _filter_entities(
+    results
+) -> list[tuple[str, str]]:
+    """
+    Keep (category, text) of entities passing the category and confidence filters.
+    """
+    entities = []
+    for result in results:
+        if result.is_error:
+            _logger.warning(f"PII recognition failed for document {result.id}: {result.error}")
+            continue
+        for ent in result.entities:
+            category = ent.category.upper()
+            if category in CATEGORIES and ent.confidence_score > CONFIDENCE_THRESHOLD:
+                entities.append((category, ent.text))
+    return entities
+
+
+def merge_entities(
+    id: str,
+    entities: list[tuple[str, str]]
+) -> int:
+    """
+    Merge recognized entities into the session mapping, reusing the key of
+    entity texts already mapped. Returns the number of new keys.
+    """
+    mapping = redaction_mappings.setdefault(id, dict())
+    _touch(id)
+    known = set(mapping.values())
+    added = 0
+    for category, text in entities:
+        if text in known:
+            continue
+        mapping[create_redaction_key(category)] = text
+        known.add(text)
+        added += 1
+    if added:
+        # Mapping changed, automata are rebuilt on next use:
+        _replacers.pop(id, None)
+    return added
+
+
+def _recognize_documents(
+    documents: list[str],
+    language: str
+) -> list[tuple[str, str]]:
+    entities = []
+    for batch in _batches(documents):
+        response = call_with_retry(
+            "language:pii",
+            lambda: TA_CLIENT.recognize_pii_entities(
+                documents=batch,
+                language=language
+            )
+        )
+        entities.extend(_filter_entities(response))
+    return entities
 
 
 def recognize(
@@ -63,30 +179,70 @@ def recognize(
     Recognize PII entities in text input and
     create redaction mapping.
     """
-    # Call TA:
-    response = TA_CLIENT.recognize_pii_entities(
-        documents=[text],
-        language=language
-    )
-    result = response[0]
-    if result.is_error:
-        return []
-
-    # Filter based on confidence and category:
-    mapping = dict()
-    for ent in result.entities:
-        category = ent.category.upper()
-        confidence = ent.confidence_score
-
-        if category in CATEGORIES and confidence > CONFIDENCE_THRESHOLD:
-            redaction_key = create_redaction_key(category)
-            mapping[redaction_key] = ent.text
+    # Call TA (long input is split into several documents):
+    entities = _recognize_documents(split_documents(text), language)
 
     if cache:
         # Store mapping:
-        redaction_mappings[id] = mapping
+        merge_entities(id, entities)
+
+    return len(entities) != 0
+
+
+def recognize_batch(
+    texts: list[str],
+    id: str,
+    language: str = "en"
+) -> bool:
+    """
+    Recognize PII entities in several texts (e.g. history turns or
+    utterances) with PII_BATCH_SIZE documents per request, merging
+    them into the session mapping.
+    """
+    documents = [document for text in texts if text for document in split_documents(text)]
+    entities = _recognize_documents(documents, language)
+    merge_entities(id, entities)
+    return len(entities) != 0
+
+
+def _get_async_client() -> AsyncTextAnalyticsClient:
+    global _async_client, _async_credential
+    if _async_client is None:
+        _async_credential = get_async_azure_credential()
+        _async_client = AsyncTextAnalyticsClient(
+            endpoint=os.environ.get("LANGUAGE_ENDPOINT"),
+            credential=_async_credential,
+            retry_total=0
+        )
+    return _async_client
+
+
+async def recognize_batch_async(
+    texts: list[str],
+    id: str,
+    language: str = "en"
+) -> bool:
+    """
+    Async variant of recognize_batch: requests for all batches run
+    concurrently and do not block the event loop.
+    """
+    documents = [document for text in texts if text for document in split_documents(text)]
+    if not documents:
+        return False
+
+    client = _get_async_client()
+    responses = await asyncio.gather(*(
+        acall_with_retry(
+            "language:pii",
+            lambda batch=batch: client.recognize_pii_entities(documents=batch, language=language)
+        )
+        for batch in _batches(documents)
+    ))
+    entities = [entity for response in responses for entity in _filter_entities(response)]
 
-    return len(mapping) != 0
+    # Merge in document order so keys do not depend on request completion order
+    merge_entities(id, entities)
+    return len(entities) != 0
 
 
 def redact(
@@ -118,12 +274,57 @@ def redact(
 
     if not cache:
         # Do not store mapping:
-        redaction_mappings.pop(id)
+        _drop(id)
 
     _logger.info(f"Post-redaction: {result}")
     return result
 
 
+async def redact_async(
+    text: str,
+    id: str,
+    language: str = "en",
+    cache: bool = True
+) -> str:
+    """
+    Create text redaction without blocking the event loop.
+    """
+    return (await redact_batch_async([text], id=id, language=language, cache=cache))[0]
+
+
+async def redact_batch_async(
+    texts: list[str],
+    id: str,
+    language: str = "en",
+    cache: bool = True
+) -> list[str]:
+    """
+    Redact several texts with one batched recognition.
+    """
+    if id not in redaction_mappings:
+        found = await recognize_batch_async(texts, id=id, language=language)
+        if not found:
+            _logger.info("No PII entities found")
+            if not cache:
+                _drop(id)
+            return list(texts)
+
+    results = [
+        apply_mapping(
+            text=text,
+            id=id,
+            redact=True
+        )
+        for text in texts
+    ]
+
+    if not cache:
+        # Do not store mapping:
+        _drop(id)
+
+    return results
+
+
 def reconstruct(
     text: str,
     id: str,
@@ -145,7 +346,7 @@ def reconstruct(
 
     if not cache:
         # Clean up memory:
-        redaction_mappings.pop(id)
+        _drop(id)
 
     _logger.info(f"Post-reconstruction: {result}")
     return result
@@ -161,4 +362,64 @@ def remove(
         _logger.warning(f"No mapping for id: {id}")
         return
 
-    redaction_mappings.pop(id)
+    _drop(id)
+
+
+def _touch(
+    id: str
+) -> None:
+    _mapping_last_used[id] = time.time()
+    _mapping_last_used.move_to_end(id)
+
+
+def _drop(
+    id: str
+) -> None:
+    redaction_mappings.pop(id, None)
+    _mapping_last_used.pop(id, None)
+    _replacers.pop(id, None)
+
+
+def expire_mappings(
+    max_idle_seconds: float = PII_MAPPING_TTL_SECONDS
+) -> int:
+    """
+    Remove mappings unused for max_idle_seconds (oldest first, stops at the first live one).
+    """
+    cutoff = time.time() - max_idle_seconds
+    removed = 0
+    while _mapping_last_used:
+        id, last_used = next(iter(_mapping_last_used.items()))
+        if last_used > cutoff:
+            break
+        _drop(id)
+        removed += 1
+    return removed
+
+
+def get_stats() -> dict:
+    """
+    Live mapping count and approximate memory footprint.
+    """
+    memory_bytes = sys.getsizeof(redaction_mappings) + sys.getsizeof(_mapping_last_used)
+    for mapping in redaction_mappings.values():
+        memory_bytes += sys.getsizeof(mapping) + sum(
+            sys.getsizeof(key) + sys.getsizeof(value) for key, value in mapping.items()
+        )
+    return {
+        "mappings": len(redaction_mappings),
+        "automata": sum(len(replacers) for replacers in _replacers.values()),
+        "memory_bytes": memory_bytes
+    }
+
+
+async def close() -> None:
+    """
+    Close the async client (on app shutdown).
+    """
+    global _async_client, _async_credential
+    if _async_client is not None:
+        await _async_client.close()
+        await _async_credential.close()
+        _async_client = None
+        _async_credential = None
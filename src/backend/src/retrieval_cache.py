@@ -0,0 +1,297 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Optional
+
+"""
+Search-result cache for RAG retrieval.
+
+Results are keyed by index name and normalized query text, expire after a
+TTL and are evicted LRU. The storage backend is pluggable: in-process by
+default, or a Redis-compatible server shared across replicas.
+"""
+
+_logger = logging.getLogger(__name__)
+
+RETRIEVAL_CACHE_ENABLED = os.environ.get("RETRIEVAL_CACHE_ENABLED", "true").lower() == "true"
+RETRIEVAL_CACHE_TTL_SECONDS = float(os.environ.get("RETRIEVAL_CACHE_TTL_SECONDS", "3600"))
+RETRIEVAL_CACHE_MAX_ENTRIES = int(os.environ.get("RETRIEVAL_CACHE_MAX_ENTRIES", "1024"))
+RETRIEVAL_CACHE_REDIS_URL = os.environ.get("RETRIEVAL_CACHE_REDIS_URL", "")
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s.,!?~…]+$")
+
+
+def normalize_query(
+    query: str
+) -> str:
+    """
+    Normalize query text so trivially different phrasings share a cache entry.
+    """
+    text = unicodedata.normalize("NFKC", query).lower()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+
+class InMemoryCacheBackend:
+    """
+    Bounded in-process cache backend with TTL and LRU eviction.
+    """
+    # Calls return immediately, safe on the event loop:
+    blocking = False
+
+    def __init__(
+        self,
+        max_entries: int = RETRIEVAL_CACHE_MAX_ENTRIES
+    ) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(
+        self,
+        key: str
+    ) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: float
+    ) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete_prefix(
+        self,
+        prefix: str
+    ) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "size": self.size(),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+class RedisCacheBackend:
+    """
+    Redis-backed cache backend, shared across replicas.
+
+    Expiry is delegated to Redis; LRU eviction follows the server's
+    maxmemory-policy (e.g. allkeys-lru). The client is synchronous, so
+    async callers go through RetrievalCache.aget / aset.
+    """
+    # Network round-trips, kept off the event loop:
+    blocking = True
+
+    def __init__(
+        self,
+        client
+    ) -> None:
+        self.client = client
+
+    def get(
+        self,
+        key: str
+    ) -> Optional[Any]:
+        raw = self.client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: float
+    ) -> None:
+        self.client.set(key, json.dumps(value, ensure_ascii=False), px=int(ttl * 1000))
+
+    def delete_prefix(
+        self,
+        prefix: str
+    ) -> int:
+        keys = list(self.client.scan_iter(match=f"{prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+        return len(keys)
+
+    def size(self) -> int:
+        return self.client.dbsize()
+
+    def get_stats(self) -> dict:
+        return {
+            "backend": "redis",
+            "size": self.size()
+        }
+
+
+class RetrievalCache:
+    """
+    Cache of search results keyed by (index name, normalized query).
+    """
+
+    def __init__(
+        self,
+        index_name: str,
+        backend=None,
+        ttl_seconds: float = RETRIEVAL_CACHE_TTL_SECONDS,
+        key_prefix: str = "retrieval"
+    ) -> None:
+        self.index_name = index_name
+        self.backend = backend or InMemoryCacheBackend()
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _index_prefix(
+        self,
+        index_name: str = None
+    ) -> str:
+        return f"{self.key_prefix}:{index_name or self.index_name}:"
+
+    def make_key(
+        self,
+        query: str
+    ) -> str:
+        digest = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+        return self._index_prefix() + digest
+
+    def get(
+        self,
+        query: str
+    ) -> Optional[list[dict]]:
+        """
+        Return cached documents for query, or None on miss.
+        """
+        try:
+            documents = self.backend.get(self.make_key(query))
+        except Exception as e:
+            # Cache failures must never break retrieval:
+            _logger.warning(f"Retrieval cache get failed: {e}")
+            documents = None
+
+        if documents is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return documents
+
+    def set(
+        self,
+        query: str,
+        documents: list[dict]
+    ) -> None:
+        """
+        Store documents for query.
+        """
+        try:
+            self.backend.set(self.make_key(query), documents, self.ttl_seconds)
+        except Exception as e:
+            _logger.warning(f"Retrieval cache set failed: {e}")
+
+    async def aget(
+        self,
+        query: str
+    ) -> Optional[list[dict]]:
+        """
+        get() for async callers; a blocking backend is called from a worker thread.
+        """
+        if not self.backend.blocking:
+            return self.get(query)
+        return await asyncio.to_thread(self.get, query)
+
+    async def aset(
+        self,
+        query: str,
+        documents: list[dict]
+    ) -> None:
+        """
+        set() for async callers; a blocking backend is called from a worker thread.
+        """
+        if not self.backend.blocking:
+            self.set(query, documents)
+            return
+        await asyncio.to_thread(self.set, query, documents)
+
+    def invalidate(
+        self,
+        index_name: str = None
+    ) -> int:
+        """
+        Drop all cached results for an index (call after reindexing).
+        """
+        removed = self.backend.delete_prefix(self._index_prefix(index_name))
+        self.invalidations += 1
+        _logger.info(f"Retrieval cache invalidated: {removed} entries removed")
+        return removed
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        stats = {
+            "index_name": self.index_name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "ttl_seconds": self.ttl_seconds
+        }
+        stats.update(self.backend.get_stats())
+        return stats
+
+
+def create_retrieval_cache(
+    index_name: str
+) -> Optional[RetrievalCache]:
+    """
+    Create retrieval cache based on settings.
+    """
+    if not RETRIEVAL_CACHE_ENABLED:
+        return None
+
+    if RETRIEVAL_CACHE_REDIS_URL:
+        # Optional dependency, only needed for the shared backend:
+        import redis
+        backend = RedisCacheBackend(redis.Redis.from_url(RETRIEVAL_CACHE_REDIS_URL))
+    else:
+        backend = InMemoryCacheBackend()
+
+    return RetrievalCache(index_name=index_name, backend=backend)
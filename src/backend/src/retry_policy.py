@@ -0,0 +1,336 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from enum import Enum
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional
+
+"""
+Retry policy and circuit breakers for upstream Azure calls.
+
+Errors are classified before anything is retried: throttling (429) and
+transient failures (timeouts, connection errors, 5xx) are retried with
+exponential backoff and full jitter, honoring Retry-After when the
+service sends it; client errors are not retried. Each upstream (an AOAI
+deployment, a search index, a Language resource) has a circuit breaker
+that opens after consecutive throttling/transient failures and fails
+fast until it has cooled down, so a saturated deployment is not hit
+with even more traffic. The SDKs' own retries are disabled where these
+helpers are used so retries are not multiplied.
+"""
+
+_logger = logging.getLogger(__name__)
+
+RETRY_MAX_ATTEMPTS = int(os.environ.get("RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY_SECONDS = float(os.environ.get("RETRY_BASE_DELAY_SECONDS", "0.5"))
+# Longer waits (including Retry-After) are not slept through, the call fails instead:
+RETRY_MAX_DELAY_SECONDS = float(os.environ.get("RETRY_MAX_DELAY_SECONDS", "10"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.environ.get("CIRCUIT_RESET_SECONDS", "30"))
+
+_TRANSIENT_STATUS_CODES = {408, 500, 502, 503, 504}
+
+
+class ErrorClass(str, Enum):
+    THROTTLED = "throttled"
+    TRANSIENT = "transient"
+    BAD_REQUEST = "bad_request"
+    FATAL = "fatal"
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while a circuit breaker is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Circuit open for {name}, retry in {retry_in:.1f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+def status_code(
+    error: BaseException
+) -> Optional[int]:
+    """
+    HTTP status of an openai / azure-core / httpx error, if any.
+    """
+    code = getattr(error, "status_code", None)
+    if code is None:
+        response = getattr(error, "response", None)
+        code = getattr(response, "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def classify(
+    error: BaseException
+) -> ErrorClass:
+    """
+    Classify an upstream error for retrying.
+    """
+    if isinstance(error, CircuitOpenError):
+        return ErrorClass.FATAL
+    code = status_code(error)
+    if code == 429:
+        return ErrorClass.THROTTLED
+    if code in _TRANSIENT_STATUS_CODES:
+        return ErrorClass.TRANSIENT
+    if code == 400:
+        return ErrorClass.BAD_REQUEST
+    if code is not None:
+        return ErrorClass.FATAL
+    # No response: connection errors and timeouts of the different SDKs
+    name = type(error).__name__
+    if isinstance(error, (TimeoutError, ConnectionError)) or any(
+        marker in name for marker in ("Timeout", "Connection", "ServiceRequest", "ServiceResponse", "Transport")
+    ):
+        return ErrorClass.TRANSIENT
+    return ErrorClass.FATAL
+
+
+def retry_after(
+    error: BaseException
+) -> Optional[float]:
+    """
+    Seconds to wait as requested by the service (retry-after-ms / Retry-After).
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker (closed -> open -> half-open probe).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = CIRCUIT_RESET_SECONDS
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_until == 0.0:
+            return "closed"
+        return "open" if time.monotonic() < self.opened_until else "half_open"
+
+    def before_call(self) -> None:
+        """
+        Raise CircuitOpenError while open; let a single probe through once cooled down.
+        """
+        with self._lock:
+            if self.opened_until == 0.0:
+                return
+            now = time.monotonic()
+            if now < self.opened_until or self._probing:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, max(0.0, self.opened_until - now))
+            self._probing = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_until = 0.0
+            self._probing = False
+
+    def record_failure(
+        self,
+        open_for: Optional[float] = None
+    ) -> None:
+        """
+        Count a throttling/transient failure; open_for (e.g. a long Retry-After) opens immediately.
+        """
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold or open_for:
+                now = time.monotonic()
+                if now >= self.opened_until:
+                    self.opened += 1
+                self.opened_until = max(self.opened_until, now + (open_for or self.reset_seconds))
+                _logger.warning(f"Circuit breaker {self.name} opened after {self.failures} failures")
+            self._probing = False
+
+    def release(self) -> None:
+        """
+        End a probe that failed for a reason unrelated to upstream health.
+        """
+        with self._lock:
+            self._probing = False
+
+    def get_stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected
+        }
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, bounded by Retry-After and max delay.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = RETRY_MAX_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY_SECONDS,
+        max_delay: float = RETRY_MAX_DELAY_SECONDS
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+
+    def next_delay(
+        self,
+        attempt: int,
+        error: BaseException
+    ) -> Optional[float]:
+        """
+        Seconds to wait before retrying after a failed attempt (1-based), None to give up.
+        """
+        if attempt >= self.max_attempts or classify(error) not in (ErrorClass.THROTTLED, ErrorClass.TRANSIENT):
+            return None
+        requested = retry_after(error)
+        if requested is not None:
+            return requested if requested <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+default_policy = RetryPolicy()
+
+
+def get_breaker(
+    name: str
+) -> CircuitBreaker:
+    """
+    Circuit breaker of an upstream, e.g. "aoai:<deployment>" or "search:<index>".
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def _on_failure(
+    breaker: CircuitBreaker,
+    error: BaseException,
+    delay: Optional[float]
+) -> None:
+    if classify(error) in (ErrorClass.THROTTLED, ErrorClass.TRANSIENT):
+        requested = retry_after(error)
+        # Retry-After longer than we are willing to wait: stop sending until it has passed
+        breaker.record_failure(open_for=requested if delay is None and requested else None)
+    else:
+        breaker.release()
+
+
+def call_with_retry(
+    upstream: str,
+    func: Callable[[], Any],
+    policy: RetryPolicy = None
+) -> Any:
+    """
+    Call func() through the upstream's circuit breaker, retrying retryable errors.
+    """
+    policy = policy or default_policy
+    breaker = get_breaker(upstream)
+    attempt = 0
+    while True:
+        attempt += 1
+        breaker.before_call()
+        try:
+            result = func()
+        except Exception as e:
+            delay = policy.next_delay(attempt, e)
+            _on_failure(breaker, e, delay)
+            if delay is None or breaker.state == "open":
+                raise
+            policy.retries += 1
+            _logger.warning(f"{upstream} call failed ({classify(e).value}: {e}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+
+async def acall_with_retry(
+    upstream: str,
+    func: Callable[[], Awaitable[Any]],
+    policy: RetryPolicy = None
+) -> Any:
+    """
+    Async variant of call_with_retry (func returns a new awaitable per attempt).
+    """
+    policy = policy or default_policy
+    breaker = get_breaker(upstream)
+    attempt = 0
+    while True:
+        attempt += 1
+        breaker.before_call()
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            delay = policy.next_delay(attempt, e)
+            _on_failure(breaker, e, delay)
+            if delay is None or breaker.state == "open":
+                raise
+            policy.retries += 1
+            _logger.warning(f"{upstream} call failed ({classify(e).value}: {e}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+
+def get_stats() -> dict:
+    """
+    Retry count and circuit breaker state per upstream.
+    """
+    with _breakers_lock:
+        breakers = {name: breaker.get_stats() for name, breaker in _breakers.items()}
+    return {
+        "max_attempts": default_policy.max_attempts,
+        "retries": default_policy.retries,
+        "breakers": breakers
+    }
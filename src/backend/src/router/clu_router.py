@@ -5,6 +5,7 @@ import logging
 from typing import Callable
 from azure.ai.language.conversations import ConversationAnalysisClient
 from utils import get_azure_credential
+from retry_policy import call_with_retry
 
 _logger = logging.getLogger(__name__)
 
@@ -17,7 +18,8 @@ def create_clu_router() -> Callable[[str, str, str], dict]:
     deployment_name = os.environ['CLU_DEPLOYMENT_NAME']
     endpoint = os.environ['LANGUAGE_ENDPOINT']
     credential = get_azure_credential()
-    client = ConversationAnalysisClient(endpoint, credential)
+    # Retries are handled by retry_policy:
+    client = ConversationAnalysisClient(endpoint, credential, retry_total=0)
 
     def create_input(
         utterance: str,
@@ -60,8 +62,11 @@ def create_clu_router() -> Callable[[str, str, str], dict]:
         try:
             _logger.info(f"Calling {project_name}:{deployment_name} runtime")
 
-            response = client.analyze_conversation(
-                task=input_json
+            response = call_with_retry(
+                f"clu:{project_name}/{deployment_name}",
+                lambda: client.analyze_conversation(
+                    task=input_json
+                )
             )
 
             _logger.info(f"Runtime response: {response}")
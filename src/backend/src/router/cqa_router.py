@@ -5,6 +5,7 @@ import logging
 from typing import Callable
 from azure.ai.language.questionanswering import QuestionAnsweringClient
 from utils import get_azure_credential
+from retry_policy import call_with_retry
 
 _logger = logging.getLogger(__name__)
 
@@ -17,7 +18,8 @@ def create_cqa_router() -> Callable[[str, str, str], dict]:
     deployment_name = os.environ['CQA_DEPLOYMENT_NAME']
     endpoint = os.environ['LANGUAGE_ENDPOINT']
     credential = get_azure_credential()
-    client = QuestionAnsweringClient(endpoint, credential)
+    # Retries are handled by retry_policy:
+    client = QuestionAnsweringClient(endpoint, credential, retry_total=0)
 
     def call_runtime(
         question: str,
@@ -30,11 +32,14 @@ def create_cqa_router() -> Callable[[str, str, str], dict]:
         try:
             _logger.info(f"Calling {project_name}:{deployment_name} runtime")
 
-            response = client.get_answers(
-                question=question,
-                top=1,
-                project_name=project_name,
-                deployment_name=deployment_name
+            response = call_with_retry(
+                f"cqa:{project_name}/{deployment_name}",
+                lambda: client.get_answers(
+                    question=question,
+                    top=1,
+                    project_name=project_name,
+                    deployment_name=deployment_name
+                )
             )
 
             _logger.info(f"Runtime response: {response}")
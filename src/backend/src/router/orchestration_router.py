@@ -7,6 +7,7 @@ from azure.ai.language.conversations import ConversationAnalysisClient
 from router.clu_router import parse_response as parse_clu_response
 from router.cqa_router import parse_response as parse_cqa_response
 from utils import get_azure_credential
+from retry_policy import call_with_retry
 
 _logger = logging.getLogger(__name__)
 
@@ -19,7 +20,8 @@ def create_orchestration_router() -> Callable[[str, str, str], dict]:
     deployment_name = os.environ['ORCHESTRATION_DEPLOYMENT_NAME']
     endpoint = os.environ['LANGUAGE_ENDPOINT']
     credential = get_azure_credential()
-    client = ConversationAnalysisClient(endpoint, credential)
+    # Retries are handled by retry_policy:
+    client = ConversationAnalysisClient(endpoint, credential, retry_total=0)
 
     def create_input(
         utterance: str,
@@ -62,8 +64,11 @@ def create_orchestration_router() -> Callable[[str, str, str], dict]:
         try:
             _logger.info(f"Calling {project_name}:{deployment_name} runtime")
 
-            response = client.analyze_conversation(
-                task=input_json
+            response = call_with_retry(
+                f"orchestration:{project_name}/{deployment_name}",
+                lambda: client.analyze_conversation(
+                    task=input_json
+                )
             )
 
             _logger.info(f"Runtime response: {response}")
@@ -2,23 +2,38 @@
 # Licensed under the MIT License.
 import os
 import json
+import asyncio
 import logging
 import pii_redacter
-from fastapi import FastAPI, HTTPException
+import retry_policy
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.concurrency import asynccontextmanager
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 # Removed unused imports for direct RAG mode
 # from semantic_kernel_orchestrator import SemanticKernelOrchestrator
 # from azure.identity.aio import DefaultAzureCredential
 # from semantic_kernel.agents import AzureAIAgent
-from utils import get_azure_credential
-from aoai_client import AOAIClient, get_prompt
-from azure.search.documents import SearchClient
+from utils import get_async_azure_credential
+from aoai_client import AsyncAOAIClient, get_prompt, close_async_http_client, create_async_deployment_client
+from aoai_balancer import create_aoai_balancer
+from azure.search.documents.aio import SearchClient
 from appointment_orchestrator import AppointmentOrchestrator
-
-from typing import List
+from services.appointment_service import MAX_APPOINTMENT_PAGE_SIZE, MAX_AVAILABILITY_DAYS
+from models.appointment import AppointmentStatus
+from intent_classifier import intent_classifier
+from retrieval_cache import create_retrieval_cache
+from answer_cache import create_answer_cache, is_first_turn
+from session_store import create_session_store, get_session_id, attach_session, ChatMessage, SessionState
+from token_budget import HistoryBudget
+from session_janitor import SessionJanitor, process_memory_bytes
+from single_flight import single_flight
+from deployment_capabilities import capability_registry
+from usage_ledger import usage_ledger, usage_session, track_request
+
+from typing import AsyncIterator, List, Optional
 
 # Run locally with `uvicorn app:app --reload --host 127.0.0.1 --port 7000`
 # Comment out for local testing:
@@ -26,15 +41,12 @@ from typing import List
 # load_dotenv()
 
 
-class ChatMessage(BaseModel):
-    role: str
-    content: str
-
-
-# Initialize structure for holding chat requests
+# Initialize structure for holding chat requests.
+# The transcript is kept server-side per session; history is only used to
+# seed a new session (older clients that still send it).
 class ChatRequest(BaseModel):
     message: str
-    history: List[ChatMessage]
+    history: Optional[List[ChatMessage]] = None
 
 
 # Environment variables for direct RAG mode
@@ -59,78 +71,245 @@ DIST_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "dist"))
 print(f"DIST_DIR: {DIST_DIR}")
 
 
+# Shared async credential (token cache is reused by all clients):
+azure_credential = get_async_azure_credential()
+
 # Initialize the Azure Search client
 search_client = SearchClient(
     endpoint=os.environ.get("SEARCH_ENDPOINT"),
     index_name=os.environ.get("SEARCH_INDEX_NAME"),
-    credential=get_azure_credential()
+    credential=azure_credential,
+    # Retries are handled by retry_policy (see AOAIClient.search_documents):
+    retry_total=0
 )
 print("Search client initialized.")
 
-# RAG AOAI client:
-rag_client = AOAIClient(
+# Search-result cache (invalidate via /admin/retrieval-cache/invalidate after reindexing):
+retrieval_cache = create_retrieval_cache(os.environ.get("SEARCH_INDEX_NAME"))
+
+# Chat completions spread over the AOAI_DEPLOYMENTS by token headroom (None: AOAI_DEPLOYMENT only):
+aoai_balancer = create_aoai_balancer(lambda endpoint: create_async_deployment_client(endpoint, azure_credential))
+
+# RAG AOAI client (all AOAI clients share one HTTP connection pool):
+rag_client = AsyncAOAIClient(
     endpoint=os.environ.get("AOAI_ENDPOINT"),
     deployment=os.environ.get("AOAI_DEPLOYMENT"),
+    azure_credential=azure_credential,
     use_rag=True,
-    search_client=search_client
+    search_client=search_client,
+    retrieval_cache=retrieval_cache,
+    balancer=aoai_balancer,
+    usage_stage="rag_answer"
 )
 print("RAG client initialized.")
 
 # Extract-utterances AOAI client:
 extract_prompt = get_prompt("extract_utterances.txt")
-extract_client = AOAIClient(
+extract_client = AsyncAOAIClient(
     endpoint=os.environ.get("AOAI_ENDPOINT"),
     deployment=os.environ.get("AOAI_DEPLOYMENT"),
-    system_message=extract_prompt
+    azure_credential=azure_credential,
+    system_message=extract_prompt,
+    balancer=aoai_balancer,
+    usage_stage="extract_utterances"
 )
 
 # Intent recognition client:
 intent_prompt = get_prompt("intent_recognition.txt")
-intent_client = AOAIClient(
+intent_client = AsyncAOAIClient(
     endpoint=os.environ.get("AOAI_ENDPOINT"),
     deployment=os.environ.get("AOAI_DEPLOYMENT"),
-    system_message=intent_prompt
+    azure_credential=azure_credential,
+    system_message=intent_prompt,
+    balancer=aoai_balancer,
+    usage_stage="intent"
 )
 
 # PII:
 PII_ENABLED = os.environ.get("PII_ENABLED", "false").lower() == "true"
 print(f"PII_ENABLED: {PII_ENABLED}")
 
+# Semantic answer cache for first-turn consultation questions (off while PII is redacted):
+answer_cache = create_answer_cache(
+    lambda: AsyncAOAIClient(
+        endpoint=os.environ.get("AOAI_ENDPOINT"),
+        deployment=os.environ.get("EMBEDDING_DEPLOYMENT_NAME"),
+        azure_credential=azure_credential
+    ).embed,
+    pii_enabled=PII_ENABLED
+)
+print(f"ANSWER_CACHE_ENABLED: {answer_cache is not None}")
+
+# Speculative retrieval: run hybrid search concurrently with intent classification
+SPECULATIVE_RETRIEVAL = os.environ.get("SPECULATIVE_RETRIEVAL", "true").lower() == "true"
+print(f"SPECULATIVE_RETRIEVAL: {SPECULATIVE_RETRIEVAL}")
+
+# Per-session conversation state (SESSION_STORE=memory|sqlite):
+session_store = create_session_store()
+print(f"Session store initialized: {type(session_store).__name__}")
+
+# History compaction: older turns are folded into a rolling summary once over budget
+history_budget = HistoryBudget()
+summary_prompt = get_prompt("history_summary.txt")
+summary_client = AsyncAOAIClient(
+    endpoint=os.environ.get("AOAI_ENDPOINT"),
+    deployment=os.environ.get("AOAI_DEPLOYMENT"),
+    azure_credential=azure_credential,
+    system_message=summary_prompt,
+    balancer=aoai_balancer,
+    usage_stage="history_summary"
+)
+
 # Appointment orchestrator:
 appointment_orchestrator = AppointmentOrchestrator(rag_client)
 print("Appointment orchestrator initialized.")
 
 
-# Fallback function (RAG) definition:
-def fallback_function(
+async def chat_session_gauge() -> dict:
+    return {"count": await session_store.count(), "memory_bytes": await session_store.memory_bytes()}
+
+
+# Background expiry of abandoned sessions (JANITOR_INTERVAL_SECONDS), gauges at /metrics/sessions:
+session_janitor = SessionJanitor()
+session_janitor.add_sweep("chat_sessions", session_store.purge_expired)
+session_janitor.add_sweep("booking_sessions", appointment_orchestrator.appointment_service.cleanup_expired_sessions, blocking=True)
+session_janitor.add_sweep("pii_mappings", pii_redacter.expire_mappings)
+# Idle sessions leave the usage ledger; the per-stage rollup is logged every USAGE_ROLLUP_INTERVAL_SECONDS:
+session_janitor.add_sweep("usage_ledger", usage_ledger.sweep)
+session_janitor.add_gauge("chat_sessions", chat_session_gauge)
+session_janitor.add_gauge("booking_sessions", appointment_orchestrator.appointment_service.count_booking_sessions, blocking=True)
+session_janitor.add_gauge("pii_mappings", pii_redacter.get_stats)
+session_janitor.add_gauge("process_memory_bytes", process_memory_bytes)
+
+
+async def prepare_rag_prompt(
     query: str,
     language: str,
-    id: int,
-    history: list[ChatMessage] = None
-) -> str:
+    id: str
+) -> tuple[str, str]:
     """
-    Call RAG client for grounded chat completion with conversation history.
+    Redact PII (if enabled) and retrieve grounding sources for a query.
     """
     if PII_ENABLED:
-        # Redact PII:
-        query = pii_redacter.redact(
+        # Redact PII (async, overlaps with intent classification when speculative):
+        query = await pii_redacter.redact_async(
             text=query,
             id=id,
             language=language,
             cache=True
         )
 
-    return rag_client.chat_completion(query, history=history)
+    return await rag_client.generate_rag_prompt(query)
 
 
-async def get_intent(message: str, history: list[ChatMessage]) -> str:
-    """Classify user intent using LLM."""
+def start_speculative_retrieval(
+    query: str,
+    language: str,
+    id: str
+) -> asyncio.Task | None:
+    """
+    Start retrieval in the background while intent is being classified.
+    """
+    if not SPECULATIVE_RETRIEVAL:
+        return None
+    return asyncio.create_task(prepare_rag_prompt(query, language, id))
+
+
+def discard_speculative_retrieval(
+    retrieval_task: asyncio.Task | None
+) -> None:
+    """
+    Drop an unneeded speculative retrieval (e.g. on BOOKING intent).
+    """
+    if retrieval_task is None:
+        return
+    retrieval_task.cancel()
+    # Consume any exception so it is not reported as never retrieved:
+    retrieval_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+
+# Fallback function (RAG) definition:
+async def fallback_function(
+    query: str,
+    language: str,
+    id: str,
+    history: list[dict] = None,
+    retrieval_task: asyncio.Task | None = None
+) -> str:
+    """
+    Call RAG client for grounded chat completion with conversation history.
+
+    Uses the result of a speculative retrieval_task when one was started.
+    First-turn questions are served from the semantic answer cache when possible.
+    """
+    query_embedding = None
+    if answer_cache is not None and is_first_turn(history):
+        query_embedding, cached_answer = await answer_cache.lookup(query)
+        if cached_answer is not None:
+            discard_speculative_retrieval(retrieval_task)
+            return cached_answer
+
+    if retrieval_task is not None:
+        rag_prompt = await retrieval_task
+    else:
+        rag_prompt = await prepare_rag_prompt(query, language, id)
+
+    response = await rag_client.chat_completion(query, history=history, rag_prompt=rag_prompt)
+    if query_embedding is not None:
+        answer_cache.put(query, query_embedding, response)
+    return response
+
+
+async def stream_fallback_function(
+    query: str,
+    language: str,
+    id: str,
+    history: list[dict] = None,
+    retrieval_task: asyncio.Task | None = None
+) -> AsyncIterator[str]:
+    """
+    Stream RAG client's grounded chat completion token by token.
+    """
+    query_embedding = None
+    if answer_cache is not None and is_first_turn(history):
+        query_embedding, cached_answer = await answer_cache.lookup(query)
+        if cached_answer is not None:
+            discard_speculative_retrieval(retrieval_task)
+            yield cached_answer
+            return
+
+    if retrieval_task is not None:
+        rag_prompt = await retrieval_task
+    else:
+        rag_prompt = await prepare_rag_prompt(query, language, id)
+
+    deltas = []
+    async for delta in rag_client.chat_completion_stream(query, history=history, rag_prompt=rag_prompt):
+        deltas.append(delta)
+        yield delta
+
+    if query_embedding is not None:
+        answer_cache.put(query, query_embedding, "".join(deltas))
+
+
+async def get_intent(message: str, session: SessionState) -> str:
+    """Classify user intent: rule-based fast path first, LLM for ambiguous input."""
+    booking_info = await asyncio.to_thread(appointment_orchestrator.appointment_service.get_booking_info, session.session_id)
+    booking_in_progress = booking_info is not None
+    fast_intent = intent_classifier.predict(
+        message,
+        last_assistant_message=session.last_message("assistant"),
+        booking_in_progress=booking_in_progress
+    )
+    if fast_intent:
+        print(f"Detected intent (fast path): {fast_intent}")
+        return fast_intent
+
     try:
-        # Pass conversation history for context
-        history_str = ", ".join(f"{msg.role} - {msg.content}" for msg in history)
-        contextual_message = f"History: [{history_str}]\n\nUser Message: {message}"
+        # Pass conversation history for context (transcript is maintained incrementally)
+        contextual_message = f"History: [{session.transcript}]\n\nUser Message: {message}"
 
-        raw_response = intent_client.chat_completion(contextual_message, history=None) # history is already included
+        raw_response = await intent_client.chat_completion(contextual_message, history=None) # history is already included
         print(f"Intent raw response: {raw_response}")
         
         json_response = json.loads(raw_response)
@@ -147,74 +326,76 @@ async def get_intent(message: str, history: list[ChatMessage]) -> str:
         logging.error(f"Error getting intent: {e}")
         return "CONSULTATION" # Default to consultation on any other error
 
+async def handle_booking(
+    message: str,
+    session: SessionState
+) -> tuple[str, bool]:
+    """Start or continue the booking process. Returns (response, need_more_info)."""
+    chat_id = session.session_id
+    booking_info = await asyncio.to_thread(appointment_orchestrator.appointment_service.get_booking_info, str(chat_id))
+
+    # If already in booking process, continue
+    if booking_info:
+        print(f"Continuing booking process for message: {message}")
+        response, booking_complete = await appointment_orchestrator.process_booking_message(str(chat_id), message)
+        return response, not booking_complete
+
+    # If starting a new booking process
+    print(f"Booking request detected: {message}")
+
+    # 대화 이력을 그대로 전달하여 진료과 추출
+    history_text = session.transcript
+    print(f"[DEBUG] Using full conversation history for department extraction: {history_text}")
+
+    response, booking_complete = await appointment_orchestrator.handle_booking_request(str(chat_id), history_text, message)
+    return response, not booking_complete
+
+
 # Enhanced function for medical consultation with appointment booking
 async def orchestrate_chat(
     message: str,
-    history: list[ChatMessage],
-    chat_id: int
+    session: SessionState
 ) -> tuple[list[str], bool]:
 
     responses = []
     need_more_info = False
+    chat_id = session.session_id
 
     # Reshaping system input into proper backend format
+    # (history is already held by the session, only the new message is processed)
     task = f"query: {message}"
 
-    history_str = ", ".join(f"{msg.role} - {msg.content}" for msg in history)
-    if history_str:
-        task = f"query: {message}, {history_str}"
-
     print(f"Processing message: {task} with chat_id: {chat_id}")
     try:
-        # Handle PII redaction if enabled
-        if PII_ENABLED:
-            print(f"Redacting PII for message: {task} with chat_id: {chat_id}")
-            task = pii_redacter.redact(
-                text=task,
-                id=chat_id,
-                cache=True
-            )
-
+        # PII is redacted by prepare_rag_prompt, concurrently with intent classification
+        retrieval_task = None
         try:
-            # Determine intent first
-            intent = await get_intent(message, history)
+            # Determine intent (retrieval for the likely CONSULTATION path runs concurrently)
+            retrieval_task = start_speculative_retrieval(message, "ko", chat_id)
+            intent = await get_intent(message, session)
 
             # STATE 1: User wants to book or is in a booking process
             if intent == "BOOKING":
-                booking_info = appointment_orchestrator.appointment_service.get_booking_info(str(chat_id))
-                
-                # If already in booking process, continue
-                if booking_info:
-                    print(f"Continuing booking process for message: {message}")
-                    response, booking_complete = appointment_orchestrator.process_booking_message(str(chat_id), message)
-                    responses.append(response)
-                    need_more_info = not booking_complete
-                # If starting a new booking process
-                else:
-                    print(f"Booking request detected: {message}")
-                    
-                    # 대화 이력을 그대로 전달하여 진료과 추출
-                    history_text = "\n".join([f"{msg.role}: {msg.content}" for msg in history])
-                    print(f"[DEBUG] Using full conversation history for department extraction: {history_text}")
-                    
-                    response, booking_complete = appointment_orchestrator.handle_booking_request(str(chat_id), history_text, message)
-                    responses.append(response)
-                    need_more_info = not booking_complete
+                discard_speculative_retrieval(retrieval_task)
+                response, need_more_info = await handle_booking(message, session)
+                responses.append(response)
 
             # STATE 2: User wants medical consultation
             else: # intent == "CONSULTATION"
                 print(f"Consultation intent detected: processing medical consultation for: {message}")
-                response = fallback_function(
+                response = await fallback_function(
                     message,
                     "ko",
                     chat_id,
-                    history
+                    session.prompt_messages,
+                    retrieval_task=retrieval_task
                 )
                 need_more_info = True
                 responses.append(response)
 
         except Exception as e:
             logging.error(f"Error processing utterance: {e}")
+            discard_speculative_retrieval(retrieval_task)
             responses.append("I encountered an error processing part of your message.")
 
     except Exception as e:
@@ -229,6 +410,91 @@ async def orchestrate_chat(
     return responses, need_more_info
 
 
+async def orchestrate_chat_stream(
+    message: str,
+    session: SessionState
+) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Streaming variant of orchestrate_chat.
+
+    Yields (event, data) pairs: "token" deltas for consultation answers,
+    a single "message" for booking turns, and a trailing "done" event
+    carrying need_more_info.
+    """
+    need_more_info = False
+    retrieval_task = None
+    chat_id = session.session_id
+    print(f"Processing streamed message: {message} with chat_id: {chat_id}")
+    try:
+        retrieval_task = start_speculative_retrieval(message, "ko", chat_id)
+        intent = await get_intent(message, session)
+
+        if intent == "BOOKING":
+            discard_speculative_retrieval(retrieval_task)
+            response, need_more_info = await handle_booking(message, session)
+            yield "message", {"content": response}
+        else:
+            print(f"Consultation intent detected: streaming medical consultation for: {message}")
+            async for delta in stream_fallback_function(message, "ko", chat_id, session.prompt_messages, retrieval_task=retrieval_task):
+                yield "token", {"content": delta}
+            need_more_info = True
+
+    except Exception as e:
+        logging.error(f"Error in streamed message processing: {e}")
+        discard_speculative_retrieval(retrieval_task)
+        yield "error", {"content": "I encountered an error processing part of your message."}
+
+    finally:
+        # Clean up PII cache if enabled
+        if PII_ENABLED:
+            pii_redacter.remove(id=chat_id)
+
+    yield "done", {"need_more_info": need_more_info}
+
+
+async def load_session(
+    session_id: str,
+    history: list[ChatMessage] = None
+) -> SessionState:
+    """Load the session; a new session is seeded from client-sent history if any."""
+    session = await session_store.get_or_create(session_id)
+    if not session.history and history:
+        for msg in history:
+            if msg.content:
+                role = "assistant" if msg.role.lower() in ["system", "assistant"] else "user"
+                session.append_message(role, msg.content)
+    return session
+
+
+async def summarize_history(
+    previous_summary: str,
+    messages: list[ChatMessage]
+) -> str:
+    """Fold messages into the rolling conversation summary."""
+    conversation = "".join(f"{msg.role}: {msg.content}\n" for msg in messages)
+    prompt = f"[Previous Summary]\n{previous_summary or '없음'}\n---\n[Conversation]\n{conversation}"
+    summary = await summary_client.chat_completion(prompt, history=None)
+    if not summary:
+        raise ValueError("Empty history summary")
+    return summary.strip()
+
+
+async def compact_session(session_id: str) -> None:
+    """Keep the session history within its token budget (runs after the response is sent)."""
+    async with session_store.lock(session_id):
+        session = await session_store.get(session_id)
+        with usage_session(session_id):
+            compacted = session is not None and await history_budget.compact(session, summarize_history)
+        if compacted:
+            print(f"[SESSION]: History compacted for {session_id}, tokens: {session.history_tokens}")
+            await session_store.save(session)
+
+
+def _format_sse(event: str, data: dict) -> str:
+    """Format a server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 def _extract_consultation_from_history(history: list[ChatMessage]) -> str:
     """대화 히스토리에서 의료 상담 내용 추출"""
     consultation_parts = []
@@ -275,14 +541,26 @@ async def lifespan(app: FastAPI):
     # Simple setup for direct RAG mode
     try:
         logging.basicConfig(level=logging.WARNING)
+        # Periodic LLM usage rollups:
+        logging.getLogger("usage_ledger").setLevel(logging.INFO)
         print("Direct RAG mode - simplified startup without agent orchestration")
         
         # Store minimal app state for direct RAG mode
         app.state.direct_rag_mode = True
+        session_janitor.start()
         
         # Yield control back to FastAPI lifespan
         yield
 
+        # Release pooled connections on shutdown
+        await session_janitor.stop()
+        await pii_redacter.close()
+        await search_client.close()
+        await session_store.close()
+        appointment_orchestrator.appointment_service.close()
+        await close_async_http_client()
+        await azure_credential.close()
+
     except Exception as e:
         logging.error(f"Error during setup: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -302,16 +580,27 @@ async def serve_frontend():
 
 # Define the chat endpoint
 @app.post("/chat")
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, http_request: Request):
+    session_id = get_session_id(http_request)
     try:
-        # Enhanced mode with appointment booking
-        responses, need_more_info = await orchestrate_chat(request.message, request.history, chat_id=0)
+        # Requests of the same session are serialized, other sessions run concurrently
+        async with session_store.lock(session_id):
+            session = await load_session(session_id, request.history)
+            # Enhanced mode with appointment booking
+            with track_request(session_id):
+                responses, need_more_info = await orchestrate_chat(request.message, session)
+            session.append_message("user", request.message)
+            for response in responses:
+                session.append_message("assistant", response)
+            session.turn_count += 1
+            await session_store.save(session)
         print("[APP]: Response generated, need_more_info:", need_more_info)
-        return JSONResponse(
+        return attach_session(JSONResponse(
             content={
                 "messages": responses,
-                "need_more_info": need_more_info
-            }, status_code=200)
+                "need_more_info": need_more_info,
+                "session_id": session_id
+            }, status_code=200, background=BackgroundTask(compact_session, session_id)), session_id)
 
     except Exception as e:
         logging.error(f"Error in chat endpoint: {e}")
@@ -321,11 +610,42 @@ async def chat_endpoint(request: ChatRequest):
         )
 
 
+# Define the streaming chat endpoint (server-sent events)
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest, http_request: Request):
+    session_id = get_session_id(http_request)
+
+    async def event_stream():
+        # The session lock is held for the whole stream
+        async with session_store.lock(session_id):
+            session = await load_session(session_id, request.history)
+            responses = []
+            with track_request(session_id):
+                async for event, data in orchestrate_chat_stream(request.message, session):
+                    if event == "token" and responses:
+                        responses[-1] += data["content"]
+                    elif event in ("token", "message"):
+                        responses.append(data["content"])
+                    yield _format_sse(event, data)
+            session.append_message("user", request.message)
+            for response in responses:
+                session.append_message("assistant", response)
+            session.turn_count += 1
+            await session_store.save(session)
+
+    return attach_session(StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(compact_session, session_id)
+    ), session_id)
+
+
 # Define the appointment lookup endpoint
 @app.get("/appointment/{appointment_id}")
 async def get_appointment(appointment_id: str):
     try:
-        appointment = appointment_orchestrator.appointment_service.get_appointment(appointment_id)
+        appointment = await asyncio.to_thread(appointment_orchestrator.appointment_service.get_appointment, appointment_id)
         if not appointment:
             return JSONResponse(
                 content={"error": "Appointment not found"},
@@ -357,7 +677,7 @@ async def get_appointment(appointment_id: str):
 @app.post("/appointment/{appointment_id}/cancel")
 async def cancel_appointment(appointment_id: str):
     try:
-        success = appointment_orchestrator.appointment_service.cancel_appointment(appointment_id)
+        success = await asyncio.to_thread(appointment_orchestrator.appointment_service.cancel_appointment, appointment_id)
         if not success:
             return JSONResponse(
                 content={"error": "Appointment not found"},
@@ -396,29 +716,123 @@ async def list_routes():
     return {"routes": routes}
 
 
+@app.get("/metrics/intent")
+async def intent_metrics():
+    """의도 분류 fast-path 통계"""
+    return intent_classifier.get_stats()
+
+
+@app.get("/metrics/history")
+async def history_metrics():
+    """대화 이력 토큰 예산/요약 통계"""
+    return history_budget.get_stats()
+
+
+@app.get("/metrics/sessions")
+async def session_metrics():
+    """세션 게이지 (활성 대화/예약 세션 수, PII 매핑, 메모리 사용량) 및 만료 작업 통계"""
+    return {**await session_janitor.collect_gauges(), "janitor": session_janitor.get_stats()}
+
+
+@app.get("/diagnostics/capabilities")
+async def capability_diagnostics():
+    """배포별로 확인된 AOAI 기능 (JSON 모드, 도구 호출, 스트리밍; 처음 사용할 때 확인)"""
+    return {"deployments": capability_registry.snapshot()}
+
+
+@app.get("/metrics/upstream")
+async def upstream_metrics():
+    """업스트림(AOAI/검색/Language) 재시도 횟수 및 서킷 브레이커 상태"""
+    return retry_policy.get_stats()
+
+
+@app.get("/metrics/deployments")
+async def deployment_metrics():
+    """AOAI 배포별 토큰 사용량(슬라이딩 윈도우), 예약 토큰 및 스로틀링 상태"""
+    if aoai_balancer is None:
+        return {"enabled": False}
+    return {"enabled": True, **aoai_balancer.get_stats()}
+
+
+@app.get("/metrics/usage")
+async def usage_metrics(session: Optional[str] = None):
+    """LLM 토큰(프롬프트/완료/캐시) 및 소요 시간 집계 (단계별, 배포별, 요청별, 세션별; 세션은 해시 참조로만 표시/조회)"""
+    if session is None:
+        return usage_ledger.get_stats()
+    stats = usage_ledger.session_stats(session)
+    if stats is None:
+        return JSONResponse(content={"error": "Session not found"}, status_code=404)
+    return stats
+
+
+@app.get("/metrics/single-flight")
+async def single_flight_metrics():
+    """동일 요청 병합 통계 (LLM/검색/임베딩 업스트림 호출 수 대비 병합된 호출 수)"""
+    return single_flight.get_stats()
+
+
+@app.get("/metrics/retrieval-cache")
+async def retrieval_cache_metrics():
+    """검색 결과 캐시 통계"""
+    if retrieval_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **(await asyncio.to_thread(retrieval_cache.get_stats))}
+
+
+@app.get("/metrics/answer-cache")
+async def answer_cache_metrics():
+    """시맨틱 답변 캐시 통계"""
+    if answer_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **answer_cache.get_stats()}
+
+
+@app.post("/admin/retrieval-cache/invalidate")
+async def invalidate_retrieval_cache():
+    """검색 결과 캐시 무효화 (인덱스 재구성 후 호출)"""
+    if answer_cache is not None:
+        # Cached answers were grounded on the old index as well
+        answer_cache.clear()
+    if retrieval_cache is None:
+        return {"enabled": False, "removed": 0}
+    return {"enabled": True, "removed": await asyncio.to_thread(retrieval_cache.invalidate)}
+
+
 @app.get("/appointments")
-async def list_appointments():
-    """전체 예약 목록 조회 API"""
-    appointments = []
-    for apt in appointment_orchestrator.appointment_service.appointments:
-        appointments.append({
-            "appointment_id": apt.appointment_id,
-            "patient_name": apt.patient_name,
-            "department": apt.department,
-            "appointment_date": apt.preferred_date,
-            "appointment_time": apt.preferred_time,
-            "status": apt.status.value,
-            "created_at": apt.created_at.isoformat()
-        })
+async def list_appointments(
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    department: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    status: Optional[AppointmentStatus] = None,
+    format: str = "json"
+):
+    """예약 목록 조회 API (커서 기반 페이지네이션, 진료과/날짜 범위/상태 필터, format=ndjson 이면 전체 스트리밍)"""
+    if cursor is not None and not cursor.isdigit():
+        return JSONResponse(content={"error": "잘못된 cursor 값입니다."}, status_code=400)
+    filters = {"department": department, "date_from": date_from, "date_to": date_to, "status": status}
+    
+    if format == "ndjson":
+        # 페이지 단위로 읽어 바로 내보내므로 예약 수와 무관하게 메모리 사용량 일정
+        return StreamingResponse(
+            (
+                json.dumps(apt.to_listing_dict(), ensure_ascii=False) + "\n"
+                for apt in appointment_orchestrator.appointment_service.stream_appointments(cursor, **filters)
+            ),
+            media_type="application/x-ndjson"
+        )
     
-    return {"appointments": appointments}
+    limit = max(1, min(limit, MAX_APPOINTMENT_PAGE_SIZE))
+    page, next_cursor = await asyncio.to_thread(appointment_orchestrator.appointment_service.list_appointments_page, cursor, limit, **filters)
+    return {"appointments": [apt.to_listing_dict() for apt in page], "next_cursor": next_cursor}
 
 
 @app.get("/appointments/{appointment_id}")
 async def get_appointment_by_id(appointment_id: str):
     """예약 조회 API (복수형 경로)"""
     try:
-        appointment = appointment_orchestrator.appointment_service.get_appointment(appointment_id)
+        appointment = await asyncio.to_thread(appointment_orchestrator.appointment_service.get_appointment, appointment_id)
         if not appointment:
             return JSONResponse(
                 content={"error": "예약을 찾을 수 없습니다."},
@@ -443,18 +857,48 @@ async def get_appointment_by_id(appointment_id: str):
         )
 
 
+@app.get("/departments/{department}/availability")
+async def department_availability(
+    department: str,
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to")
+):
+    """진료과 예약 가능 시간 조회 API (from/to: YYYY-MM-DD, 기본 오늘부터 2주)"""
+    schedules = appointment_orchestrator.appointment_service.schedules
+    if not schedules.knows(department):
+        return JSONResponse(content={"error": "진료과를 찾을 수 없습니다."}, status_code=404)
+    try:
+        availability = await asyncio.to_thread(appointment_orchestrator.appointment_service.get_availability, department, date_from, date_to)
+    except ValueError:
+        return JSONResponse(
+            content={"error": f"from/to는 YYYY-MM-DD 형식이며 조회 기간은 최대 {MAX_AVAILABILITY_DAYS}일입니다."},
+            status_code=400
+        )
+    return {
+        "department": department,
+        "slot_minutes": schedules.get(department).slot_minutes,
+        "days": [{"date": day, "slots": slots} for day, slots in availability.items()]
+    }
+
+
 @app.get("/debug/appointments")
-async def debug_appointments():
-    """디버그: 현재 예약 목록 확인"""
+async def debug_appointments(cursor: Optional[str] = None, limit: int = 50):
+    """디버그: 현재 예약 목록 확인 (페이지 단위)"""
+    if cursor is not None and not cursor.isdigit():
+        return JSONResponse(content={"error": "잘못된 cursor 값입니다."}, status_code=400)
+    page, next_cursor = await asyncio.to_thread(
+        appointment_orchestrator.appointment_service.list_appointments_page, cursor, max(1, min(limit, MAX_APPOINTMENT_PAGE_SIZE))
+    )
     return {
-        "total_appointments": len(appointment_orchestrator.appointment_service.appointments),
-        "appointment_ids": [apt.appointment_id for apt in appointment_orchestrator.appointment_service.appointments],
+        "total_appointments": await asyncio.to_thread(appointment_orchestrator.appointment_service.count_appointments),
+        "appointment_ids": [apt.appointment_id for apt in page],
         "appointments": [
             {
                 "appointment_id": apt.appointment_id,
                 "patient_name": apt.patient_name,
                 "department": apt.department
             }
-            for apt in appointment_orchestrator.appointment_service.appointments
-        ]
+            for apt in page
+        ],
+        "next_cursor": next_cursor
     }
@@ -0,0 +1,397 @@
+import os
+import re
+import time
+import heapq
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime
+from typing import Iterable, Iterator, List, Optional
+from models.appointment import AppointmentRequest, AppointmentStatus, BookingInfo
+
+APPOINTMENT_STORE = os.environ.get("APPOINTMENT_STORE", "memory").lower()
+APPOINTMENT_DB_PATH = os.environ.get("APPOINTMENT_DB_PATH", "appointments.db")
+# 예약 확인 대기 중 슬롯 임시 점유(hold) 유지 시간
+APPOINTMENT_HOLD_SECONDS = float(os.environ.get("APPOINTMENT_HOLD_SECONDS", "300"))
+
+# 30분 단위 슬롯 (하루 48칸)
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+# 진료 가능 시간 (점심시간 제외)
+BASE_SLOTS = [
+    "09:00", "09:30", "10:00", "10:30", "11:00", "11:30",
+    "14:00", "14:30", "15:00", "15:30", "16:00", "16:30"
+]
+
+# 슬롯 점유로 간주하는 예약 상태
+OCCUPYING_STATUSES = (AppointmentStatus.CONFIRMED,)
+
+_HHMM = re.compile(r"^(\d{2}):(\d{2})$")
+
+
+def slot_index(time_str: str) -> Optional[int]:
+    """HH:MM → 하루 중 슬롯 번호 (형식이 다르면 None)"""
+    match = _HHMM.match(time_str or "")
+    if not match or int(match.group(2)) >= 60:
+        return None
+    index = (int(match.group(1)) * 60 + int(match.group(2))) // SLOT_MINUTES
+    return index if 0 <= index < SLOTS_PER_DAY else None
+
+
+def is_slot_date(date_str: str) -> bool:
+    """YYYY-MM-DD 형식의 실제 날짜인지"""
+    try:
+        date.fromisoformat(date_str)
+    except (TypeError, ValueError):
+        return False
+    return len(date_str) == 10
+
+
+def slot_time(index: int) -> str:
+    """슬롯 번호 → HH:MM"""
+    minutes = index * SLOT_MINUTES
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def slots_to_mask(times: List[str]) -> int:
+    mask = 0
+    for time_str in times:
+        index = slot_index(time_str)
+        if index is not None:
+            mask |= 1 << index
+    return mask
+
+
+def mask_to_slots(mask: int) -> List[str]:
+    return [slot_time(i) for i in range(SLOTS_PER_DAY) if mask >> i & 1]
+
+
+def matches_filters(
+    appointment: AppointmentRequest,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    status: Optional[AppointmentStatus] = None
+) -> bool:
+    """날짜 범위(YYYY-MM-DD, 양끝 포함)/상태 필터 일치 여부"""
+    if date_from is not None and appointment.preferred_date < date_from:
+        return False
+    if date_to is not None and appointment.preferred_date > date_to:
+        return False
+    return status is None or appointment.status == status
+
+
+class SlotUnavailableError(ValueError):
+    """이미 예약되었거나 다른 사용자가 임시 점유 중인 슬롯"""
+
+    def __init__(self, department: str, date: str, time_str: str):
+        super().__init__(f"Slot unavailable: {department} {date} {time_str}")
+        self.department = department
+        self.date = date
+        self.time = time_str
+
+
+def _positions_from(positions: list[int], start: int) -> Iterator[int]:
+    """정렬된 순번 목록에서 start 이상인 순번"""
+    for i in range(bisect_left(positions, start), len(positions)):
+        yield positions[i]
+
+
+class InMemoryAppointmentRepository:
+    """인덱스 기반 인메모리 예약 저장소 (ID / 진료과·날짜 / 연락처 인덱스, 일별 슬롯 비트맵)"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._by_id: dict[str, AppointmentRequest] = {}
+        self._by_department_date: dict[tuple[str, str], set[str]] = {}
+        self._by_phone: dict[str, set[str]] = {}
+        # (진료과, 날짜) → 점유 슬롯 비트맵
+        self._slot_bitmaps: dict[tuple[str, str], int] = {}
+        # 등록 순서 (페이지 커서 = 순번), 진료과/날짜/상태별 순번 목록 (오름차순)
+        self._order: list[str] = []
+        self._position_by_id: dict[str, int] = {}
+        self._positions_by_department: dict[str, list[int]] = {}
+        self._positions_by_date: dict[str, list[int]] = {}
+        self._positions_by_status: dict[AppointmentStatus, list[int]] = {}
+        # 날짜 범위 필터용 정렬된 날짜 목록
+        self._dates: list[str] = []
+        self._id_counter = 0
+        self._booking_sessions: dict[str, BookingInfo] = {}
+        # 만료 처리용 시간순 인덱스 (min-heap, 삭제/갱신된 항목은 꺼낼 때 무시)
+        self._booking_session_heap: list[tuple[datetime, str]] = []
+        # (진료과, 날짜) → {슬롯: (holder, 만료 시각)}, holder당 hold 1개
+        self._holds: dict[tuple[str, str], dict[int, tuple[str, float]]] = {}
+        self._holds_by_holder: dict[str, tuple[str, str, int]] = {}
+        self._hold_expiry_heap: list[tuple[float, str]] = []
+
+    def next_appointment_id(self) -> str:
+        """단조 증가 예약번호 (삭제/취소 후에도 중복되지 않음)"""
+        with self._lock:
+            self._id_counter += 1
+            return f"APT{self._id_counter:06d}"
+
+    def add(self, appointment: AppointmentRequest, booking_chat_id: Optional[str] = None) -> None:
+        """예약 저장 및 인덱스 갱신 (booking_chat_id의 예약 세션도 함께 종료)"""
+        with self._lock:
+            if appointment.appointment_id in self._by_id:
+                raise ValueError(f"Duplicate appointment ID: {appointment.appointment_id}")
+            self._by_id[appointment.appointment_id] = appointment
+            position = len(self._order)
+            self._position_by_id[appointment.appointment_id] = position
+            self._positions_by_department.setdefault(appointment.department, []).append(position)
+            if appointment.preferred_date not in self._positions_by_date:
+                insort(self._dates, appointment.preferred_date)
+            self._positions_by_date.setdefault(appointment.preferred_date, []).append(position)
+            self._positions_by_status.setdefault(appointment.status, []).append(position)
+            self._order.append(appointment.appointment_id)
+            if booking_chat_id is not None:
+                self._booking_sessions.pop(booking_chat_id, None)
+            day_key = (appointment.department, appointment.preferred_date)
+            self._by_department_date.setdefault(day_key, set()).add(appointment.appointment_id)
+            self._by_phone.setdefault(appointment.phone_number, set()).add(appointment.appointment_id)
+            if appointment.status in OCCUPYING_STATUSES:
+                self._occupy(appointment)
+
+    def claim(self, appointment: AppointmentRequest, holder: Optional[str] = None, booking_chat_id: Optional[str] = None) -> None:
+        """슬롯 확인과 예약 저장을 원자적으로 수행 (점유/타인 hold/YYYY-MM-DD·HH:MM이 아닌 슬롯은 SlotUnavailableError)"""
+        index = slot_index(appointment.preferred_time)
+        with self._lock:
+            if appointment.status in OCCUPYING_STATUSES:
+                day_key = (appointment.department, appointment.preferred_date)
+                if index is None or not is_slot_date(appointment.preferred_date) or \
+                        self.occupied_mask(*day_key) >> index & 1 or self._is_held_by_other(day_key, index, holder, time.time()):
+                    raise SlotUnavailableError(appointment.department, appointment.preferred_date, appointment.preferred_time)
+            self.add(appointment, booking_chat_id=booking_chat_id)
+            if holder is not None:
+                self.release_hold(holder)
+
+    def try_hold(self, department: str, date: str, time_str: str, holder: str, ttl: float = APPOINTMENT_HOLD_SECONDS) -> bool:
+        """확인 대기 동안 슬롯 임시 점유 (이미 예약/타인 hold/형식 오류 시 False, holder의 이전 hold는 해제)"""
+        index = slot_index(time_str)
+        if index is None or not is_slot_date(date):
+            return False
+        day_key = (department, date)
+        now = time.time()
+        with self._lock:
+            if self.occupied_mask(department, date) >> index & 1 or self._is_held_by_other(day_key, index, holder, now):
+                return False
+            self.release_hold(holder)
+            expired_hold = self._holds.get(day_key, {}).get(index)
+            if expired_hold is not None:
+                # 만료된 타인의 hold 인수
+                self._holds_by_holder.pop(expired_hold[0], None)
+            self._holds.setdefault(day_key, {})[index] = (holder, now + ttl)
+            self._holds_by_holder[holder] = (department, date, index)
+            heapq.heappush(self._hold_expiry_heap, (now + ttl, holder))
+            return True
+
+    def release_hold(self, holder: str) -> None:
+        with self._lock:
+            hold_key = self._holds_by_holder.pop(holder, None)
+            if hold_key is not None:
+                self._drop_hold(hold_key[:2], hold_key[2], holder)
+
+    def held_mask(self, department: str, date: str, exclude_holder: Optional[str] = None) -> int:
+        """유효한 hold 슬롯 비트맵 (exclude_holder의 hold 제외)"""
+        now = time.time()
+        mask = 0
+        with self._lock:
+            for index, (holder, expires_at) in self._holds.get((department, date), {}).items():
+                if expires_at > now and holder != exclude_holder:
+                    mask |= 1 << index
+        return mask
+
+    def purge_expired_holds(self) -> int:
+        """만료된 hold 정리 (만료 시각 순 heap에서 만료분만 꺼냄)"""
+        now = time.time()
+        removed = 0
+        with self._lock:
+            while self._hold_expiry_heap and self._hold_expiry_heap[0][0] <= now:
+                expires_at, holder = heapq.heappop(self._hold_expiry_heap)
+                hold_key = self._holds_by_holder.get(holder)
+                if hold_key is None or self._holds[hold_key[:2]][hold_key[2]] != (holder, expires_at):
+                    # 이미 해제/갱신된 hold
+                    continue
+                self.release_hold(holder)
+                removed += 1
+            return removed
+
+    def _is_held_by_other(self, day_key: tuple[str, str], index: int, holder: Optional[str], now: float) -> bool:
+        hold = self._holds.get(day_key, {}).get(index)
+        return hold is not None and hold[0] != holder and hold[1] > now
+
+    def _drop_hold(self, day_key: tuple[str, str], index: int, holder: str) -> None:
+        day_holds = self._holds.get(day_key)
+        if day_holds is None or day_holds.get(index, ("",))[0] != holder:
+            return
+        del day_holds[index]
+        if not day_holds:
+            del self._holds[day_key]
+
+    def get(self, appointment_id: str) -> Optional[AppointmentRequest]:
+        return self._by_id.get(appointment_id)
+
+    def find_by_phone(self, phone_number: str) -> List[AppointmentRequest]:
+        with self._lock:
+            return [self._by_id[i] for i in sorted(self._by_phone.get(phone_number, ()))]
+
+    def find_by_department_date(self, department: str, date: str) -> List[AppointmentRequest]:
+        with self._lock:
+            return [self._by_id[i] for i in sorted(self._by_department_date.get((department, date), ()))]
+
+    def update_status(self, appointment_id: str, status: AppointmentStatus) -> bool:
+        """예약 상태 변경 (슬롯 점유 비트맵 동기화)"""
+        with self._lock:
+            appointment = self._by_id.get(appointment_id)
+            if appointment is None:
+                return False
+            was_occupying = appointment.status in OCCUPYING_STATUSES
+            if status != appointment.status:
+                position = self._position_by_id[appointment_id]
+                previous = self._positions_by_status[appointment.status]
+                del previous[bisect_left(previous, position)]
+                insort(self._positions_by_status.setdefault(status, []), position)
+            appointment.status = status
+            if was_occupying and status not in OCCUPYING_STATUSES:
+                self._release(appointment)
+            elif not was_occupying and status in OCCUPYING_STATUSES:
+                self._occupy(appointment)
+            return True
+
+    def occupied_mask(self, department: str, date: str) -> int:
+        """해당 진료과·날짜의 점유 슬롯 비트맵"""
+        return self._slot_bitmaps.get((department, date), 0)
+
+    def is_slot_free(self, department: str, date: str, time_str: str) -> bool:
+        """비어 있는 슬롯인지 (YYYY-MM-DD / HH:MM 형식이 아니면 False)"""
+        index = slot_index(time_str)
+        if index is None or not is_slot_date(date):
+            return False
+        return not self.occupied_mask(department, date) >> index & 1
+
+    def iter_appointments(self) -> Iterator[AppointmentRequest]:
+        """등록 순 순회"""
+        with self._lock:
+            appointments = list(self._by_id.values())
+        return iter(appointments)
+
+    def list_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        department: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        status: Optional[AppointmentStatus] = None
+    ) -> tuple[List[AppointmentRequest], Optional[str]]:
+        """등록 순 페이지 조회 (cursor: 이전 페이지의 next_cursor, 진료과/날짜 범위/상태 필터)"""
+        start = int(cursor) if cursor else 0
+        page: List[AppointmentRequest] = []
+        with self._lock:
+            for position in self._candidate_positions(start, department, date_from, date_to, status):
+                appointment = self._by_id[self._order[position]]
+                if department is not None and appointment.department != department:
+                    continue
+                if not matches_filters(appointment, date_from, date_to, status):
+                    continue
+                if len(page) == limit:
+                    return page, str(position)
+                page.append(appointment)
+        return page, None
+
+    def _candidate_positions(
+        self,
+        start: int,
+        department: Optional[str],
+        date_from: Optional[str],
+        date_to: Optional[str],
+        status: Optional[AppointmentStatus]
+    ) -> Iterable[int]:
+        """start 이후 순번을 오름차순으로 (필터 중 후보가 가장 적은 인덱스 사용, 필터 없으면 전체)"""
+        candidates: list[tuple[int, list[list[int]]]] = []
+        if department is not None:
+            positions = self._positions_by_department.get(department, [])
+            candidates.append((len(positions), [positions]))
+        if status is not None:
+            positions = self._positions_by_status.get(status, [])
+            candidates.append((len(positions), [positions]))
+        if date_from is not None or date_to is not None:
+            low = bisect_left(self._dates, date_from) if date_from is not None else 0
+            high = bisect_right(self._dates, date_to) if date_to is not None else len(self._dates)
+            per_date = [self._positions_by_date[day] for day in self._dates[low:high]]
+            candidates.append((sum(len(positions) for positions in per_date), per_date))
+        if not candidates:
+            return range(start, len(self._order))
+
+        _, lists = min(candidates, key=lambda candidate: candidate[0])
+        tails = [_positions_from(positions, start) for positions in lists]
+        # 날짜별 목록은 순번 순으로 병합
+        return tails[0] if len(tails) == 1 else heapq.merge(*tails)
+
+    def count(self) -> int:
+        return len(self._by_id)
+
+    # 예약 세션 (chat_id → BookingInfo)
+
+    def save_booking_session(self, chat_id: str, booking_info: BookingInfo) -> None:
+        with self._lock:
+            current = self._booking_sessions.get(chat_id)
+            self._booking_sessions[chat_id] = booking_info
+            if current is None or current.created_at != booking_info.created_at:
+                heapq.heappush(self._booking_session_heap, (booking_info.created_at, chat_id))
+
+    def get_booking_session(self, chat_id: str) -> Optional[BookingInfo]:
+        return self._booking_sessions.get(chat_id)
+
+    def delete_booking_session(self, chat_id: str) -> None:
+        self._booking_sessions.pop(chat_id, None)
+
+    def delete_booking_sessions_before(self, cutoff: datetime) -> int:
+        """cutoff 이전에 시작된 예약 세션 삭제 (시작 시각 순 heap에서 만료분만 꺼냄)"""
+        removed = 0
+        with self._lock:
+            heap = self._booking_session_heap
+            while heap and heap[0][0] < cutoff:
+                created_at, chat_id = heapq.heappop(heap)
+                current = self._booking_sessions.get(chat_id)
+                if current is not None and current.created_at == created_at:
+                    del self._booking_sessions[chat_id]
+                    removed += 1
+            return removed
+
+    def count_booking_sessions(self) -> int:
+        return len(self._booking_sessions)
+
+    def close(self) -> None:
+        pass
+
+    def _occupy(self, appointment: AppointmentRequest) -> None:
+        index = slot_index(appointment.preferred_time)
+        if index is not None:
+            day_key = (appointment.department, appointment.preferred_date)
+            self._slot_bitmaps[day_key] = self._slot_bitmaps.get(day_key, 0) | 1 << index
+
+    def _release(self, appointment: AppointmentRequest) -> None:
+        index = slot_index(appointment.preferred_time)
+        day_key = (appointment.department, appointment.preferred_date)
+        if index is None or day_key not in self._slot_bitmaps:
+            return
+        # 같은 슬롯을 점유한 다른 예약이 남아 있으면 비트 유지
+        for other_id in self._by_department_date.get(day_key, ()):
+            other = self._by_id[other_id]
+            if other is not appointment and other.status in OCCUPYING_STATUSES and slot_index(other.preferred_time) == index:
+                return
+        mask = self._slot_bitmaps[day_key] & ~(1 << index)
+        if mask:
+            self._slot_bitmaps[day_key] = mask
+        else:
+            del self._slot_bitmaps[day_key]
+
+
+def create_appointment_repository():
+    """설정에 따른 예약 저장소 생성 (APPOINTMENT_STORE=memory|sqlite)"""
+    if APPOINTMENT_STORE == "sqlite":
+        from services.sqlite_appointment_repository import SQLiteAppointmentRepository
+        return SQLiteAppointmentRepository(APPOINTMENT_DB_PATH)
+    if APPOINTMENT_STORE == "memory":
+        return InMemoryAppointmentRepository()
+    raise ValueError(f"Unsupported appointment store: {APPOINTMENT_STORE}")
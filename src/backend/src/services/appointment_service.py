@@ -1,58 +1,90 @@
+import os
 import uuid
-from datetime import datetime, timedelta
-from typing import List, Optional
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Optional
 from models.appointment import AppointmentRequest, AppointmentResponse, AppointmentStatus, BookingInfo
+from services.appointment_repository import create_appointment_repository, is_slot_date, mask_to_slots, slot_index, SlotUnavailableError
+from services.department_schedule import load_department_schedules
+from korean_datetime import korean_datetime
+
+# 예약 목록 API 한 페이지 최대 건수
+MAX_APPOINTMENT_PAGE_SIZE = 200
+# 빈 시간 검색 범위 (오늘부터 N일)
+AVAILABILITY_HORIZON_DAYS = int(os.environ.get("AVAILABILITY_HORIZON_DAYS", "28"))
+# 가용 시간 API 최대 조회 기간
+MAX_AVAILABILITY_DAYS = 62
+# 예약 세션 만료 시간 (시작 후)
+BOOKING_SESSION_MAX_AGE_HOURS = float(os.environ.get("BOOKING_SESSION_MAX_AGE_HOURS", "24"))
 
 class AppointmentService:
     """예약 관리 서비스"""
     
     def __init__(self):
-        # 실제 운영에서는 데이터베이스 사용
-        self.appointments: List[AppointmentRequest] = []
-        self.booking_sessions: dict = {}  # chat_id -> BookingInfo
+        # APPOINTMENT_STORE=sqlite 이면 재시작 후에도 예약/예약 세션 유지
+        self.repository = create_appointment_repository()
+        # 진료과별 진료 시간/휴진일 (DEPARTMENT_SCHEDULES_PATH)
+        self.schedules = load_department_schedules()
+        self.clock = korean_datetime.clock
         
         # 샘플 예약 추가
         self._add_sample_appointment()
     
     def start_booking_session(self, chat_id: str, department: str, consultation_summary: str) -> None:
         """예약 세션 시작"""
-        self.booking_sessions[chat_id] = BookingInfo(
+        self.repository.save_booking_session(chat_id, BookingInfo(
             department=department,
             consultation_summary=consultation_summary
-        )
+        ))
     
     def update_booking_info(self, chat_id: str, **kwargs) -> BookingInfo:
         """예약 정보 업데이트"""
-        if chat_id not in self.booking_sessions:
+        booking_info = self.repository.get_booking_session(chat_id)
+        if booking_info is None:
             raise ValueError("Booking session not found")
         
-        booking_info = self.booking_sessions[chat_id]
         for key, value in kwargs.items():
             if hasattr(booking_info, key):
                 setattr(booking_info, key, value)
         
+        self.repository.save_booking_session(chat_id, booking_info)
         return booking_info
     
     def get_booking_info(self, chat_id: str) -> Optional[BookingInfo]:
         """예약 정보 조회"""
-        return self.booking_sessions.get(chat_id)
+        return self.repository.get_booking_session(chat_id)
+    
+    def hold_slot(self, chat_id: str) -> bool:
+        """확인 대기 중인 희망 슬롯 임시 점유 (이미 예약/타인 hold 시 False)"""
+        booking_info = self.get_booking_info(chat_id)
+        if not booking_info or not booking_info.is_complete():
+            return False
+        if not self._is_open(booking_info.department, booking_info.preferred_date, booking_info.preferred_time):
+            return False
+        return self.repository.try_hold(
+            booking_info.department, booking_info.preferred_date, booking_info.preferred_time, holder=chat_id
+        )
+    
+    def release_hold(self, chat_id: str) -> None:
+        """임시 점유 해제"""
+        self.repository.release_hold(chat_id)
     
     def create_appointment(self, chat_id: str) -> AppointmentResponse:
-        """예약 생성"""
+        """예약 생성 (슬롯이 이미 찼으면 SlotUnavailableError)"""
         booking_info = self.get_booking_info(chat_id)
         if not booking_info or not booking_info.is_complete():
             raise ValueError("Incomplete booking information")
         
         appointment_request = booking_info.to_appointment_request()
+        if not self._is_open(appointment_request.department, appointment_request.preferred_date, appointment_request.preferred_time):
+            raise SlotUnavailableError(
+                appointment_request.department, appointment_request.preferred_date, appointment_request.preferred_time
+            )
         appointment_id = self._generate_appointment_id()
         
-        # 예약 생성
+        # 슬롯 확인·예약 생성·세션 정리를 원자적으로 수행
         appointment_request.appointment_id = appointment_id
         appointment_request.status = AppointmentStatus.CONFIRMED
-        self.appointments.append(appointment_request)
-        
-        # 세션 정리
-        del self.booking_sessions[chat_id]
+        self.repository.claim(appointment_request, holder=chat_id, booking_chat_id=chat_id)
         
         return AppointmentResponse(
             appointment_id=appointment_id,
@@ -66,69 +98,120 @@ class AppointmentService:
     
     def get_appointment(self, appointment_id: str) -> Optional[AppointmentRequest]:
         """예약 조회"""
-        for appointment in self.appointments:
-            if appointment.appointment_id == appointment_id:
-                return appointment
-        return None
+        return self.repository.get(appointment_id)
+    
+    def find_appointments_by_phone(self, phone_number: str) -> List[AppointmentRequest]:
+        """연락처로 예약 조회"""
+        return self.repository.find_by_phone(phone_number)
+    
+    def list_appointments(self) -> Iterator[AppointmentRequest]:
+        """전체 예약 순회"""
+        return self.repository.iter_appointments()
+    
+    def list_appointments_page(self, cursor: Optional[str] = None, limit: int = 50, **filters) -> tuple[List[AppointmentRequest], Optional[str]]:
+        """예약 페이지 조회 (다음 페이지 커서 포함, filters: department/date_from/date_to/status)"""
+        return self.repository.list_page(cursor, limit, **filters)
+    
+    def stream_appointments(self, cursor: Optional[str] = None, page_size: int = 500, **filters) -> Iterator[AppointmentRequest]:
+        """필터에 맞는 예약을 페이지 단위로 순회 (대량 내보내기용)"""
+        while True:
+            page, cursor = self.repository.list_page(cursor, page_size, **filters)
+            yield from page
+            if cursor is None:
+                return
+    
+    def count_appointments(self) -> int:
+        """전체 예약 수"""
+        return self.repository.count()
     
     def cancel_appointment(self, appointment_id: str) -> bool:
         """예약 취소"""
-        appointment = self.get_appointment(appointment_id)
-        if appointment:
-            appointment.status = AppointmentStatus.CANCELLED
-            return True
-        return False
-    
-    def get_available_slots(self, department: str, date: str) -> List[str]:
-        """가용 시간 조회 (간단한 구현)"""
-        # 실제로는 의료진 스케줄과 기존 예약을 확인해야 함
-        base_slots = [
-            "09:00", "09:30", "10:00", "10:30", "11:00", "11:30",
-            "14:00", "14:30", "15:00", "15:30", "16:00", "16:30"
-        ]
-        
-        # 해당 날짜의 기존 예약 확인
-        existing_appointments = [
-            apt for apt in self.appointments 
-            if apt.department == department 
-            and apt.preferred_date == date 
-            and apt.status == AppointmentStatus.CONFIRMED
-        ]
-        
-        booked_times = [apt.preferred_time for apt in existing_appointments]
-        available_slots = [slot for slot in base_slots if slot not in booked_times]
-        
-        return available_slots
+        return self.repository.update_status(appointment_id, AppointmentStatus.CANCELLED)
+    
+    def get_available_slots(self, department: str, date: str, holder: Optional[str] = None) -> List[str]:
+        """가용 시간 조회 (진료 일정 비트맵 - 점유 비트맵 - 타인 hold 비트맵)"""
+        return mask_to_slots(self._free_mask(department, date, holder))
+    
+    def is_slot_available(self, department: str, date: str, time: str, holder: Optional[str] = None) -> bool:
+        """해당 시간 예약 가능 여부 (형식 오류/진료 시간 외/예약됨/타인이 임시 점유 중이면 불가)"""
+        index = slot_index(time)
+        if index is None or not is_slot_date(date):
+            return False
+        return bool(self._free_mask(department, date, holder) >> index & 1)
+    
+    def get_availability(
+        self,
+        department: str,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        holder: Optional[str] = None
+    ) -> dict[str, List[str]]:
+        """기간(YYYY-MM-DD, 양끝 포함, 기본 오늘부터 2주)의 날짜별 가용 시간 (형식/기간 오류 시 ValueError)"""
+        start = date.fromisoformat(date_from) if date_from else self.clock().date()
+        end = date.fromisoformat(date_to) if date_to else start + timedelta(days=13)
+        if end < start or (end - start).days >= MAX_AVAILABILITY_DAYS:
+            raise ValueError(f"Availability range must span 1-{MAX_AVAILABILITY_DAYS} days")
+        return {
+            day.isoformat(): self.get_available_slots(department, day.isoformat(), holder)
+            for day in (start + timedelta(days=offset) for offset in range((end - start).days + 1))
+        }
+    
+    def next_free_slots(self, department: str, count: int, holder: Optional[str] = None, start_date: Optional[str] = None) -> List[tuple[str, str]]:
+        """가장 가까운 빈 시간 count개 [(날짜, 시간)] (AVAILABILITY_HORIZON_DAYS 이내)"""
+        start = date.fromisoformat(start_date) if start_date else self.clock().date()
+        slots: List[tuple[str, str]] = []
+        for offset in range(AVAILABILITY_HORIZON_DAYS):
+            day = (start + timedelta(days=offset)).isoformat()
+            for time_str in self.get_available_slots(department, day, holder):
+                slots.append((day, time_str))
+                if len(slots) == count:
+                    return slots
+        return slots
+    
+    def _free_mask(self, department: str, date: str, holder: Optional[str] = None) -> int:
+        open_mask = self.schedules.get(department).open_mask(date, self.clock())
+        if not open_mask:
+            return 0
+        taken = self.repository.occupied_mask(department, date) | self.repository.held_mask(department, date, holder)
+        return open_mask & ~taken
+    
+    def _is_open(self, department: str, date: str, time: str) -> bool:
+        """진료 일정상 예약 가능한 슬롯인지"""
+        return self.schedules.get(department).is_open(date, time, self.clock())
     
     def _generate_appointment_id(self) -> str:
         """예약번호 생성"""
-        return f"APT{len(self.appointments) + 1:06d}"
+        return self.repository.next_appointment_id()
     
-    def cleanup_expired_sessions(self, max_age_hours: int = 24) -> None:
-        """만료된 예약 세션 정리"""
-        current_time = datetime.now()
-        expired_sessions = []
-        
-        for chat_id, booking_info in self.booking_sessions.items():
-            if (current_time - booking_info.created_at).total_seconds() > max_age_hours * 3600:
-                expired_sessions.append(chat_id)
-        
-        for chat_id in expired_sessions:
-            del self.booking_sessions[chat_id]
+    def cleanup_expired_sessions(self, max_age_hours: float = BOOKING_SESSION_MAX_AGE_HOURS) -> int:
+        """만료된 예약 세션/슬롯 hold 정리 (삭제된 예약 세션 수 반환)"""
+        removed = self.repository.delete_booking_sessions_before(datetime.now() - timedelta(hours=max_age_hours))
+        self.repository.purge_expired_holds()
+        return removed
+    
+    def count_booking_sessions(self) -> int:
+        """진행 중인 예약 세션 수"""
+        return self.repository.count_booking_sessions()
+    
+    def close(self) -> None:
+        """저장소 연결 종료"""
+        self.repository.close()
     
     def _add_sample_appointment(self) -> None:
-        """샘플 예약 추가"""
+        """샘플 예약 추가 (영속 저장소에 이미 있으면 생략)"""
+        if self.repository.get("SAMPLE001") is not None:
+            return
         sample_appointment = AppointmentRequest(
             appointment_id="SAMPLE001",
             patient_name="홍길동",
             phone_number="010-1234-1234",
-            preferred_date="12월 12일",
+            preferred_date="2025-12-12",
             preferred_time="15:00",
             department="외과",
             consultation_summary="샘플 예약입니다.",
             status=AppointmentStatus.CONFIRMED
         )
-        self.appointments.append(sample_appointment)
+        self.repository.add(sample_appointment)
 
 # 전역 서비스 인스턴스
 appointment_service = AppointmentService()
@@ -0,0 +1,119 @@
+import os
+import re
+import json
+from datetime import date, datetime
+from typing import Optional
+from pydantic import BaseModel, Field, PrivateAttr
+from services.appointment_repository import SLOT_MINUTES, SLOTS_PER_DAY, is_slot_date, slot_index
+
+# 진료과별 일정 JSON ({"default": {...}, "소화기내과": {...}}), 없으면 기본 일정 사용
+DEPARTMENT_SCHEDULES_PATH = os.environ.get("DEPARTMENT_SCHEDULES_PATH")
+
+# 진료과 이름 형식 (진료과별 설정이 없을 때 허용하는 이름)
+_DEPARTMENT_NAME = re.compile(r"[가-힣]+과")
+
+# 기본 진료 시간: 평일 09:00-12:00, 14:00-17:00 / 토요일 오전 (0=월 ... 6=일)
+DEFAULT_OPENING_HOURS = {
+    **{weekday: [("09:00", "12:00"), ("14:00", "17:00")] for weekday in range(5)},
+    5: [("09:00", "12:00")]
+}
+
+
+class DepartmentSchedule(BaseModel):
+    """진료과 진료 일정 (요일별 진료 시간, 휴진일, 슬롯 길이)"""
+    department: str = Field(..., description="진료과")
+    slot_minutes: int = Field(default=SLOT_MINUTES, description="예약 슬롯 길이 (분, 30의 배수)")
+    opening_hours: dict[int, list[tuple[str, str]]] = Field(
+        default_factory=lambda: dict(DEFAULT_OPENING_HOURS),
+        description="요일(0=월) → [(시작 HH:MM, 종료 HH:MM)]"
+    )
+    holidays: set[str] = Field(default_factory=set, description="휴진일 (YYYY-MM-DD)")
+
+    # 요일별 예약 시작 가능 슬롯 비트맵 (생성 시 미리 계산)
+    _weekday_masks: list[int] = PrivateAttr(default_factory=list)
+
+    def model_post_init(self, __context) -> None:
+        if self.slot_minutes <= 0 or self.slot_minutes % SLOT_MINUTES:
+            raise ValueError(f"slot_minutes must be a multiple of {SLOT_MINUTES}: {self.slot_minutes}")
+        self._weekday_masks = [self._hours_to_mask(self.opening_hours.get(weekday, [])) for weekday in range(7)]
+
+    def _hours_to_mask(self, hours: list[tuple[str, str]]) -> int:
+        """진료 시간대 → 슬롯 시작 비트맵 (종료 시각 전에 끝나는 슬롯만)"""
+        step = self.slot_minutes // SLOT_MINUTES
+        mask = 0
+        for start, end in hours:
+            first, last = slot_index(start), slot_index(end) if end != "24:00" else SLOTS_PER_DAY
+            if first is None or last is None:
+                raise ValueError(f"Invalid opening hours for {self.department}: {start}-{end}")
+            for index in range(first, last - step + 1, step):
+                mask |= 1 << index
+        return mask
+
+    def open_mask(self, day: str, now: Optional[datetime] = None) -> int:
+        """해당 날짜(YYYY-MM-DD)의 예약 가능 슬롯 비트맵 (휴진일/지난 시간 제외)"""
+        if day in self.holidays:
+            return 0
+        try:
+            parsed = date.fromisoformat(day)
+        except (TypeError, ValueError):
+            return 0
+        mask = self._weekday_masks[parsed.weekday()]
+        if now is not None:
+            today = now.date()
+            if parsed < today:
+                return 0
+            if parsed == today:
+                # 이미 시작된 슬롯 제외
+                started = (now.hour * 60 + now.minute) // SLOT_MINUTES + 1
+                mask &= ~((1 << started) - 1)
+        return mask
+
+    def is_open(self, day: str, time_str: str, now: Optional[datetime] = None) -> bool:
+        """해당 날짜·시간이 예약 가능한 슬롯인지 (YYYY-MM-DD / HH:MM 형식이 아니면 False)"""
+        index = slot_index(time_str)
+        if index is None or not is_slot_date(day):
+            return False
+        return bool(self.open_mask(day, now) >> index & 1)
+
+
+class DepartmentSchedules:
+    """진료과 → 진료 일정 (등록되지 않은 진료과는 기본 일정)"""
+
+    def __init__(self, schedules: Optional[dict[str, DepartmentSchedule]] = None, default: Optional[DepartmentSchedule] = None):
+        self.schedules = schedules or {}
+        self.default = default or DepartmentSchedule(department="default")
+
+    def get(self, department: Optional[str]) -> DepartmentSchedule:
+        return self.schedules.get(department, self.default)
+
+    def knows(self, department: Optional[str]) -> bool:
+        """조회 가능한 진료과인지 (진료과별 설정이 있으면 설정된 진료과만, 없으면 '…과' 형식 이름)"""
+        if self.schedules:
+            return department in self.schedules
+        return bool(department) and _DEPARTMENT_NAME.fullmatch(department) is not None
+
+    @classmethod
+    def from_config(cls, config: dict) -> "DepartmentSchedules":
+        """{"default": {...}, "<진료과>": {...}} 형식 설정에서 생성"""
+        default_config = config.get("default", {})
+        default = DepartmentSchedule(**{**default_config, "department": "default"})
+        schedules = {
+            # 병원 전체 휴진일(default)은 진료과 휴진일과 합침
+            department: DepartmentSchedule(**{
+                **default_config,
+                **settings,
+                "department": department,
+                "holidays": set(default_config.get("holidays", ())) | set(settings.get("holidays", ()))
+            })
+            for department, settings in config.items()
+            if department != "default"
+        }
+        return cls(schedules, default)
+
+
+def load_department_schedules(path: Optional[str] = DEPARTMENT_SCHEDULES_PATH) -> DepartmentSchedules:
+    """DEPARTMENT_SCHEDULES_PATH의 일정 설정 로드 (미설정 시 기본 일정)"""
+    if not path:
+        return DepartmentSchedules()
+    with open(path, encoding="utf-8") as f:
+        return DepartmentSchedules.from_config(json.load(f))
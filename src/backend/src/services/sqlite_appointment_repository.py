@@ -0,0 +1,338 @@
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, List, Optional
+from models.appointment import AppointmentRequest, AppointmentStatus, BookingInfo
+from services.appointment_repository import (
+    APPOINTMENT_HOLD_SECONDS, OCCUPYING_STATUSES, SlotUnavailableError, is_slot_date, slot_index, slots_to_mask
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS appointments (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    appointment_id TEXT NOT NULL UNIQUE,
+    department TEXT NOT NULL,
+    preferred_date TEXT NOT NULL,
+    preferred_time TEXT NOT NULL,
+    phone_number TEXT NOT NULL,
+    status TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_appointments_department_date ON appointments(department, preferred_date);
+CREATE INDEX IF NOT EXISTS idx_appointments_phone ON appointments(phone_number);
+CREATE INDEX IF NOT EXISTS idx_appointments_department_seq ON appointments(department, seq);
+CREATE INDEX IF NOT EXISTS idx_appointments_status_seq ON appointments(status, seq);
+CREATE INDEX IF NOT EXISTS idx_appointments_date ON appointments(preferred_date);
+CREATE TABLE IF NOT EXISTS day_slots (
+    department TEXT NOT NULL,
+    preferred_date TEXT NOT NULL,
+    mask INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (department, preferred_date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS booking_sessions (
+    chat_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_booking_sessions_created_at ON booking_sessions(created_at);
+CREATE TABLE IF NOT EXISTS slot_holds (
+    department TEXT NOT NULL,
+    preferred_date TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    holder TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (department, preferred_date, slot)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_slot_holds_holder ON slot_holds(holder);
+CREATE INDEX IF NOT EXISTS idx_slot_holds_expires_at ON slot_holds(expires_at);
+"""
+
+_INSERT_APPOINTMENT = (
+    "INSERT INTO appointments (appointment_id, department, preferred_date, preferred_time, phone_number, status, data) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_OCCUPY_SLOT = (
+    "INSERT INTO day_slots (department, preferred_date, mask) VALUES (?, ?, ?) "
+    "ON CONFLICT (department, preferred_date) DO UPDATE SET mask = mask | excluded.mask"
+)
+# Compare-and-set on the day's slot bitmap: matches no row once the bit is taken
+_CLAIM_SLOT = (
+    "UPDATE day_slots SET mask = mask | ? "
+    "WHERE department = ? AND preferred_date = ? AND mask & ? = 0"
+)
+_PAGE_SIZE = 500
+
+
+class SQLiteAppointmentRepository:
+    """SQLite(WAL) 기반 예약/예약 세션 저장소 (InMemoryAppointmentRepository와 동일 인터페이스)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        # Autocommit mode; multi-statement writes use explicit transactions
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, cached_statements=256)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _row_to_appointment(data: str, status: str) -> AppointmentRequest:
+        appointment = AppointmentRequest.model_validate_json(data)
+        appointment.status = AppointmentStatus(status)
+        return appointment
+
+    def next_appointment_id(self) -> str:
+        """단조 증가 예약번호 (여러 프로세스가 같은 DB를 써도 중복되지 않음)"""
+        rows = self._query(
+            "INSERT INTO counters (name, value) VALUES ('appointment', 1) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + 1 RETURNING value"
+        )
+        return f"APT{rows[0][0]:06d}"
+
+    def add(self, appointment: AppointmentRequest, booking_chat_id: Optional[str] = None) -> None:
+        """예약 저장 (예약 세션 종료와 같은 트랜잭션)"""
+        with self._transaction() as conn:
+            self._insert(conn, appointment)
+            if booking_chat_id is not None:
+                conn.execute("DELETE FROM booking_sessions WHERE chat_id = ?", (booking_chat_id,))
+
+    def claim(self, appointment: AppointmentRequest, holder: Optional[str] = None, booking_chat_id: Optional[str] = None) -> None:
+        """슬롯 확인과 예약 저장을 원자적으로 수행 (점유/타인 hold/YYYY-MM-DD·HH:MM이 아닌 슬롯은 SlotUnavailableError)"""
+        if appointment.status not in OCCUPYING_STATUSES:
+            self.add(appointment, booking_chat_id=booking_chat_id)
+            return
+
+        department, date = appointment.department, appointment.preferred_date
+        index = slot_index(appointment.preferred_time)
+        if index is None or not is_slot_date(date):
+            raise SlotUnavailableError(department, date, appointment.preferred_time)
+        bit = 1 << index
+        with self._transaction() as conn:
+            held_by_other = conn.execute(
+                "SELECT 1 FROM slot_holds WHERE department = ? AND preferred_date = ? AND slot = ? "
+                "AND holder IS NOT ? AND expires_at > ?",
+                (department, date, index, holder, time.time())
+            ).fetchone()
+            claimed = not held_by_other and (
+                conn.execute(_CLAIM_SLOT, (bit, department, date, bit)).rowcount or
+                conn.execute(
+                    "INSERT INTO day_slots (department, preferred_date, mask) VALUES (?, ?, ?) ON CONFLICT DO NOTHING",
+                    (department, date, bit)
+                ).rowcount
+            )
+            if not claimed:
+                raise SlotUnavailableError(department, date, appointment.preferred_time)
+            self._insert(conn, appointment, occupy=False)
+            if booking_chat_id is not None:
+                conn.execute("DELETE FROM booking_sessions WHERE chat_id = ?", (booking_chat_id,))
+            if holder is not None:
+                conn.execute("DELETE FROM slot_holds WHERE holder = ?", (holder,))
+
+    def try_hold(self, department: str, date: str, time_str: str, holder: str, ttl: float = APPOINTMENT_HOLD_SECONDS) -> bool:
+        """확인 대기 동안 슬롯 임시 점유 (이미 예약/타인 hold/형식 오류 시 False, holder의 이전 hold는 해제)"""
+        index = slot_index(time_str)
+        if index is None or not is_slot_date(date):
+            return False
+        now = time.time()
+        with self._transaction() as conn:
+            if self.occupied_mask(department, date) >> index & 1:
+                return False
+            hold = conn.execute(
+                "SELECT holder, expires_at FROM slot_holds WHERE department = ? AND preferred_date = ? AND slot = ?",
+                (department, date, index)
+            ).fetchone()
+            if hold is not None and hold[0] != holder and hold[1] > now:
+                return False
+            conn.execute("DELETE FROM slot_holds WHERE holder = ?", (holder,))
+            conn.execute(
+                "INSERT INTO slot_holds (department, preferred_date, slot, holder, expires_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (department, preferred_date, slot) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at",
+                (department, date, index, holder, now + ttl)
+            )
+            return True
+
+    def release_hold(self, holder: str) -> None:
+        self._query("DELETE FROM slot_holds WHERE holder = ?", (holder,))
+
+    def held_mask(self, department: str, date: str, exclude_holder: Optional[str] = None) -> int:
+        """유효한 hold 슬롯 비트맵 (exclude_holder의 hold 제외)"""
+        rows = self._query(
+            "SELECT slot FROM slot_holds WHERE department = ? AND preferred_date = ? AND expires_at > ? AND holder IS NOT ?",
+            (department, date, time.time(), exclude_holder)
+        )
+        mask = 0
+        for (index,) in rows:
+            mask |= 1 << index
+        return mask
+
+    def purge_expired_holds(self) -> int:
+        """만료된 hold 정리"""
+        return len(self._query("DELETE FROM slot_holds WHERE expires_at <= ? RETURNING holder", (time.time(),)))
+
+    @staticmethod
+    def _appointment_params(appointment: AppointmentRequest) -> tuple:
+        return (
+            appointment.appointment_id,
+            appointment.department,
+            appointment.preferred_date,
+            appointment.preferred_time,
+            appointment.phone_number,
+            appointment.status.value,
+            appointment.model_dump_json()
+        )
+
+    def _insert(self, conn: sqlite3.Connection, appointment: AppointmentRequest, occupy: bool = True) -> None:
+        try:
+            conn.execute(_INSERT_APPOINTMENT, self._appointment_params(appointment))
+        except sqlite3.IntegrityError as e:
+            raise ValueError(f"Duplicate appointment ID: {appointment.appointment_id}") from e
+        if occupy and appointment.status in OCCUPYING_STATUSES:
+            mask = slots_to_mask([appointment.preferred_time])
+            if mask:
+                conn.execute(_OCCUPY_SLOT, (appointment.department, appointment.preferred_date, mask))
+
+    def get(self, appointment_id: str) -> Optional[AppointmentRequest]:
+        rows = self._query("SELECT data, status FROM appointments WHERE appointment_id = ?", (appointment_id,))
+        return self._row_to_appointment(*rows[0]) if rows else None
+
+    def find_by_phone(self, phone_number: str) -> List[AppointmentRequest]:
+        rows = self._query(
+            "SELECT data, status FROM appointments WHERE phone_number = ? ORDER BY appointment_id", (phone_number,)
+        )
+        return [self._row_to_appointment(*row) for row in rows]
+
+    def find_by_department_date(self, department: str, date: str) -> List[AppointmentRequest]:
+        rows = self._query(
+            "SELECT data, status FROM appointments WHERE department = ? AND preferred_date = ? ORDER BY appointment_id",
+            (department, date)
+        )
+        return [self._row_to_appointment(*row) for row in rows]
+
+    def update_status(self, appointment_id: str, status: AppointmentStatus) -> bool:
+        """예약 상태 변경 (일별 슬롯 비트맵 재계산)"""
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT department, preferred_date FROM appointments WHERE appointment_id = ?", (appointment_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            conn.execute("UPDATE appointments SET status = ? WHERE appointment_id = ?", (status.value, appointment_id))
+            self._recompute_day_mask(conn, *row)
+            return True
+
+    def _recompute_day_mask(self, conn: sqlite3.Connection, department: str, date: str) -> None:
+        times = [row[0] for row in conn.execute(
+            "SELECT preferred_time FROM appointments WHERE department = ? AND preferred_date = ? AND status IN ({})".format(
+                ", ".join("?" for _ in OCCUPYING_STATUSES)),
+            (department, date, *[s.value for s in OCCUPYING_STATUSES])
+        )]
+        conn.execute(
+            "INSERT INTO day_slots (department, preferred_date, mask) VALUES (?, ?, ?) "
+            "ON CONFLICT (department, preferred_date) DO UPDATE SET mask = excluded.mask",
+            (department, date, slots_to_mask(times))
+        )
+
+    def occupied_mask(self, department: str, date: str) -> int:
+        """해당 진료과·날짜의 점유 슬롯 비트맵"""
+        rows = self._query(
+            "SELECT mask FROM day_slots WHERE department = ? AND preferred_date = ?", (department, date)
+        )
+        return rows[0][0] if rows else 0
+
+    def is_slot_free(self, department: str, date: str, time_str: str) -> bool:
+        """비어 있는 슬롯인지 (YYYY-MM-DD / HH:MM 형식이 아니면 False)"""
+        index = slot_index(time_str)
+        if index is None or not is_slot_date(date):
+            return False
+        return not self.occupied_mask(department, date) >> index & 1
+
+    def iter_appointments(self) -> Iterator[AppointmentRequest]:
+        """등록 순 순회 (페이지 단위로 읽어 전체 테이블을 메모리에 올리지 않음)"""
+        cursor = None
+        while True:
+            page, cursor = self.list_page(cursor, _PAGE_SIZE)
+            yield from page
+            if cursor is None:
+                return
+
+    def list_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        department: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        status: Optional[AppointmentStatus] = None
+    ) -> tuple[List[AppointmentRequest], Optional[str]]:
+        """등록 순 페이지 조회 (cursor: 이전 페이지의 next_cursor, 진료과/날짜 범위/상태 필터)"""
+        conditions, params = ["seq > ?"], [int(cursor) if cursor else 0]
+        for condition, value in (
+            ("department = ?", department),
+            ("preferred_date >= ?", date_from),
+            ("preferred_date <= ?", date_to),
+            ("status = ?", status.value if status is not None else None)
+        ):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        rows = self._query(
+            f"SELECT seq, data, status FROM appointments WHERE {' AND '.join(conditions)} ORDER BY seq LIMIT ?",
+            (*params, limit + 1)
+        )
+        next_cursor = str(rows[limit - 1][0]) if len(rows) > limit else None
+        return [self._row_to_appointment(data, status) for _, data, status in rows[:limit]], next_cursor
+
+    def count(self) -> int:
+        return self._query("SELECT COUNT(*) FROM appointments")[0][0]
+
+    # 예약 세션 (chat_id → BookingInfo)
+
+    def save_booking_session(self, chat_id: str, booking_info: BookingInfo) -> None:
+        self._query(
+            "INSERT INTO booking_sessions (chat_id, data, created_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (chat_id) DO UPDATE SET data = excluded.data",
+            (chat_id, booking_info.model_dump_json(), booking_info.created_at.isoformat())
+        )
+
+    def get_booking_session(self, chat_id: str) -> Optional[BookingInfo]:
+        rows = self._query("SELECT data FROM booking_sessions WHERE chat_id = ?", (chat_id,))
+        return BookingInfo.model_validate_json(rows[0][0]) if rows else None
+
+    def delete_booking_session(self, chat_id: str) -> None:
+        self._query("DELETE FROM booking_sessions WHERE chat_id = ?", (chat_id,))
+
+    def delete_booking_sessions_before(self, cutoff: datetime) -> int:
+        """cutoff 이전에 시작된 예약 세션 삭제"""
+        rows = self._query(
+            "DELETE FROM booking_sessions WHERE created_at < ? RETURNING chat_id", (cutoff.isoformat(),)
+        )
+        return len(rows)
+
+    def count_booking_sessions(self) -> int:
+        return self._query("SELECT COUNT(*) FROM booking_sessions")[0][0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
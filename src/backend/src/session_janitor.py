@@ -0,0 +1,157 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import time
+import asyncio
+import inspect
+import logging
+from typing import Any, Callable, Optional
+
+"""
+Background expiry of per-session state.
+
+Session transcripts, in-progress booking sessions, slot holds and PII
+redaction mappings are only released when a conversation ends cleanly.
+The janitor sweeps them on a schedule for the lifetime of the app; each
+sweep is expected to use a time-ordered index so its cost is
+proportional to what expires, not to what is alive.
+"""
+
+_logger = logging.getLogger(__name__)
+
+JANITOR_INTERVAL_SECONDS = float(os.environ.get("JANITOR_INTERVAL_SECONDS", "60"))
+
+
+async def _call(
+    func: Callable[[], Any],
+    blocking: bool
+) -> Any:
+    """
+    Await coroutine functions, run blocking ones off the event loop.
+    """
+    if inspect.iscoroutinefunction(func):
+        return await func()
+    if blocking:
+        return await asyncio.to_thread(func)
+    return func()
+
+
+def process_memory_bytes() -> Optional[int]:
+    """
+    Resident set size of this process (Linux /proc), peak RSS elsewhere.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except Exception:
+        return None
+
+
+class SessionJanitor:
+    """
+    Runs registered expiry sweeps periodically and collects gauges.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = JANITOR_INTERVAL_SECONDS
+    ) -> None:
+        self.interval_seconds = interval_seconds
+        self._sweeps: dict[str, tuple[Callable[[], Any], bool]] = {}
+        self._gauges: dict[str, tuple[Callable[[], Any], bool]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.errors = 0
+        self.removed: dict[str, int] = {}
+        self.last_run_at: Optional[float] = None
+        self.last_duration_ms: Optional[float] = None
+
+    def add_sweep(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        blocking: bool = False
+    ) -> None:
+        """
+        Register an expiry sweep returning the number of removed entries.
+
+        Blocking (I/O bound, thread-safe) functions run in a worker thread;
+        others run on the event loop so they never race request handlers.
+        """
+        self._sweeps[name] = (func, blocking)
+        self.removed.setdefault(name, 0)
+
+    def add_gauge(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        blocking: bool = False
+    ) -> None:
+        """
+        Register a gauge (count, size or dict of both) reported by collect_gauges.
+        """
+        self._gauges[name] = (func, blocking)
+
+    async def sweep(self) -> dict[str, int]:
+        """
+        Run all sweeps once; a failing sweep does not stop the others.
+        """
+        start = time.perf_counter()
+        removed = {}
+        for name, (func, blocking) in self._sweeps.items():
+            try:
+                removed[name] = await _call(func, blocking) or 0
+                self.removed[name] += removed[name]
+            except Exception as e:
+                self.errors += 1
+                _logger.error(f"Janitor sweep {name} failed: {e}")
+        self.runs += 1
+        self.last_run_at = time.time()
+        self.last_duration_ms = (time.perf_counter() - start) * 1000
+        return removed
+
+    async def collect_gauges(self) -> dict[str, Any]:
+        gauges = {}
+        for name, (func, blocking) in self._gauges.items():
+            try:
+                gauges[name] = await _call(func, blocking)
+            except Exception as e:
+                _logger.error(f"Janitor gauge {name} failed: {e}")
+                gauges[name] = None
+        return gauges
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            await self.sweep()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def get_stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "running": self._task is not None,
+            "runs": self.runs,
+            "errors": self.errors,
+            "removed": dict(self.removed),
+            "last_run_at": self.last_run_at,
+            "last_duration_ms": self.last_duration_ms
+        }
@@ -0,0 +1,553 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import re
+import sys
+import hmac
+import json
+import time
+import uuid
+import hashlib
+import secrets
+import asyncio
+import sqlite3
+import logging
+import weakref
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from pydantic import BaseModel, Field, PrivateAttr
+from fastapi import Request, Response
+from token_budget import count_message_tokens
+
+"""
+Per-session conversation state store.
+
+Each chat session (identified by the X-Session-Id header or session_id
+cookie) gets its own state record, TTL expiry and a lock so concurrent
+requests of one session are serialized while different sessions run in
+parallel. The SQLite store extends the lock across processes with a
+lease row, so workers/replicas sharing the file do not overwrite each
+other's updates.
+"""
+
+_logger = logging.getLogger(__name__)
+
+SESSION_STORE = os.environ.get("SESSION_STORE", "memory").lower()
+SESSION_STORE_PATH = os.environ.get("SESSION_STORE_PATH", "sessions.db")
+SESSION_TTL_SECONDS = float(os.environ.get("SESSION_TTL_SECONDS", "7200"))
+# Cross-process session lock (SQLite store); renewed while held, so it only bounds how long
+# the lock of a crashed worker blocks the session:
+SESSION_LOCK_LEASE_SECONDS = float(os.environ.get("SESSION_LOCK_LEASE_SECONDS", "120"))
+SESSION_LOCK_POLL_SECONDS = 0.05
+
+# Key of the tags on issued session IDs; shared by all workers/replicas (a random key
+# is used when unset, so IDs are then only accepted by the process that issued them):
+SESSION_SECRET = os.environ.get("SESSION_SECRET", "")
+
+SESSION_HEADER = "X-Session-Id"
+SESSION_COOKIE = "session_id"
+
+_SESSION_ID_PATTERN = re.compile(r"^([0-9a-f]{32})-([0-9a-f]{32})$")
+
+if not SESSION_SECRET:
+    _logger.warning("SESSION_SECRET is not set, session IDs are only valid in this process")
+_session_key = (SESSION_SECRET or secrets.token_hex(32)).encode("utf-8")
+
+
+def _session_tag(
+    nonce: str
+) -> str:
+    return hmac.new(_session_key, nonce.encode("ascii"), hashlib.sha256).hexdigest()[:32]
+
+
+class SessionLeaseLostError(RuntimeError):
+    """
+    The cross-process lock of a session expired while held; another worker may own the session now.
+    """
+
+
+def new_session_id() -> str:
+    """
+    Random session ID tagged with an HMAC, so only IDs issued by the server are accepted.
+    """
+    nonce = uuid.uuid4().hex
+    return f"{nonce}-{_session_tag(nonce)}"
+
+
+def is_valid_session_id(
+    session_id: Optional[str]
+) -> bool:
+    match = _SESSION_ID_PATTERN.match(session_id or "")
+    return bool(match) and hmac.compare_digest(match.group(2), _session_tag(match.group(1)))
+
+
+def get_session_id(
+    request: Request
+) -> str:
+    """
+    Resolve the chat session from the X-Session-Id header or cookie.
+
+    IDs the server did not issue are replaced by a new session, so a
+    client cannot pick (fixate) or guess another user's session ID.
+    """
+    session_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+    return session_id if is_valid_session_id(session_id) else new_session_id()
+
+
+def attach_session(
+    response: Response,
+    session_id: str
+) -> Response:
+    """
+    Return the session ID to the client as header and cookie.
+    """
+    response.headers[SESSION_HEADER] = session_id
+    response.set_cookie(
+        SESSION_COOKIE,
+        session_id,
+        max_age=int(SESSION_TTL_SECONDS),
+        httponly=True,
+        samesite="lax"
+    )
+    return response
+
+
+class ChatMessage(BaseModel):
+    role: str
+    content: str
+
+
+class SessionState(BaseModel):
+    """Conversation state of a single chat session."""
+    session_id: str
+    created_at: float = Field(default_factory=time.time)
+    updated_at: float = Field(default_factory=time.time)
+    turn_count: int = 0
+    history: list[ChatMessage] = Field(default_factory=list)
+    # Rolling summary of turns folded out of history (see token_budget.py):
+    summary: str = ""
+    data: dict = Field(default_factory=dict)
+
+    # Derived views of history, maintained incrementally (not persisted):
+    _prompt_messages: list[dict] = PrivateAttr(default_factory=list)
+    _transcript: str = PrivateAttr(default="")
+    _token_counts: list[int] = PrivateAttr(default_factory=list)
+    _history_tokens: int = PrivateAttr(default=0)
+    _summary_tokens: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context) -> None:
+        for msg in self.history:
+            self._append_views(msg)
+        self._summary_tokens = count_message_tokens(self.summary) if self.summary else 0
+
+    @staticmethod
+    def _prompt_message(msg: ChatMessage) -> dict:
+        role = "assistant" if msg.role.lower() in ["system", "assistant"] else "user"
+        return {"role": role, "content": msg.content}
+
+    @staticmethod
+    def _transcript_line(msg: ChatMessage) -> str:
+        return f"{msg.role}: {msg.content}\n"
+
+    def _append_views(self, msg: ChatMessage) -> None:
+        self._prompt_messages.append(self._prompt_message(msg))
+        self._transcript += self._transcript_line(msg)
+        tokens = count_message_tokens(msg.content)
+        self._token_counts.append(tokens)
+        self._history_tokens += tokens
+
+    def append_message(
+        self,
+        role: str,
+        content: str
+    ) -> None:
+        msg = ChatMessage(role=role, content=content)
+        self.history.append(msg)
+        self._append_views(msg)
+
+    def drop_oldest(
+        self,
+        count: int
+    ) -> None:
+        """
+        Remove the oldest messages from history and its derived views.
+        """
+        for _ in range(min(count, len(self.history))):
+            dropped = self.history.pop(0)
+            self._prompt_messages.pop(0)
+            self._transcript = self._transcript[len(self._transcript_line(dropped)):]
+            self._history_tokens -= self._token_counts.pop(0)
+
+    def set_summary(
+        self,
+        summary: str
+    ) -> None:
+        self.summary = summary
+        self._summary_tokens = count_message_tokens(summary) if summary else 0
+
+    def message_tokens(
+        self,
+        index: int
+    ) -> int:
+        return self._token_counts[index]
+
+    @property
+    def history_tokens(self) -> int:
+        """Token count of summary plus verbatim history."""
+        return self._summary_tokens + self._history_tokens
+
+    @property
+    def prompt_messages(self) -> list[dict]:
+        """History in chat-completion message format (summary first)."""
+        if not self.summary:
+            return self._prompt_messages
+        return [{"role": "system", "content": f"이전 대화 요약:\n{self.summary}"}] + self._prompt_messages
+
+    @property
+    def transcript(self) -> str:
+        """History as "role: content" lines (summary first)."""
+        if not self.summary:
+            return self._transcript
+        return f"summary: {self.summary}\n" + self._transcript
+
+    def last_message(self, role: str) -> str:
+        for msg in reversed(self.history):
+            if msg.role == role:
+                return msg.content
+        return ""
+
+
+class SessionStore(ABC):
+    """
+    Base session store: TTL handling and per-session locks.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = SESSION_TTL_SECONDS
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        # Locks live as long as a request holds them:
+        self._locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
+
+    @asynccontextmanager
+    async def lock(
+        self,
+        session_id: str
+    ) -> AsyncIterator[None]:
+        """
+        Hold the lock serializing requests of one session (async with store.lock(id): ...).
+        """
+        session_lock = self._locks.get(session_id)
+        if session_lock is None:
+            session_lock = asyncio.Lock()
+            self._locks[session_id] = session_lock
+        async with session_lock:
+            await self._acquire_lease(session_id)
+            try:
+                yield
+            finally:
+                await self._release_lease(session_id)
+
+    async def _acquire_lease(
+        self,
+        session_id: str
+    ) -> None:
+        """
+        Exclude other processes from the session (process-local stores: nothing to do).
+        """
+
+    async def _release_lease(
+        self,
+        session_id: str
+    ) -> None:
+        pass
+
+    def _is_expired(
+        self,
+        state: SessionState,
+        now: float = None
+    ) -> bool:
+        return (now or time.time()) - state.updated_at > self.ttl_seconds
+
+    async def get_or_create(
+        self,
+        session_id: str
+    ) -> SessionState:
+        state = await self.get(session_id)
+        if state is None:
+            state = SessionState(session_id=session_id)
+        return state
+
+    @abstractmethod
+    async def get(
+        self,
+        session_id: str
+    ) -> Optional[SessionState]:
+        ...
+
+    @abstractmethod
+    async def save(
+        self,
+        state: SessionState
+    ) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(
+        self,
+        session_id: str
+    ) -> None:
+        ...
+
+    @abstractmethod
+    async def purge_expired(self) -> int:
+        ...
+
+    @abstractmethod
+    async def count(self) -> int:
+        ...
+
+    @abstractmethod
+    async def memory_bytes(self) -> int:
+        """
+        Approximate storage footprint of the live sessions.
+        """
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Process-local session store.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = SESSION_TTL_SECONDS
+    ) -> None:
+        super().__init__(ttl_seconds)
+        # Least recently saved first, so expiry only looks at the head:
+        self._sessions: OrderedDict[str, SessionState] = OrderedDict()
+
+    async def get(
+        self,
+        session_id: str
+    ) -> Optional[SessionState]:
+        state = self._sessions.get(session_id)
+        if state is None:
+            return None
+        if self._is_expired(state):
+            self._sessions.pop(session_id, None)
+            return None
+        return state.model_copy(deep=True)
+
+    async def save(
+        self,
+        state: SessionState
+    ) -> None:
+        state.updated_at = time.time()
+        self._sessions[state.session_id] = state.model_copy(deep=True)
+        self._sessions.move_to_end(state.session_id)
+
+    async def delete(
+        self,
+        session_id: str
+    ) -> None:
+        self._sessions.pop(session_id, None)
+
+    async def purge_expired(self) -> int:
+        now = time.time()
+        removed = 0
+        while self._sessions:
+            session_id, state = next(iter(self._sessions.items()))
+            if not self._is_expired(state, now):
+                break
+            del self._sessions[session_id]
+            removed += 1
+        return removed
+
+    async def count(self) -> int:
+        return len(self._sessions)
+
+    async def memory_bytes(self) -> int:
+        return sum(
+            sys.getsizeof(state.summary) + sum(sys.getsizeof(message.content) for message in state.history)
+            for state in self._sessions.values()
+        )
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite-backed session store, shared by all workers/replicas using the same file.
+
+    Requests of one session are serialized across processes by a lease row
+    (session_leases) taken on lock() and renewed while it is held; a lease
+    left by a crashed worker expires after lease_seconds. If a lease could
+    not be renewed in time, saving that session raises SessionLeaseLostError
+    instead of overwriting the new owner's updates.
+    """
+
+    def __init__(
+        self,
+        path: str = SESSION_STORE_PATH,
+        ttl_seconds: float = SESSION_TTL_SECONDS,
+        lease_seconds: float = SESSION_LOCK_LEASE_SECONDS
+    ) -> None:
+        super().__init__(ttl_seconds)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        # Lease owner; requests within this process are already serialized by the asyncio lock
+        self._owner = uuid.uuid4().hex
+        # Renewal task per held lease, and sessions whose lease was lost while held:
+        self._renewals: dict[str, asyncio.Task] = {}
+        self._lost_leases: set[str] = set()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY,"
+            " state TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions(updated_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_leases ("
+            " session_id TEXT PRIMARY KEY,"
+            " owner TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        # sqlite3 connections are not safe for concurrent use from several threads:
+        self._db_lock = asyncio.Lock()
+
+    async def _execute(
+        self,
+        sql: str,
+        params: tuple = ()
+    ) -> list:
+        async with self._db_lock:
+            return await asyncio.to_thread(lambda: self._conn.execute(sql, params).fetchall())
+
+    async def _acquire_lease(
+        self,
+        session_id: str
+    ) -> None:
+        while True:
+            now = time.time()
+            # Insert, or take over an expired lease; no row returned while another process holds it
+            rows = await self._execute(
+                "INSERT INTO session_leases (session_id, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE session_leases.expires_at <= ? RETURNING owner",
+                (session_id, self._owner, now + self.lease_seconds, now)
+            )
+            if rows:
+                self._renewals[session_id] = asyncio.create_task(self._renew_lease(session_id))
+                return
+            await asyncio.sleep(SESSION_LOCK_POLL_SECONDS)
+
+    async def _renew_lease(
+        self,
+        session_id: str
+    ) -> None:
+        """
+        Extend the lease while the lock is held (long streams, slow retries).
+        """
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            now = time.time()
+            rows = await self._execute(
+                "UPDATE session_leases SET expires_at = ? "
+                "WHERE session_id = ? AND owner = ? AND expires_at > ? RETURNING owner",
+                (now + self.lease_seconds, session_id, self._owner, now)
+            )
+            if not rows:
+                _logger.error(f"Session lease of {session_id} expired while held, its updates will be rejected")
+                self._lost_leases.add(session_id)
+                return
+
+    async def _release_lease(
+        self,
+        session_id: str
+    ) -> None:
+        renewal = self._renewals.pop(session_id, None)
+        if renewal is not None:
+            renewal.cancel()
+        self._lost_leases.discard(session_id)
+        await self._execute(
+            "DELETE FROM session_leases WHERE session_id = ? AND owner = ?",
+            (session_id, self._owner)
+        )
+
+    async def get(
+        self,
+        session_id: str
+    ) -> Optional[SessionState]:
+        rows = await self._execute(
+            "SELECT state FROM sessions WHERE session_id = ? AND updated_at > ?",
+            (session_id, time.time() - self.ttl_seconds)
+        )
+        if not rows:
+            return None
+        return SessionState(**json.loads(rows[0][0]))
+
+    async def save(
+        self,
+        state: SessionState
+    ) -> None:
+        if state.session_id in self._lost_leases:
+            raise SessionLeaseLostError(f"Session lock of {state.session_id} expired, not saving")
+        state.updated_at = time.time()
+        await self._execute(
+            "INSERT INTO sessions (session_id, state, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+            (state.session_id, state.model_dump_json(), state.updated_at)
+        )
+
+    async def delete(
+        self,
+        session_id: str
+    ) -> None:
+        await self._execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    async def purge_expired(self) -> int:
+        rows = await self._execute(
+            "DELETE FROM sessions WHERE updated_at <= ? RETURNING session_id",
+            (time.time() - self.ttl_seconds,)
+        )
+        # Leases left behind by crashed workers:
+        await self._execute("DELETE FROM session_leases WHERE expires_at <= ?", (time.time(),))
+        return len(rows)
+
+    async def count(self) -> int:
+        rows = await self._execute(
+            "SELECT COUNT(*) FROM sessions WHERE updated_at > ?",
+            (time.time() - self.ttl_seconds,)
+        )
+        return rows[0][0]
+
+    async def memory_bytes(self) -> int:
+        rows = await self._execute("SELECT page_count * page_size FROM pragma_page_count(), pragma_page_size()")
+        return rows[0][0]
+
+    async def close(self) -> None:
+        for renewal in self._renewals.values():
+            renewal.cancel()
+        async with self._db_lock:
+            self._conn.close()
+
+
+def create_session_store() -> SessionStore:
+    """
+    Create session store based on settings.
+    """
+    if SESSION_STORE == "sqlite":
+        _logger.info(f"Using SQLite session store: {SESSION_STORE_PATH}")
+        return SQLiteSessionStore()
+    if SESSION_STORE == "memory":
+        return InMemorySessionStore()
+    raise ValueError(f"Unsupported session store: {SESSION_STORE}")
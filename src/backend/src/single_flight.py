@@ -0,0 +1,167 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import json
+import asyncio
+import hashlib
+import threading
+from typing import Any, Awaitable, Callable
+
+"""
+Single-flight coalescing of identical in-flight upstream calls.
+
+When several requests need the same result at the same moment (e.g. the
+same opening complaint sent by many users during a burst), only the first
+caller goes upstream; the others wait for and share its result or error.
+Nothing is cached: the key is forgotten as soon as the call completes.
+"""
+
+SINGLE_FLIGHT_ENABLED = os.environ.get("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+
+def request_key(
+    *parts: Any
+) -> str:
+    """
+    Stable hash of request parts (deployment, messages, query, options).
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _FlightStats:
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    def get_stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "calls": self.calls,
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._flights)
+        }
+
+
+class SingleFlight(_FlightStats):
+    """
+    Coalesces identical in-flight coroutine calls on one event loop.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = SINGLE_FLIGHT_ENABLED
+    ) -> None:
+        super().__init__()
+        self.enabled = enabled
+        # key -> (shared task, number of waiting callers)
+        self._flights: dict[str, list] = {}
+
+    async def do(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Await func() once per key at a time and share its outcome.
+
+        The upstream call is cancelled only when every waiter has been
+        cancelled (e.g. all speculative retrievals were discarded).
+        """
+        self.calls += 1
+        if not self.enabled:
+            self.upstream_calls += 1
+            return await func()
+
+        flight = self._flights.get(key)
+        if flight is None:
+            self.upstream_calls += 1
+            task = asyncio.ensure_future(func())
+            flight = self._flights[key] = [task, 0]
+
+            def forget(_, flight=flight):
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            task.add_done_callback(forget)
+        else:
+            self.coalesced += 1
+
+        task = flight[0]
+        flight[1] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and flight[1] == 1:
+                task.cancel()
+            raise
+        finally:
+            flight[1] -= 1
+
+
+class _Call:
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SyncSingleFlight(_FlightStats):
+    """
+    Coalesces identical in-flight blocking calls across threads.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = SINGLE_FLIGHT_ENABLED
+    ) -> None:
+        super().__init__()
+        self.enabled = enabled
+        self._flights: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(
+        self,
+        key: str,
+        func: Callable[[], Any]
+    ) -> Any:
+        """
+        Run func() once per key at a time and share its outcome.
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._flights.get(key) if self.enabled else None
+            leader = call is None
+            if leader:
+                self.upstream_calls += 1
+                call = _Call()
+                if self.enabled:
+                    self._flights[key] = call
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is call:
+                    del self._flights[key]
+            call.done.set()
+
+
+# Shared by all clients (keys include endpoint and deployment / index):
+single_flight = SingleFlight()
+sync_single_flight = SyncSingleFlight()
@@ -0,0 +1,57 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+import random
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aho_corasick import AhoCorasickReplacer
+
+"""
+Unit tests for single-pass multi-pattern replacement.
+
+cd src/backend/src/
+pytest test/test_aho_corasick.py -v
+"""
+
+
+def _reference_replace(text, replacements):
+    """Leftmost-longest replacement by trying every pattern at each position."""
+    patterns = sorted(replacements, key=len, reverse=True)
+    parts, i = [], 0
+    while i < len(text):
+        for pattern in patterns:
+            if text.startswith(pattern, i):
+                parts.append(replacements[pattern])
+                i += len(pattern)
+                break
+        else:
+            parts.append(text[i])
+            i += 1
+    return "".join(parts)
+
+
+def test_longest_match_wins_over_substring():
+    replacer = AhoCorasickReplacer({"김철": "{PII_PERSON_1}", "김철수": "{PII_PERSON_2}"})
+    assert replacer.replace("김철수 환자와 김철 보호자") == "{PII_PERSON_2} 환자와 {PII_PERSON_1} 보호자"
+    assert replacer.find("김철수") == [(0, 3, "김철수")]
+
+
+def test_replacements_are_not_rescanned():
+    # 치환 결과가 다른 패턴을 포함해도 다시 치환되지 않음
+    replacer = AhoCorasickReplacer({"a": "b", "b": "c"})
+    assert replacer.replace("ab") == "bc"
+    assert AhoCorasickReplacer({}).replace("텍스트") == "텍스트"
+    assert AhoCorasickReplacer({"": "x"}).replace("텍스트") == "텍스트"
+
+
+def test_matches_reference_on_random_inputs():
+    rng = random.Random(7)
+    for _ in range(500):
+        replacements = {
+            "".join(rng.choice("abc") for _ in range(rng.randint(1, 4))): str(i)
+            for i in range(rng.randint(1, 6))
+        }
+        text = "".join(rng.choice("abc") for _ in range(rng.randint(0, 40)))
+        assert AhoCorasickReplacer(replacements).replace(text) == _reference_replace(text, replacements)
@@ -0,0 +1,87 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+import time
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from answer_cache import SemanticAnswerCache, create_answer_cache, is_first_turn
+
+"""
+Unit tests for the semantic answer cache.
+
+cd src/backend/src/
+pytest test/test_answer_cache.py -v
+"""
+
+EMBEDDINGS = {
+    "배가 아파요": [1.0, 0.0, 0.0],
+    "배가 너무 아파요": [0.99, 0.1, 0.0],
+    "가슴이 답답해요": [0.0, 1.0, 0.0],
+}
+
+
+async def fake_embed(text: str) -> list[float]:
+    return EMBEDDINGS[text]
+
+
+def lookup(cache: SemanticAnswerCache, query: str):
+    return asyncio.run(cache.lookup(query))[1]
+
+
+def test_similar_question_hits():
+    cache = SemanticAnswerCache(fake_embed, similarity_threshold=0.95)
+    cache.put("배가 아파요", asyncio.run(cache.embed("배가 아파요")), "복통 상담 답변")
+
+    assert lookup(cache, "배가 너무 아파요") == "복통 상담 답변"
+    assert lookup(cache, "가슴이 답답해요") is None
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_ttl_and_size_cap():
+    cache = SemanticAnswerCache(fake_embed, max_entries=1, ttl_seconds=0.01)
+    cache.put("배가 아파요", asyncio.run(cache.embed("배가 아파요")), "복통")
+    cache.put("가슴이 답답해요", asyncio.run(cache.embed("가슴이 답답해요")), "흉통")
+    assert cache.get_stats()["evictions"] == 1
+
+    time.sleep(0.02)
+    assert lookup(cache, "가슴이 답답해요") is None
+
+
+def test_first_turn_detection():
+    class Message:
+        def __init__(self, content):
+            self.content = content
+
+    assert is_first_turn([])
+    assert is_first_turn([Message("")])
+    assert not is_first_turn([Message("배가 아파요")])
+    assert not is_first_turn([{"role": "user", "content": "배가 아파요"}])
+
+
+def test_disabled_with_pii_redaction():
+    factory_calls = []
+
+    def embed_factory():
+        factory_calls.append(1)
+        return fake_embed
+
+    # 원문 질문이 임베딩되거나 세션 간 공유되지 않도록 PII 사용 시 캐시 미생성
+    assert create_answer_cache(embed_factory, enabled=True, pii_enabled=True) is None
+    assert create_answer_cache(embed_factory, enabled=False) is None
+    assert not factory_calls
+    assert isinstance(create_answer_cache(embed_factory, enabled=True), SemanticAnswerCache)
+    assert factory_calls == [1]
+
+
+def test_embedding_failure_bypasses_cache():
+    async def failing_embed(text: str) -> list[float]:
+        raise RuntimeError("embedding deployment throttled")
+
+    cache = SemanticAnswerCache(failing_embed)
+    # 임베딩 실패 시 예외 대신 캐시 없이 일반 답변 경로로 진행
+    assert asyncio.run(cache.lookup("배가 아파요")) == (None, None)
+    assert cache.get_stats()["embed_failures"] == 1
+    assert cache.get_stats()["misses"] == 0
@@ -0,0 +1,158 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+import asyncio
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import pytest
+import openai
+import aoai_balancer
+from aoai_balancer import AOAIBalancer, DeploymentTarget, DeploymentsThrottledError, create_aoai_balancer
+from retry_policy import ErrorClass, classify, retry_after
+
+"""
+Unit tests for token-headroom load balancing over AOAI deployments.
+
+cd src/backend/src/
+pytest test/test_aoai_balancer.py -v
+"""
+
+
+def _throttled(seconds: str) -> openai.APIStatusError:
+    request = httpx.Request("POST", "https://example.openai.azure.com/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": seconds}, request=request)
+    return openai.APIStatusError("rate limited", response=response, body=None)
+
+
+class FakeClient:
+    """
+    Stands in for AsyncAzureOpenAI: records deployments, replays outcomes.
+    """
+
+    def __init__(self, outcomes: dict = None):
+        self.calls = []
+        self.outcomes = outcomes or {}
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs["model"])
+        outcome = self.outcomes.get(kwargs["model"])
+        if isinstance(outcome, Exception):
+            raise outcome
+        if kwargs.get("stream"):
+            return self._stream()
+        return SimpleNamespace(usage=SimpleNamespace(total_tokens=outcome or 100), choices=[])
+
+    async def _stream(self):
+        for text in ("안녕", "하세요"):
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(aoai_balancer.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _balancer(client, **tpm) -> AOAIBalancer:
+    return AOAIBalancer([
+        DeploymentTarget("https://a", name, client, tpm=quota, window_seconds=60)
+        for name, quota in tpm.items()
+    ])
+
+
+def test_routes_to_most_headroom_and_window_expires(clock):
+    client = FakeClient({"big": 5000, "small": 100})
+    balancer = _balancer(client, big=10000, small=4000)
+    kwargs = {"messages": [{"role": "user", "content": "두통"}]}
+
+    asyncio.run(balancer.create_completion(kwargs))
+    assert client.calls == ["big"]
+    # big: 5000 남음, small: 4000 남음
+    asyncio.run(balancer.create_completion(kwargs))
+    assert client.calls == ["big", "big"]
+    asyncio.run(balancer.create_completion(kwargs))
+    assert client.calls[-1] == "small"
+
+    clock[0] += 61
+    assert balancer.get_stats()["deployments"][0]["window_tokens"] == 0
+    asyncio.run(balancer.create_completion(kwargs))
+    assert client.calls[-1] == "big"
+
+
+def test_in_flight_reservations_spread_a_burst(clock):
+    balancer = _balancer(FakeClient(), a=1000, b=1000)
+    first = balancer.acquire(600)
+    second = balancer.acquire(600)
+    assert first.target is not second.target
+    first.complete(None)
+    second.release()
+    stats = {target["deployment"]: target for target in balancer.get_stats()["deployments"]}
+    assert stats[first.target.deployment]["window_tokens"] == 600
+    assert stats[second.target.deployment]["window_tokens"] == 0
+    assert all(target["reserved_tokens"] == 0 for target in stats.values())
+
+
+def test_throttled_deployment_fails_over_and_cools_down(clock):
+    client = FakeClient({"primary": _throttled("20")})
+    balancer = _balancer(client, primary=100000, backup=1000)
+
+    response = asyncio.run(balancer.create_completion({"messages": []}))
+    assert response.usage.total_tokens == 100
+    assert client.calls == ["primary", "backup"]
+    assert balancer.failovers == 1
+
+    # 냉각 중에는 primary로 보내지 않음
+    asyncio.run(balancer.create_completion({"messages": []}))
+    assert client.calls[-1] == "backup"
+
+    clock[0] += 21
+    client.outcomes.clear()
+    asyncio.run(balancer.create_completion({"messages": []}))
+    assert client.calls[-1] == "primary"
+
+
+def test_all_throttled_surfaces_retryable_error(clock):
+    client = FakeClient({"a": _throttled("5"), "b": _throttled("8")})
+    balancer = _balancer(client, a=1000, b=1000)
+
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(balancer.create_completion({"messages": []}))
+    with pytest.raises(DeploymentsThrottledError) as error:
+        balancer.acquire(10)
+    assert classify(error.value) == ErrorClass.THROTTLED
+    assert retry_after(error.value) == 5
+
+
+def test_stream_is_charged_when_consumed(clock):
+    balancer = _balancer(FakeClient(), a=1000)
+
+    async def consume():
+        stream = await balancer.create_completion({"messages": [], "stream": True})
+        return [chunk.choices[0].delta.content async for chunk in stream]
+
+    assert asyncio.run(consume()) == ["안녕", "하세요"]
+    target = balancer.get_stats()["deployments"][0]
+    assert target["window_tokens"] > 0 and target["reserved_tokens"] == 0
+
+
+def test_config_shares_client_per_endpoint():
+    created = []
+
+    def factory(endpoint):
+        created.append(endpoint)
+        return FakeClient()
+
+    config = '[{"endpoint": "https://a", "deployment": "x", "tpm": 1000}, ' \
+        '{"endpoint": "https://a", "deployment": "y", "weight": 2}, {"endpoint": "https://b", "deployment": "x"}]'
+    balancer = create_aoai_balancer(factory, config)
+    assert created == ["https://a", "https://b"]
+    assert [(target.deployment, target.weight) for target in balancer.targets] == [("x", 1.0), ("y", 2.0), ("x", 1.0)]
+    assert create_aoai_balancer(factory, "") is None
+    with pytest.raises(ValueError):
+        create_aoai_balancer(factory, '[{"endpoint": "https://a"}]')
@@ -0,0 +1,83 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.appointment import AppointmentRequest, AppointmentStatus
+from services.appointment_repository import InMemoryAppointmentRepository, slot_index, mask_to_slots, slots_to_mask
+from services.appointment_service import AppointmentService
+
+"""
+Unit tests for the indexed appointment repository.
+
+cd src/backend/src/
+pytest test/test_appointment_repository.py -v
+"""
+
+
+def _appointment(repository, department="내과", date="2026-10-20", time="10:00", phone="010-1234-5678"):
+    appointment = AppointmentRequest(
+        appointment_id=repository.next_appointment_id(),
+        patient_name="홍길동",
+        phone_number=phone,
+        preferred_date=date,
+        preferred_time=time,
+        department=department,
+        consultation_summary="",
+        status=AppointmentStatus.CONFIRMED
+    )
+    repository.add(appointment)
+    return appointment
+
+
+def test_slot_bitmap_helpers():
+    assert slot_index("09:00") == 18
+    assert slot_index("09:20") == 18
+    assert slot_index("오후 3시") is None
+    assert mask_to_slots(slots_to_mask(["09:00", "14:30"])) == ["09:00", "14:30"]
+
+
+def test_indexes():
+    repository = InMemoryAppointmentRepository()
+    first = _appointment(repository)
+    second = _appointment(repository, time="10:30", phone="010-9999-0000")
+    _appointment(repository, department="외과")
+
+    assert repository.get(first.appointment_id) is first
+    assert repository.get("APT999999") is None
+    assert repository.find_by_phone("010-9999-0000") == [second]
+    assert repository.find_by_department_date("내과", "2026-10-20") == [first, second]
+    assert repository.count() == 3
+
+
+def test_slot_occupancy_follows_status():
+    repository = InMemoryAppointmentRepository()
+    appointment = _appointment(repository)
+    assert not repository.is_slot_free("내과", "2026-10-20", "10:00")
+    assert repository.is_slot_free("외과", "2026-10-20", "10:00")
+    # 정규화되지 않은 날짜/시간은 빈 슬롯으로 취급하지 않음
+    assert not repository.is_slot_free("외과", "2026-10-20", "10시")
+    assert not repository.is_slot_free("외과", "다음주 화요일", "10:00")
+
+    repository.update_status(appointment.appointment_id, AppointmentStatus.CANCELLED)
+    assert repository.is_slot_free("내과", "2026-10-20", "10:00")
+
+
+def test_ids_do_not_collide_after_cancellation():
+    repository = InMemoryAppointmentRepository()
+    first = _appointment(repository)
+    repository.update_status(first.appointment_id, AppointmentStatus.CANCELLED)
+    assert repository.next_appointment_id() != first.appointment_id
+
+
+def test_service_available_slots():
+    service = AppointmentService()
+    service.clock = lambda: datetime(2026, 10, 14, 9, 0)
+    _appointment(service.repository, time="09:00")
+    slots = service.get_available_slots("내과", "2026-10-20")
+    assert "09:00" not in slots
+    assert slots[0] == "09:30"
+    assert len(slots) == 11
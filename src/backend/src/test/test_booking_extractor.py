@@ -0,0 +1,58 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from booking_extractor import BookingFieldExtractor
+from korean_datetime import KoreanDateTimeNormalizer
+
+"""
+Unit tests for the single-pass booking field extractor.
+
+cd src/backend/src/
+pytest test/test_booking_extractor.py -v
+"""
+
+# 2026-10-14 (수) 10:00
+extractor = BookingFieldExtractor(KoreanDateTimeNormalizer(clock=lambda: datetime(2026, 10, 14, 10, 0)))
+
+
+def test_all_fields_in_one_message():
+    message = "김민수, 010-1111-2222, 10월 27일 오전 열한시"
+    fields = extractor.extract(message)
+
+    assert fields["patient_name"].value == "김민수"
+    assert fields["phone_number"].value == "010-1111-2222"
+    assert fields["preferred_date"].value == "2026-10-27"
+    assert fields["preferred_time"].value == "11:00"
+    start, end = fields["phone_number"].span
+    assert message[start:end] == "010-1111-2222"
+
+
+def test_phone_normalization():
+    assert extractor.extract_values("01054226448")["phone_number"] == "010-5422-6448"
+    assert extractor.extract_values("010 1234 5678 입니다")["phone_number"] == "010-1234-5678"
+
+
+def test_name_patterns_and_stopwords():
+    assert extractor.extract_values("성함은 김철수이고 내일 갈게요")["patient_name"] == "김철수"
+    assert extractor.extract_values("저는 이영희예요")["patient_name"] == "이영희"
+    assert "patient_name" not in extractor.extract_values("내일입니다")
+    assert "patient_name" not in extractor.extract_values("좋아요 그렇게 해주세요")
+
+
+def test_time_confidence():
+    # An explicit hour outranks a bare period of day:
+    fields = extractor.extract("아침에 가능하고 10시면 좋아요")
+    assert fields["preferred_time"].value == "10:00"
+    assert fields["preferred_time"].confidence > 0.6
+    assert extractor.extract_values("오후 3시")["preferred_time"] == "15:00"
+    assert extractor.extract_values("점심때요")["preferred_time"] == "12:00"
+    assert "preferred_time" not in extractor.extract_values("3시간 기다렸어요")
+
+
+def test_symptom_duration_is_not_a_date():
+    assert extractor.extract_values("3일 전부터 배가 아파요") == {}
@@ -0,0 +1,121 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from models.appointment import BookingInfo
+from services.appointment_repository import SlotUnavailableError, mask_to_slots
+from services.appointment_service import AppointmentService
+from services.department_schedule import DepartmentSchedule, DepartmentSchedules
+
+"""
+Unit tests for department schedules and the availability calendar.
+
+cd src/backend/src/
+pytest test/test_department_schedule.py -v
+"""
+
+# 2026-10-14 (수) 10:10
+NOW = datetime(2026, 10, 14, 10, 10)
+
+
+def test_default_schedule_masks():
+    schedule = DepartmentSchedule(department="내과")
+    weekday = mask_to_slots(schedule.open_mask("2026-10-15"))
+    assert weekday[0] == "09:00" and weekday[-1] == "16:30" and "12:00" not in weekday
+    assert len(weekday) == 12
+    assert mask_to_slots(schedule.open_mask("2026-10-17")) == ["09:00", "09:30", "10:00", "10:30", "11:00", "11:30"]
+    assert schedule.open_mask("2026-10-18") == 0
+    assert schedule.open_mask("다음주") == 0
+
+
+def test_holidays_past_days_and_started_slots():
+    schedule = DepartmentSchedule(department="내과", holidays={"2026-10-15"})
+    assert schedule.open_mask("2026-10-15") == 0
+    assert schedule.open_mask("2026-10-13", NOW) == 0
+    assert mask_to_slots(schedule.open_mask("2026-10-14", NOW))[0] == "10:30"
+    assert schedule.is_open("2026-10-14", "11:00", NOW)
+    assert not schedule.is_open("2026-10-14", "10:00", NOW)
+    assert not schedule.is_open("2026-10-16", "18:00", NOW)
+    # 해석되지 않은 날짜/시간은 예약 불가
+    assert not schedule.is_open("다음주 화요일", "10:00", NOW)
+    assert not schedule.is_open("2026-10-14", "오전 11시", NOW)
+
+
+def test_slot_length_and_config():
+    schedules = DepartmentSchedules.from_config({
+        "default": {"holidays": ["2026-10-09"]},
+        "정신과": {"slot_minutes": 60, "opening_hours": {"0": [["13:00", "18:00"]]}, "holidays": ["2026-10-19"]}
+    })
+    psychiatry = schedules.get("정신과")
+    assert psychiatry.holidays == {"2026-10-09", "2026-10-19"}
+    assert mask_to_slots(psychiatry.open_mask("2026-10-26")) == ["13:00", "14:00", "15:00", "16:00", "17:00"]
+    assert psychiatry.open_mask("2026-10-27") == 0
+    assert schedules.get("내과") is schedules.default
+    # 진료과별 설정이 있으면 설정된 진료과만 조회 가능
+    assert schedules.knows("정신과") and not schedules.knows("내과")
+    assert DepartmentSchedules().knows("내과")
+    assert not DepartmentSchedules().knows("없는진료") and not DepartmentSchedules().knows("")
+
+    with pytest.raises(ValueError):
+        DepartmentSchedule(department="내과", slot_minutes=45)
+
+
+def _service():
+    service = AppointmentService()
+    service.clock = lambda: NOW
+    return service
+
+
+def test_service_availability_calendar():
+    service = _service()
+    availability = service.get_availability("내과", "2026-10-14", "2026-10-18")
+    assert list(availability) == ["2026-10-14", "2026-10-15", "2026-10-16", "2026-10-17", "2026-10-18"]
+    assert availability["2026-10-14"][0] == "10:30"
+    assert availability["2026-10-18"] == []
+    assert len(service.get_availability("내과")) == 14
+
+    with pytest.raises(ValueError):
+        service.get_availability("내과", "2026-10-20", "2026-10-14")
+    with pytest.raises(ValueError):
+        service.get_availability("내과", "10월 20일")
+
+    free = service.next_free_slots("내과", 3)
+    assert free == [("2026-10-14", "10:30"), ("2026-10-14", "11:00"), ("2026-10-14", "11:30")]
+
+
+def test_booking_outside_schedule_is_rejected():
+    service = _service()
+    service.repository.save_booking_session("chat-1", BookingInfo(
+        patient_name="홍길동", phone_number="010-1234-5678",
+        preferred_date="2026-10-18", preferred_time="10:00", department="내과"
+    ))
+    assert not service.hold_slot("chat-1")
+    with pytest.raises(SlotUnavailableError):
+        service.create_appointment("chat-1")
+
+    service.update_booking_info("chat-1", preferred_date="2026-10-19")
+    assert service.hold_slot("chat-1")
+    assert "10:00" not in service.get_available_slots("내과", "2026-10-19", holder="chat-2")
+    assert service.create_appointment("chat-1").appointment_date == "2026-10-19"
+
+
+def test_unnormalized_time_cannot_be_double_booked():
+    service = _service()
+    existing = service.repository.count()
+    for chat_id in ("chat-1", "chat-2"):
+        service.repository.save_booking_session(chat_id, BookingInfo(
+            patient_name="홍길동", phone_number="010-1234-5678",
+            preferred_date="2026-10-19", preferred_time="오후 세시", department="내과"
+        ))
+        assert not service.hold_slot(chat_id)
+        with pytest.raises(SlotUnavailableError):
+            service.create_appointment(chat_id)
+    assert service.repository.count() == existing
+    assert not service.is_slot_available("내과", "2026-10-19", "10시")
+    assert not service.is_slot_available("내과", "10월 19일", "10:00")
+    assert service.is_slot_available("내과", "2026-10-19", "10:00")
@@ -0,0 +1,186 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+import json
+import time
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import pytest
+from azure.core.credentials import AccessToken
+from openai import AsyncAzureOpenAI
+from aoai_client import AsyncAOAIClient
+from aoai_balancer import AOAIBalancer, DeploymentTarget
+from deployment_capabilities import capability_registry, JSON_MODE, STREAMING
+from usage_ledger import usage_ledger
+
+"""
+Unit tests for the deployment capability cache (AOAI requests are served
+by an in-process httpx transport).
+
+cd src/backend/src/
+pytest test/test_deployment_capabilities.py -v
+"""
+
+
+class StaticCredential:
+
+    async def get_token(self, *scopes, **kwargs):
+        return AccessToken("token", int(time.time()) + 3600)
+
+    async def close(self):
+        pass
+
+
+def _completion(content: str) -> dict:
+    return {
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}]
+    }
+
+
+def _rejected(param: str) -> httpx.Response:
+    return httpx.Response(400, json={"error": {
+        "message": f"Unrecognized request argument supplied: {param}",
+        "type": "invalid_request_error",
+        "param": param,
+        "code": None
+    }})
+
+
+@pytest.fixture(autouse=True)
+def clear_registry():
+    capability_registry.forget()
+    yield
+    capability_registry.forget()
+
+
+def _client(handler, deployment: str, balancer: AOAIBalancer = None) -> AsyncAOAIClient:
+    return AsyncAOAIClient(
+        endpoint="https://example.openai.azure.com",
+        deployment=deployment,
+        azure_credential=StaticCredential(),
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        balancer=balancer
+    )
+
+
+def test_json_mode_is_probed_once():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(body)
+        if "response_format" in body:
+            return _rejected("response_format")
+        return httpx.Response(200, json=_completion('{"intent": "BOOKING"}'))
+
+    client = _client(handler, "legacy")
+
+    async def turns():
+        return [
+            await client.chat_completion(f"예약하고 싶어요 {i}", response_format={"type": "json_object"})
+            for i in range(3)
+        ]
+
+    assert asyncio.run(turns()) == ['{"intent": "BOOKING"}'] * 3
+    # 첫 요청만 거부되고 이후 요청은 처음부터 response_format 없이 전송
+    assert ["response_format" in body for body in requests] == [True, False, False, False]
+    snapshot = capability_registry.snapshot()
+    assert snapshot[0]["deployment"] == "legacy"
+    assert snapshot[0]["capabilities"][JSON_MODE]["supported"] is False
+
+
+def test_supported_json_mode_and_other_rejections():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(body)
+        if "차단" in body["messages"][-1]["content"]:
+            return httpx.Response(400, json={"error": {"message": "filtered", "code": "content_filter", "param": "prompt"}})
+        return httpx.Response(200, json=_completion("{}"))
+
+    client = _client(handler, "modern")
+    asyncio.run(client.chat_completion("안녕하세요", response_format={"type": "json_object"}))
+    assert client._supports(JSON_MODE) is True
+
+    # 콘텐츠 필터 등 다른 400 오류는 JSON 모드 미지원으로 기록하지 않음
+    with pytest.raises(Exception):
+        asyncio.run(client.chat_completion("차단", response_format={"type": "json_object"}))
+    assert client._supports(JSON_MODE) is True
+    assert len(requests) == 2
+
+
+def test_streaming_falls_back_to_single_completion():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(body)
+        if body.get("stream"):
+            return _rejected("stream")
+        return httpx.Response(200, json=_completion("전체 답변"))
+
+    client = _client(handler, "no-stream")
+
+    async def collect():
+        return [[delta async for delta in client.chat_completion_stream("두통이 있어요")] for _ in range(2)]
+
+    assert asyncio.run(collect()) == [["전체 답변"], ["전체 답변"]]
+    assert [bool(body.get("stream")) for body in requests] == [True, False, False]
+    assert client._supports(STREAMING) is False
+
+
+def test_balanced_capabilities_are_learned_per_deployment():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append((request.url.host, "response_format" in body))
+        if request.url.host == "legacy.openai.azure.com" and "response_format" in body:
+            return _rejected("response_format")
+        return httpx.Response(200, json=_completion("{}"))
+
+    def deployment_client(endpoint: str) -> AsyncAzureOpenAI:
+        return AsyncAzureOpenAI(
+            api_version="2023-12-01-preview",
+            api_key="key",
+            azure_endpoint=endpoint,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            max_retries=0
+        )
+
+    legacy = DeploymentTarget("https://legacy.openai.azure.com", "gpt-4o", deployment_client("https://legacy.openai.azure.com"), tpm=100000)
+    modern = DeploymentTarget("https://modern.openai.azure.com", "gpt-4o", deployment_client("https://modern.openai.azure.com"), tpm=1000)
+    client = _client(lambda request: httpx.Response(500), "gpt-4o", balancer=AOAIBalancer([legacy, modern]))
+
+    async def turn(i: int):
+        return await client.chat_completion(f"예약하고 싶어요 {i}", response_format={"type": "json_object"})
+
+    asyncio.run(turn(0))
+    asyncio.run(turn(1))
+    # 거부한 배포에만 기록되고, 논리 배포 이름으로는 기록되지 않음
+    snapshot = capability_registry.snapshot()
+    assert [(entry["endpoint"], entry["capabilities"][JSON_MODE]["supported"]) for entry in snapshot] == [
+        ("https://legacy.openai.azure.com", False)
+    ]
+    assert client._supports(JSON_MODE) is None
+
+    # legacy가 빠지면 modern에는 response_format을 그대로 보냄
+    legacy.cooldown_until = time.monotonic() + 60
+    asyncio.run(turn(2))
+    assert requests == [
+        ("legacy.openai.azure.com", True), ("legacy.openai.azure.com", False),
+        ("legacy.openai.azure.com", False), ("modern.openai.azure.com", True)
+    ]
+    assert client._supports(JSON_MODE, modern) is True
+    # 사용량도 실제로 호출된 배포 기준으로 집계
+    deployments = usage_ledger.get_stats()["deployments"]
+    assert {legacy.name, modern.name} <= set(deployments)
@@ -0,0 +1,66 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intent_classifier import RuleBasedIntentClassifier, BOOKING, CONSULTATION
+
+"""
+Unit tests for the rule-based fast-path intent classifier.
+
+cd src/backend/src/
+pytest test/test_intent_classifier.py -v
+"""
+
+BOOKING_OFFER = "4) 의료진 연계: 소화기내과 방문이 필요합니다. **소화기내과에 예약을 잡아드릴까요?**"
+
+FAST_PATH_TEST_CASES = [
+    {"name": "explicit_booking", "message": "예약하고 싶어요", "expected": BOOKING},
+    {"name": "booking_with_time", "message": "네, 내일 12시로 예약해주세요.", "expected": BOOKING},
+    {"name": "bare_phone", "message": "010-9876-5432", "expected": BOOKING},
+    {"name": "affirmative_after_offer", "message": "좋아요", "last": BOOKING_OFFER, "expected": BOOKING},
+    {"name": "name_during_booking", "message": "홍길동입니다", "booking": True, "expected": BOOKING},
+    {"name": "symptom", "message": "가슴이 답답하고 아파요.", "expected": CONSULTATION},
+    {"name": "severity_score", "message": "6점 정도이고 다른 증상은 없어요", "expected": CONSULTATION},
+    {"name": "symptom_with_time", "message": "어제 저녁부터 배가 아파요", "expected": CONSULTATION},
+]
+
+AMBIGUOUS_TEST_CASES = [
+    {"name": "affirmative_without_offer", "message": "좋아요"},
+    {"name": "booking_declined", "message": "예약은 괜찮아요"},
+    {"name": "no_rule", "message": "음 잘 모르겠어요"},
+]
+
+
+@pytest.mark.parametrize("test_case", FAST_PATH_TEST_CASES, ids=lambda x: x["name"])
+def test_fast_path(test_case: dict):
+    classifier = RuleBasedIntentClassifier()
+    intent = classifier.predict(
+        test_case["message"],
+        last_assistant_message=test_case.get("last", ""),
+        booking_in_progress=test_case.get("booking", False)
+    )
+    assert intent == test_case["expected"]
+
+
+@pytest.mark.parametrize("test_case", AMBIGUOUS_TEST_CASES, ids=lambda x: x["name"])
+def test_ambiguous_falls_back_to_llm(test_case: dict):
+    classifier = RuleBasedIntentClassifier()
+    assert classifier.predict(test_case["message"]) is None
+
+
+def test_counters():
+    classifier = RuleBasedIntentClassifier()
+    classifier.predict("예약하고 싶어요")
+    classifier.predict("배가 아파요")
+    classifier.predict("음 잘 모르겠어요")
+
+    stats = classifier.get_stats()
+    assert stats["total"] == 3
+    assert stats["fast_path_booking"] == 1
+    assert stats["fast_path_consultation"] == 1
+    assert stats["llm_fallback"] == 1
+    assert stats["fast_path_rate"] == pytest.approx(2 / 3, abs=1e-3)
@@ -0,0 +1,78 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+from datetime import date, datetime, time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from korean_datetime import KoreanDateTimeNormalizer, format_korean_date, format_korean_time
+
+"""
+Unit tests for Korean date/time normalization.
+
+cd src/backend/src/
+pytest test/test_korean_datetime.py -v
+"""
+
+# 2026-10-14 (수) 10:00
+normalizer = KoreanDateTimeNormalizer(clock=lambda: datetime(2026, 10, 14, 10, 0))
+
+
+def test_relative_dates():
+    assert normalizer.parse_date("오늘") == date(2026, 10, 14)
+    assert normalizer.parse_date("내일 갈게요") == date(2026, 10, 15)
+    assert normalizer.parse_date("모레") == date(2026, 10, 16)
+    assert normalizer.parse_date("3일 후에") == date(2026, 10, 17)
+
+
+def test_weekdays():
+    assert normalizer.parse_date("다음주 화요일") == date(2026, 10, 20)
+    assert normalizer.parse_date("다음 주 화요일") == date(2026, 10, 20)
+    assert normalizer.parse_date("이번 금요일") == date(2026, 10, 16)
+    assert normalizer.parse_date("이번주 수요일") == date(2026, 10, 14)
+    # 이미 지난 이번 주 요일은 다음 주로
+    assert normalizer.parse_date("이번 월요일") == date(2026, 10, 19)
+    # 요일만 말하면 가장 가까운 다음 해당 요일
+    assert normalizer.parse_date("수요일") == date(2026, 10, 21)
+    assert normalizer.parse_date("다다음주 월요일") == date(2026, 10, 26)
+
+
+def test_calendar_dates():
+    assert normalizer.parse_date("10월 27일") == date(2026, 10, 27)
+    assert normalizer.parse_date("10월27일") == date(2026, 10, 27)
+    # 지난 날짜는 내년으로
+    assert normalizer.parse_date("1월 3일") == date(2027, 1, 3)
+    assert normalizer.parse_date("25일") == date(2026, 10, 25)
+    assert normalizer.parse_date("5일") == date(2026, 11, 5)
+    assert normalizer.parse_date("다음 달 5일") == date(2026, 11, 5)
+    assert normalizer.parse_date("2026-11-02") == date(2026, 11, 2)
+    assert normalizer.parse_date("2월 30일") is None
+    assert normalizer.parse_date("3일 전부터 아파요") is None
+
+
+def test_times():
+    assert normalizer.parse_time("오후 3시") == time(15, 0)
+    assert normalizer.parse_time("3시 반") == time(15, 30)
+    assert normalizer.parse_time("오전 아홉시 반") == time(9, 30)
+    assert normalizer.parse_time("10시 20분") == time(10, 20)
+    assert normalizer.parse_time("저녁 6시") == time(18, 0)
+    assert normalizer.parse_time("14:30") == time(14, 30)
+    assert normalizer.parse_time("점심") == time(12, 0)
+    assert normalizer.parse_time("두 시간 기다렸어요") is None
+
+
+def test_parse_and_normalize():
+    assert normalizer.parse("다음주 화요일 오후 2시") == datetime(2026, 10, 20, 14, 0)
+    assert normalizer.parse("다음주 화요일") is None
+    assert normalizer.normalize_date("이번 금요일") == "2026-10-16"
+    assert normalizer.normalize_date("2026-10-16") == "2026-10-16"
+    assert normalizer.normalize_date("언젠가") is None
+    assert normalizer.normalize_time("3시 반") == "15:30"
+
+
+def test_korean_display():
+    assert format_korean_date("2026-10-20") == "10월 20일 (화)"
+    assert format_korean_date("12월 12일") == "12월 12일"
+    assert format_korean_time("15:30") == "오후 3시 30분"
+    assert format_korean_time("09:00") == "오전 9시"
@@ -0,0 +1,93 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+import asyncio
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Client construction needs an endpoint; no request is sent by these tests
+os.environ.setdefault("LANGUAGE_ENDPOINT", "https://localhost")
+
+import pii_redacter
+
+"""
+Unit tests for batched PII recognition and session mapping merges.
+
+cd src/backend/src/
+pytest test/test_pii_redacter.py -v
+"""
+
+
+def _entity(text, category="PERSON", confidence=0.9):
+    return SimpleNamespace(text=text, category=category, confidence_score=confidence)
+
+
+class FakeAsyncClient:
+    """Recognizes the words listed in `known` in each document."""
+
+    def __init__(self, known):
+        self.known = known
+        self.requests = []
+
+    async def recognize_pii_entities(self, documents, language):
+        self.requests.append(list(documents))
+        return [
+            SimpleNamespace(id=str(i), is_error=False, entities=[
+                _entity(word, category) for word, category in self.known.items() if word in document
+            ])
+            for i, document in enumerate(documents)
+        ]
+
+
+def test_split_documents_respects_limit():
+    text = "\n".join(f"line {i} 홍길동" for i in range(100))
+    documents = pii_redacter.split_documents(text, max_chars=50)
+    assert "".join(documents) == text
+    assert all(len(document) <= 50 for document in documents)
+    # 줄 경계에서 분할되어 개체가 잘리지 않음
+    assert all("홍길동" in document for document in documents)
+    assert pii_redacter.split_documents("짧은 문장") == ["짧은 문장"]
+
+
+def test_merge_reuses_keys(monkeypatch):
+    monkeypatch.setattr(pii_redacter, "CATEGORIES", ["PERSON"])
+    assert pii_redacter.merge_entities("chat-1", [("PERSON", "홍길동")]) == 1
+    assert pii_redacter.merge_entities("chat-1", [("PERSON", "홍길동"), ("PERSON", "김철수")]) == 1
+    mapping = pii_redacter.redaction_mappings["chat-1"]
+    assert sorted(mapping.values()) == ["김철수", "홍길동"]
+    pii_redacter.remove("chat-1")
+
+
+def test_recognize_batch_async_chunks_and_merges(monkeypatch):
+    monkeypatch.setattr(pii_redacter, "CATEGORIES", ["PERSON", "PHONENUMBER"])
+    client = FakeAsyncClient({"홍길동": "PERSON", "010-1234-5678": "PHONENUMBER"})
+    monkeypatch.setattr(pii_redacter, "_async_client", client)
+
+    texts = [f"{i}번째 발화" for i in range(11)]
+    texts[3] = "제 이름은 홍길동입니다"
+    texts[9] = "홍길동, 010-1234-5678"
+    redacted = asyncio.run(pii_redacter.redact_batch_async(texts, id="chat-2"))
+
+    assert [len(batch) for batch in client.requests] == [5, 5, 1]
+    assert len(pii_redacter.redaction_mappings["chat-2"]) == 2
+    assert "홍길동" not in redacted[3] and "010-1234-5678" not in redacted[9]
+    assert redacted[0] == texts[0]
+    assert pii_redacter.reconstruct(redacted[9], id="chat-2") == texts[9]
+    assert "chat-2" not in pii_redacter.redaction_mappings
+
+
+def test_overlapping_entities_round_trip(monkeypatch):
+    monkeypatch.setattr(pii_redacter, "CATEGORIES", ["PERSON"])
+    pii_redacter.merge_entities("chat-3", [("PERSON", "김철"), ("PERSON", "김철수")])
+    text = "김철수 환자의 보호자 김철 씨"
+    redacted = pii_redacter.redact(text, id="chat-3")
+    assert "김철" not in redacted
+    assert pii_redacter.reconstruct(redacted, id="chat-3", cache=True) == text
+
+    # 매핑이 바뀌면 자동자 재생성
+    pii_redacter.merge_entities("chat-3", [("PERSON", "환자")])
+    assert "환자" not in pii_redacter.redact(text, id="chat-3")
+    assert pii_redacter.get_stats()["automata"] >= 1
+    pii_redacter.remove("chat-3")
+    assert "chat-3" not in pii_redacter._replacers
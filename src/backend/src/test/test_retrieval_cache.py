@@ -0,0 +1,97 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+import time
+import asyncio
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval_cache import RetrievalCache, InMemoryCacheBackend, RedisCacheBackend, normalize_query
+
+"""
+Unit tests for the RAG retrieval cache.
+
+cd src/backend/src/
+pytest test/test_retrieval_cache.py -v
+"""
+
+DOCUMENTS = [{"title": "cpx_abdominal_pain.md", "chunk": "복통 감별진단 ..."}]
+
+
+def test_normalized_query_hits():
+    cache = RetrievalCache(index_name="cpx-index")
+    cache.set("배가 아파요", DOCUMENTS)
+
+    assert normalize_query("  배가   아파요!! ") == "배가 아파요"
+    assert cache.get("배가  아파요.") == DOCUMENTS
+    assert cache.get("가슴이 답답해요") is None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_ttl_expiry():
+    cache = RetrievalCache(index_name="cpx-index", ttl_seconds=0.01)
+    cache.set("배가 아파요", DOCUMENTS)
+    time.sleep(0.02)
+
+    assert cache.get("배가 아파요") is None
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_lru_eviction():
+    cache = RetrievalCache(index_name="cpx-index", backend=InMemoryCacheBackend(max_entries=2))
+    cache.set("q1", DOCUMENTS)
+    cache.set("q2", DOCUMENTS)
+    cache.get("q1")  # q1 is now most recently used
+    cache.set("q3", DOCUMENTS)
+
+    assert cache.get("q2") is None
+    assert cache.get("q1") == DOCUMENTS
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_invalidate_is_scoped_to_index():
+    backend = InMemoryCacheBackend()
+    cpx_cache = RetrievalCache(index_name="cpx-index", backend=backend)
+    other_cache = RetrievalCache(index_name="other-index", backend=backend)
+    cpx_cache.set("배가 아파요", DOCUMENTS)
+    other_cache.set("배가 아파요", DOCUMENTS)
+
+    assert cpx_cache.invalidate() == 1
+    assert cpx_cache.get("배가 아파요") is None
+    assert other_cache.get("배가 아파요") == DOCUMENTS
+
+
+class FakeRedis:
+    """
+    Synchronous redis.Redis stand-in; records the thread of each call.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.get_ident())
+        return self.data.get(key)
+
+    def set(self, key, value, px=None):
+        self.threads.append(threading.get_ident())
+        self.data[key] = value
+
+
+def test_async_access_keeps_blocking_backend_off_the_event_loop():
+    redis = FakeRedis()
+    cache = RetrievalCache(index_name="cpx-index", backend=RedisCacheBackend(redis))
+
+    async def lookup():
+        await cache.aset("배가 아파요", DOCUMENTS)
+        return await cache.aget("배가 아파요!"), threading.get_ident()
+
+    documents, loop_thread = asyncio.run(lookup())
+    assert documents == DOCUMENTS
+    assert len(redis.threads) == 2 and loop_thread not in redis.threads
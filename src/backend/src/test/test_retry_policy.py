@@ -0,0 +1,164 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+import asyncio
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import pytest
+import openai
+from azure.core.exceptions import HttpResponseError, ServiceRequestError
+import retry_policy
+from retry_policy import (
+    CircuitBreaker, CircuitOpenError, ErrorClass, RetryPolicy,
+    acall_with_retry, call_with_retry, classify, retry_after
+)
+
+"""
+Unit tests for error classification, backoff and circuit breakers.
+
+cd src/backend/src/
+pytest test/test_retry_policy.py -v
+"""
+
+
+def _openai_error(status: int, headers: dict = None) -> openai.APIStatusError:
+    request = httpx.Request("POST", "https://example.openai.azure.com/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+def _azure_error(status: int, headers: dict = None) -> HttpResponseError:
+    response = SimpleNamespace(status_code=status, headers=headers or {}, reason="", text=lambda: "")
+    error = HttpResponseError(message="error")
+    error.status_code = status
+    error.response = response
+    return error
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    slept = []
+    monkeypatch.setattr(retry_policy.time, "sleep", slept.append)
+
+    async def fake_sleep(delay):
+        slept.append(delay)
+    monkeypatch.setattr(retry_policy.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(retry_policy, "_breakers", {})
+    return slept
+
+
+def test_classify_errors():
+    assert classify(_openai_error(429)) == ErrorClass.THROTTLED
+    assert classify(_openai_error(503)) == ErrorClass.TRANSIENT
+    assert classify(_openai_error(400)) == ErrorClass.BAD_REQUEST
+    assert classify(_openai_error(401)) == ErrorClass.FATAL
+    assert classify(_azure_error(429)) == ErrorClass.THROTTLED
+    assert classify(ServiceRequestError("connection reset")) == ErrorClass.TRANSIENT
+    assert classify(openai.APITimeoutError(request=httpx.Request("POST", "https://x"))) == ErrorClass.TRANSIENT
+    assert classify(ValueError("bad json")) == ErrorClass.FATAL
+    assert classify(CircuitOpenError("aoai:x", 1)) == ErrorClass.FATAL
+
+
+def test_retry_after_headers():
+    assert retry_after(_openai_error(429, {"retry-after-ms": "1500"})) == 1.5
+    assert retry_after(_azure_error(429, {"retry-after": "7"})) == 7
+    assert retry_after(_openai_error(429)) is None
+
+
+def test_backoff_with_jitter_and_retry_after():
+    policy = RetryPolicy(max_attempts=4, base_delay=1, max_delay=5)
+    for attempt in (1, 2, 3):
+        assert 0 <= policy.next_delay(attempt, _openai_error(503)) <= min(5, 2 ** (attempt - 1))
+    assert policy.next_delay(4, _openai_error(503)) is None
+    assert policy.next_delay(1, _openai_error(400)) is None
+    assert policy.next_delay(1, _openai_error(429, {"retry-after": "3"})) == 3
+    # 너무 긴 Retry-After는 기다리지 않고 실패
+    assert policy.next_delay(1, _openai_error(429, {"retry-after": "60"})) is None
+
+
+def test_call_with_retry_recovers_from_throttling(no_sleep):
+    outcomes = [_openai_error(429, {"retry-after": "2"}), _openai_error(503), "ok"]
+
+    def upstream():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert call_with_retry("aoai:test", upstream, RetryPolicy(max_attempts=3)) == "ok"
+    assert no_sleep[0] == 2 and len(no_sleep) == 2
+    assert retry_policy.get_breaker("aoai:test").state == "closed"
+
+
+def test_client_errors_are_not_retried(no_sleep):
+    calls = []
+
+    def upstream():
+        calls.append(1)
+        raise _openai_error(400)
+
+    with pytest.raises(openai.APIStatusError):
+        call_with_retry("aoai:test", upstream)
+    assert len(calls) == 1 and not no_sleep
+
+
+def test_breaker_opens_fails_fast_and_probes(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(retry_policy.time, "monotonic", lambda: clock[0])
+    breaker = CircuitBreaker("aoai:test", failure_threshold=2, reset_seconds=30)
+    monkeypatch.setitem(retry_policy._breakers, "aoai:test", breaker)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise _openai_error(503)
+
+    policy = RetryPolicy(max_attempts=1)
+    for _ in range(2):
+        with pytest.raises(openai.APIStatusError):
+            call_with_retry("aoai:test", failing, policy)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        call_with_retry("aoai:test", failing, policy)
+    assert len(calls) == 2
+
+    # 냉각 후 probe 1건 통과, 성공하면 닫힘
+    clock[0] += 31
+    assert breaker.state == "half_open"
+    assert call_with_retry("aoai:test", lambda: "ok", policy) == "ok"
+    assert breaker.state == "closed"
+    assert breaker.get_stats()["opened"] == 1 and breaker.get_stats()["rejected"] == 1
+
+
+def test_long_retry_after_opens_breaker_for_that_long(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(retry_policy.time, "monotonic", lambda: clock[0])
+
+    def throttled():
+        raise _openai_error(429, {"retry-after": "45"})
+
+    with pytest.raises(openai.APIStatusError):
+        call_with_retry("aoai:busy", throttled)
+    clock[0] = 40
+    with pytest.raises(CircuitOpenError):
+        call_with_retry("aoai:busy", lambda: "ok")
+    clock[0] = 46
+    assert call_with_retry("aoai:busy", lambda: "ok") == "ok"
+
+
+def test_async_retry(no_sleep):
+    outcomes = [_azure_error(503), "ok"]
+
+    async def upstream():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert asyncio.run(acall_with_retry("search:index", upstream)) == "ok"
+    assert len(no_sleep) == 1
+    assert retry_policy.get_stats()["breakers"]["search:index"]["state"] == "closed"
@@ -0,0 +1,64 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_janitor import SessionJanitor, process_memory_bytes
+
+"""
+Unit tests for the background session janitor.
+
+cd src/backend/src/
+pytest test/test_session_janitor.py -v
+"""
+
+
+def test_sweep_runs_sync_async_and_blocking_functions():
+    async def expire_chat_sessions():
+        return 2
+
+    def failing_sweep():
+        raise RuntimeError("db unavailable")
+
+    janitor = SessionJanitor(interval_seconds=60)
+    janitor.add_sweep("chat_sessions", expire_chat_sessions)
+    janitor.add_sweep("booking_sessions", lambda: 3, blocking=True)
+    janitor.add_sweep("pii_mappings", lambda: None)
+    janitor.add_sweep("broken", failing_sweep)
+
+    removed = asyncio.run(janitor.sweep())
+    assert removed == {"chat_sessions": 2, "booking_sessions": 3, "pii_mappings": 0}
+    stats = janitor.get_stats()
+    assert stats["runs"] == 1 and stats["errors"] == 1
+    assert stats["removed"]["booking_sessions"] == 3
+
+
+def test_gauges():
+    janitor = SessionJanitor()
+    janitor.add_gauge("booking_sessions", lambda: 5, blocking=True)
+    janitor.add_gauge("broken", lambda: 1 / 0)
+    janitor.add_gauge("process_memory_bytes", process_memory_bytes)
+
+    gauges = asyncio.run(janitor.collect_gauges())
+    assert gauges["booking_sessions"] == 5
+    assert gauges["broken"] is None
+    assert gauges["process_memory_bytes"] > 0
+
+
+def test_background_task_lifecycle():
+    async def run():
+        sweeps = []
+        janitor = SessionJanitor(interval_seconds=0.01)
+        janitor.add_sweep("counter", lambda: sweeps.append(1) or 1)
+        janitor.start()
+        await asyncio.sleep(0.1)
+        await janitor.stop()
+        runs = janitor.runs
+        await asyncio.sleep(0.05)
+        assert runs >= 2 and janitor.runs == runs
+        assert not janitor.get_stats()["running"]
+
+    asyncio.run(run())
@@ -0,0 +1,227 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from session_store import (
+    InMemorySessionStore, SQLiteSessionStore, SessionLeaseLostError, SessionState, SessionStore, is_valid_session_id, new_session_id
+)
+
+"""
+Unit tests for the per-session conversation state store.
+
+cd src/backend/src/
+pytest test/test_session_store.py -v
+"""
+
+
+def _roundtrip(store):
+    async def run():
+        session = await store.get_or_create("session-a")
+        assert session.turn_count == 0
+        session.turn_count += 1
+        session.data["department"] = "소화기내과"
+        await store.save(session)
+
+        loaded = await store.get("session-a")
+        assert loaded.turn_count == 1
+        assert loaded.data["department"] == "소화기내과"
+        assert await store.get("session-b") is None
+        assert await store.count() == 1
+
+        await store.delete("session-a")
+        assert await store.get("session-a") is None
+    asyncio.run(run())
+
+
+def test_in_memory_roundtrip():
+    _roundtrip(InMemorySessionStore())
+
+
+def test_sqlite_roundtrip(tmp_path):
+    store = SQLiteSessionStore(path=str(tmp_path / "sessions.db"))
+    _roundtrip(store)
+    asyncio.run(store.close())
+
+
+def test_ttl_expiry(tmp_path):
+    async def run(store):
+        await store.save(await store.get_or_create("expired-session"))
+        await asyncio.sleep(0.05)
+        assert await store.get("expired-session") is None
+        await store.save(await store.get_or_create("expired-session"))
+        await asyncio.sleep(0.05)
+        assert await store.purge_expired() == 1
+        assert await store.count() == 0
+        await store.close()
+
+    asyncio.run(run(InMemorySessionStore(ttl_seconds=0.01)))
+    asyncio.run(run(SQLiteSessionStore(path=str(tmp_path / "sessions.db"), ttl_seconds=0.01)))
+
+
+def test_purge_keeps_recently_saved_sessions(tmp_path):
+    async def run(store):
+        await store.save(await store.get_or_create("session-old"))
+        await store.save(await store.get_or_create("session-new"))
+        await asyncio.sleep(0.15)
+        # Saving again moves the session to the back of the expiry order
+        await store.save(await store.get_or_create("session-old"))
+        assert await store.purge_expired() == 1
+        assert await store.get("session-old") is not None
+        assert await store.count() == 1
+        assert await store.memory_bytes() > 0
+        await store.close()
+
+    asyncio.run(run(InMemorySessionStore(ttl_seconds=0.1)))
+    asyncio.run(run(SQLiteSessionStore(path=str(tmp_path / "sessions.db"), ttl_seconds=0.1)))
+
+
+def test_per_session_lock_isolation():
+    store = InMemorySessionStore()
+    order = []
+
+    async def turn(session_id, label, delay):
+        async with store.lock(session_id):
+            order.append(f"{label}-start")
+            await asyncio.sleep(delay)
+            order.append(f"{label}-end")
+
+    async def run():
+        await asyncio.gather(
+            turn("session-a", "a1", 0.05),
+            turn("session-a", "a2", 0),
+            turn("session-b", "b1", 0)
+        )
+
+    asyncio.run(run())
+    # Same session is serialized, other sessions are not blocked:
+    assert order.index("a1-end") < order.index("a2-start")
+    assert order.index("b1-end") < order.index("a1-end")
+
+
+def test_history_views_are_incremental():
+    session = SessionState(session_id="session-a")
+    for i in range(5):
+        session.append_message("user", f"질문 {i}")
+        session.append_message("assistant", f"답변 {i}")
+    session.drop_oldest(6)
+
+    assert [msg.content for msg in session.history] == ["질문 3", "답변 3", "질문 4", "답변 4"]
+    assert session.prompt_messages[0] == {"role": "user", "content": "질문 3"}
+    assert session.transcript == "user: 질문 3\nassistant: 답변 3\nuser: 질문 4\nassistant: 답변 4\n"
+    assert session.last_message("assistant") == "답변 4"
+
+    # Derived views are rebuilt when loading a persisted session:
+    restored = SessionState.model_validate_json(session.model_dump_json())
+    assert restored.prompt_messages == session.prompt_messages
+    assert restored.transcript == session.transcript
+
+
+def test_incomplete_store_fails_on_creation():
+    class PartialStore(SessionStore):
+        async def get(self, session_id):
+            return None
+
+    with pytest.raises(TypeError):
+        PartialStore()
+
+
+def test_session_id_validation():
+    assert is_valid_session_id(new_session_id())
+    assert not is_valid_session_id(None)
+    assert not is_valid_session_id("short")
+    assert not is_valid_session_id("../../etc/passwd-aaaaaaaa")
+    # IDs not issued by this server (tag mismatch) are rejected
+    nonce, tag = new_session_id().split("-")
+    assert not is_valid_session_id(f"{'0' * 32}-{tag}")
+    assert not is_valid_session_id(nonce)
+
+
+def test_sqlite_lock_serializes_workers_sharing_the_file(tmp_path):
+    # Two stores on one file stand in for two worker processes
+    path = str(tmp_path / "sessions.db")
+    workers = [SQLiteSessionStore(path=path), SQLiteSessionStore(path=path)]
+    turns = 10
+
+    async def turn(store):
+        async with store.lock("session-a"):
+            session = await store.get_or_create("session-a")
+            await asyncio.sleep(0.001)
+            session.turn_count += 1
+            await store.save(session)
+
+    async def run():
+        await asyncio.gather(*(turn(store) for _ in range(turns) for store in workers))
+        # Lost updates would leave fewer turns than requests
+        assert (await workers[0].get("session-a")).turn_count == 2 * turns
+        for store in workers:
+            await store.close()
+
+    asyncio.run(run())
+
+
+def test_sqlite_lease_of_crashed_worker_expires(tmp_path):
+    path = str(tmp_path / "sessions.db")
+
+    async def run():
+        crashed = SQLiteSessionStore(path=path, lease_seconds=0.1)
+        await crashed._acquire_lease("session-a")
+        # A crashed worker no longer renews its lease
+        crashed._renewals.pop("session-a").cancel()
+        store = SQLiteSessionStore(path=path)
+        async with store.lock("session-a"):
+            pass
+        await crashed.close()
+        await store.close()
+
+    asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+
+def test_sqlite_lease_is_renewed_while_held(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    order = []
+
+    async def run():
+        streaming = SQLiteSessionStore(path=path, lease_seconds=0.1)
+        other = SQLiteSessionStore(path=path, lease_seconds=0.1)
+
+        async def long_stream():
+            async with streaming.lock("session-a"):
+                order.append("stream start")
+                # Held for several lease lengths
+                await asyncio.sleep(0.35)
+                await streaming.save(SessionState(session_id="session-a"))
+                order.append("stream end")
+
+        async def next_turn():
+            await asyncio.sleep(0.02)
+            async with other.lock("session-a"):
+                order.append("next turn")
+
+        await asyncio.gather(long_stream(), next_turn())
+        await streaming.close()
+        await other.close()
+
+    asyncio.run(asyncio.wait_for(run(), timeout=5))
+    assert order == ["stream start", "stream end", "next turn"]
+
+
+def test_sqlite_save_after_lost_lease_is_rejected(tmp_path):
+    path = str(tmp_path / "sessions.db")
+
+    async def run():
+        store = SQLiteSessionStore(path=path, lease_seconds=0.1)
+        async with store.lock("session-a"):
+            # Another worker took the session over (e.g. the event loop stalled past the lease)
+            await store._execute("UPDATE session_leases SET owner = 'other'")
+            await asyncio.sleep(0.1)
+            with pytest.raises(SessionLeaseLostError):
+                await store.save(SessionState(session_id="session-a"))
+        assert await store.get("session-a") is None
+        await store.close()
+
+    asyncio.run(asyncio.wait_for(run(), timeout=5))
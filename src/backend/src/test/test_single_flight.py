@@ -0,0 +1,127 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+import time
+import asyncio
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from single_flight import SingleFlight, SyncSingleFlight, request_key
+
+"""
+Unit tests for single-flight coalescing of identical in-flight calls.
+
+cd src/backend/src/
+pytest test/test_single_flight.py -v
+"""
+
+
+def test_request_key_is_stable():
+    messages = [{"role": "user", "content": "머리가 아파요"}]
+    assert request_key("chat", "gpt-4o", {"messages": messages, "model": "x"}) == \
+        request_key("chat", "gpt-4o", {"model": "x", "messages": messages})
+    assert request_key("chat", "gpt-4o", messages) != request_key("chat", "gpt-4o-mini", messages)
+
+
+def test_async_burst_makes_one_upstream_call():
+    flight = SingleFlight(enabled=True)
+    upstream = []
+
+    async def search():
+        upstream.append(1)
+        await asyncio.sleep(0.05)
+        return ["doc"]
+
+    async def burst():
+        results = await asyncio.gather(*(flight.do("same", search) for _ in range(20)))
+        other = await flight.do("other", search)
+        return results, other
+
+    results, other = asyncio.run(burst())
+    assert results == [["doc"]] * 20 and other == ["doc"]
+    assert len(upstream) == 2
+    assert flight.get_stats()["coalesced"] == 19
+    assert flight.get_stats()["in_flight"] == 0
+
+
+def test_async_error_is_shared_and_not_remembered():
+    flight = SingleFlight(enabled=True)
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("429")
+
+    async def burst():
+        return await asyncio.gather(*(flight.do("key", failing) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(burst()))
+    assert len(calls) == 1
+    # 완료된 호출은 기억하지 않음 (캐시 아님)
+    asyncio.run(burst())
+    assert len(calls) == 2
+
+
+def test_async_upstream_survives_until_last_waiter_cancels():
+    flight = SingleFlight(enabled=True)
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+        return "done"
+
+    async def scenario():
+        first = asyncio.create_task(flight.do("key", slow))
+        second = asyncio.create_task(flight.do("key", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert not cancelled
+        second.cancel()
+        await asyncio.sleep(0.01)
+        with pytest.raises(asyncio.CancelledError):
+            await second
+
+    asyncio.run(scenario())
+    assert cancelled == [1]
+    assert flight.get_stats()["in_flight"] == 0
+
+
+def test_sync_threads_share_one_call():
+    flight = SyncSingleFlight(enabled=True)
+    upstream = []
+    barrier = threading.Barrier(10)
+    results = []
+
+    def complete():
+        upstream.append(1)
+        time.sleep(0.1)
+        return "answer"
+
+    def worker():
+        barrier.wait()
+        results.append(flight.do("key", complete))
+
+    threads = [threading.Thread(target=worker) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["answer"] * 10
+    assert len(upstream) == 1
+    assert flight.get_stats() == {"enabled": True, "calls": 10, "upstream_calls": 1, "coalesced": 9, "in_flight": 0}
+
+
+def test_disabled_calls_upstream_every_time():
+    flight = SyncSingleFlight(enabled=False)
+    assert [flight.do("key", lambda: 1) for _ in range(3)] == [1, 1, 1]
+    assert flight.get_stats()["upstream_calls"] == 3
@@ -0,0 +1,281 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from models.appointment import AppointmentRequest, AppointmentStatus, BookingInfo
+from services.appointment_repository import InMemoryAppointmentRepository, SlotUnavailableError, BASE_SLOTS
+from services.sqlite_appointment_repository import SQLiteAppointmentRepository
+
+"""
+Unit tests for the SQLite appointment repository (and the paging /
+booking-session / slot reservation interface it shares with the
+in-memory repository).
+
+cd src/backend/src/
+pytest test/test_sqlite_appointment_repository.py -v
+"""
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repository(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryAppointmentRepository()
+        return
+    repo = SQLiteAppointmentRepository(str(tmp_path / "appointments.db"))
+    yield repo
+    repo.close()
+
+
+def _appointment(repository, department="내과", date="2026-10-20", time="10:00", phone="010-1234-5678"):
+    return AppointmentRequest(
+        appointment_id=repository.next_appointment_id(),
+        patient_name="홍길동",
+        phone_number=phone,
+        preferred_date=date,
+        preferred_time=time,
+        department=department,
+        consultation_summary="",
+        status=AppointmentStatus.CONFIRMED
+    )
+
+
+def test_add_get_and_indexes(repository):
+    appointment = _appointment(repository)
+    repository.add(appointment)
+
+    loaded = repository.get(appointment.appointment_id)
+    assert loaded.patient_name == "홍길동"
+    assert loaded.status == AppointmentStatus.CONFIRMED
+    assert [a.appointment_id for a in repository.find_by_phone("010-1234-5678")] == [appointment.appointment_id]
+    assert [a.appointment_id for a in repository.find_by_department_date("내과", "2026-10-20")] == [appointment.appointment_id]
+    assert not repository.is_slot_free("내과", "2026-10-20", "10:00")
+
+    with pytest.raises(ValueError):
+        repository.add(appointment)
+
+
+def test_cancel_releases_slot(repository):
+    first = _appointment(repository)
+    second = _appointment(repository)
+    repository.add(first)
+    repository.add(second)
+
+    assert repository.update_status(first.appointment_id, AppointmentStatus.CANCELLED)
+    assert not repository.is_slot_free("내과", "2026-10-20", "10:00")
+    assert repository.update_status(second.appointment_id, AppointmentStatus.CANCELLED)
+    assert repository.is_slot_free("내과", "2026-10-20", "10:00")
+    assert repository.get(first.appointment_id).status == AppointmentStatus.CANCELLED
+    assert not repository.update_status("APT999999", AppointmentStatus.CANCELLED)
+
+
+def test_list_page_walks_all_appointments(repository):
+    ids = []
+    for i in range(7):
+        appointment = _appointment(repository, time=f"{9 + i:02d}:00")
+        repository.add(appointment)
+        ids.append(appointment.appointment_id)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = repository.list_page(cursor, limit=3)
+        seen.extend(a.appointment_id for a in page)
+        if cursor is None:
+            break
+    assert seen == ids
+    assert [a.appointment_id for a in repository.iter_appointments()] == ids
+    assert repository.count() == 7
+
+
+def test_list_page_filters(repository):
+    expected = []
+    for i in range(20):
+        appointment = _appointment(
+            repository,
+            department="내과" if i % 2 else "외과",
+            date=f"2026-10-{10 + i:02d}",
+            time=BASE_SLOTS[i % len(BASE_SLOTS)]
+        )
+        repository.add(appointment)
+        if i % 2 and "2026-10-12" <= appointment.preferred_date <= "2026-10-25":
+            expected.append(appointment.appointment_id)
+    repository.update_status(expected[0], AppointmentStatus.CANCELLED)
+
+    filters = {"department": "내과", "date_from": "2026-10-12", "date_to": "2026-10-25"}
+    seen, cursor = [], None
+    while True:
+        page, cursor = repository.list_page(cursor, limit=2, **filters)
+        seen.extend(a.appointment_id for a in page)
+        if cursor is None:
+            break
+    assert seen == expected
+
+    page, cursor = repository.list_page(None, limit=50, status=AppointmentStatus.CANCELLED, **filters)
+    assert [a.appointment_id for a in page] == expected[:1] and cursor is None
+    assert repository.list_page(None, limit=50, department="피부과") == ([], None)
+
+
+def test_list_page_filters_without_department(repository):
+    appointments = []
+    for i in range(12):
+        appointment = _appointment(
+            repository,
+            department=("내과", "외과", "소아과")[i % 3],
+            date=f"2026-10-{10 + i % 4:02d}",
+            time=BASE_SLOTS[i]
+        )
+        repository.add(appointment)
+        appointments.append(appointment)
+    for appointment in appointments[::4]:
+        repository.update_status(appointment.appointment_id, AppointmentStatus.CANCELLED)
+    repository.update_status(appointments[4].appointment_id, AppointmentStatus.PENDING)
+
+    def walk(**filters):
+        seen, cursor = [], None
+        while True:
+            page, cursor = repository.list_page(cursor, limit=2, **filters)
+            seen.extend(a.appointment_id for a in page)
+            if cursor is None:
+                return seen
+
+    def expected(date_from=None, date_to=None, status=None):
+        return [
+            a.appointment_id for a in appointments
+            if (date_from is None or a.preferred_date >= date_from)
+            and (date_to is None or a.preferred_date <= date_to)
+            and (status is None or repository.get(a.appointment_id).status == status)
+        ]
+
+    assert walk(date_from="2026-10-11", date_to="2026-10-12") == expected("2026-10-11", "2026-10-12")
+    assert walk(date_from="2026-10-12") == expected(date_from="2026-10-12")
+    assert walk(status=AppointmentStatus.CANCELLED) == expected(status=AppointmentStatus.CANCELLED)
+    assert walk(status=AppointmentStatus.PENDING) == expected(status=AppointmentStatus.PENDING)
+    assert walk(date_to="2026-10-10", status=AppointmentStatus.PENDING) == \
+        expected(date_to="2026-10-10", status=AppointmentStatus.PENDING)
+
+
+def test_booking_sessions(repository):
+    repository.save_booking_session("chat-1", BookingInfo(department="내과", consultation_summary="두통"))
+    info = repository.get_booking_session("chat-1")
+    info.patient_name = "홍길동"
+    repository.save_booking_session("chat-1", info)
+    assert repository.get_booking_session("chat-1").patient_name == "홍길동"
+
+    old = BookingInfo(department="외과", consultation_summary="")
+    old.created_at = datetime.now() - timedelta(hours=48)
+    repository.save_booking_session("chat-2", old)
+    assert repository.delete_booking_sessions_before(datetime.now() - timedelta(hours=24)) == 1
+    assert repository.get_booking_session("chat-2") is None
+
+    # 예약 확정 시 세션도 함께 종료
+    repository.add(_appointment(repository), booking_chat_id="chat-1")
+    assert repository.get_booking_session("chat-1") is None
+    assert repository.count_booking_sessions() == 0
+
+
+def test_sqlite_persists_across_reopen(tmp_path):
+    path = str(tmp_path / "appointments.db")
+    repo = SQLiteAppointmentRepository(path)
+    for time in ("09:00", "09:30"):
+        repo.add(_appointment(repo, time=time))
+    repo.save_booking_session("chat-1", BookingInfo(department="내과", consultation_summary=""))
+    repo.close()
+
+    reopened = SQLiteAppointmentRepository(path)
+    assert reopened.count() == 2
+    assert reopened.occupied_mask("내과", "2026-10-20") == (1 << 18) | (1 << 19)
+    assert reopened.get_booking_session("chat-1").department == "내과"
+    # 예약번호 카운터도 유지
+    assert reopened.next_appointment_id() == "APT000003"
+    reopened.close()
+
+
+def test_claim_rejects_taken_slot(repository):
+    repository.claim(_appointment(repository))
+    with pytest.raises(SlotUnavailableError):
+        repository.claim(_appointment(repository))
+    repository.claim(_appointment(repository, time="10:30"))
+    assert repository.count() == 2
+
+
+def test_unnormalized_slot_is_never_reserved(repository):
+    # 정규화되지 않은 시간/날짜는 슬롯 검사 없이 통과하지 않음 (중복 예약 방지)
+    assert not repository.try_hold("내과", "2026-10-20", "오후 세시", holder="chat-1")
+    assert not repository.try_hold("내과", "다음주쯤", "10:00", holder="chat-1")
+    for holder in ("chat-1", "chat-2"):
+        with pytest.raises(SlotUnavailableError):
+            repository.claim(_appointment(repository, time="오후 세시"), holder=holder)
+        with pytest.raises(SlotUnavailableError):
+            repository.claim(_appointment(repository, date="다음주쯤"), holder=holder)
+    assert repository.count() == 0
+
+
+def test_hold_blocks_other_holders_until_expiry(repository):
+    assert repository.try_hold("내과", "2026-10-20", "10:00", holder="chat-1")
+    assert repository.try_hold("내과", "2026-10-20", "10:00", holder="chat-1")
+    assert not repository.try_hold("내과", "2026-10-20", "10:00", holder="chat-2")
+    assert repository.held_mask("내과", "2026-10-20") == 1 << 20
+    assert repository.held_mask("내과", "2026-10-20", exclude_holder="chat-1") == 0
+
+    with pytest.raises(SlotUnavailableError):
+        repository.claim(_appointment(repository), holder="chat-2")
+    repository.claim(_appointment(repository), holder="chat-1")
+    # 확정 후 hold 해제, 슬롯은 점유 상태
+    assert repository.held_mask("내과", "2026-10-20") == 0
+    assert not repository.try_hold("내과", "2026-10-20", "10:00", holder="chat-2")
+
+    # 만료된 hold는 다른 사용자가 가져갈 수 있음
+    assert repository.try_hold("내과", "2026-10-20", "11:00", holder="chat-3", ttl=-1)
+    assert repository.held_mask("내과", "2026-10-20") == 0
+    assert repository.try_hold("내과", "2026-10-20", "11:00", holder="chat-4")
+    assert repository.purge_expired_holds() == 0
+    repository.release_hold("chat-4")
+    assert repository.held_mask("내과", "2026-10-20") == 0
+
+
+def test_new_hold_replaces_previous_hold(repository):
+    assert repository.try_hold("내과", "2026-10-20", "10:00", holder="chat-1")
+    assert repository.try_hold("내과", "2026-10-20", "10:30", holder="chat-1")
+    assert repository.held_mask("내과", "2026-10-20") == 1 << 21
+    assert repository.try_hold("내과", "2026-10-20", "10:00", holder="chat-2")
+
+
+def test_concurrent_claims_single_winner(repository):
+    contenders = 32
+    barrier = threading.Barrier(contenders)
+    results = []
+
+    def confirm():
+        appointment = _appointment(repository)
+        barrier.wait()
+        try:
+            repository.claim(appointment)
+            results.append(True)
+        except SlotUnavailableError:
+            results.append(False)
+
+    threads = [threading.Thread(target=confirm) for _ in range(contenders)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 1
+    assert repository.count() == 1
+
+
+def test_sqlite_claims_are_atomic_across_connections(tmp_path):
+    path = str(tmp_path / "appointments.db")
+    first, second = SQLiteAppointmentRepository(path), SQLiteAppointmentRepository(path)
+    first.claim(_appointment(first))
+    with pytest.raises(SlotUnavailableError):
+        second.claim(_appointment(second))
+    assert first.try_hold("내과", "2026-10-20", "10:30", holder="chat-1")
+    assert not second.try_hold("내과", "2026-10-20", "10:30", holder="chat-2")
+    first.close()
+    second.close()
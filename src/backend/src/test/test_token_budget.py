@@ -0,0 +1,97 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_store import SessionState
+from token_budget import HistoryBudget, count_tokens
+
+"""
+Unit tests for token-budgeted history compaction.
+
+cd src/backend/src/
+pytest test/test_token_budget.py -v
+"""
+
+
+def _long_session(turns):
+    session = SessionState(session_id="session-a")
+    for i in range(turns):
+        session.append_message("user", f"{i}번째 질문입니다. 배가 아프고 열이 나요.")
+        session.append_message("assistant", f"{i}번째 답변입니다. 추정진단은 급성 위장염입니다.")
+    return session
+
+
+def test_count_tokens():
+    assert count_tokens("") == 0
+    assert count_tokens("배가 아파요") > 0
+    assert count_tokens("a" * 400) < count_tokens("가" * 400)
+
+
+def test_within_budget_is_untouched():
+    budget = HistoryBudget(max_tokens=10000, max_messages=100)
+    session = _long_session(3)
+
+    async def summarize(previous, messages):
+        raise AssertionError("summarize must not be called")
+
+    assert not asyncio.run(budget.compact(session, summarize))
+    assert len(session.history) == 6
+
+
+def test_compaction_bounds_prompt_size():
+    budget = HistoryBudget(max_tokens=200, max_messages=100)
+    calls = []
+
+    async def summarize(previous, messages):
+        calls.append((previous, len(messages)))
+        return f"요약 {len(calls)}"
+
+    session = _long_session(2)
+    for i in range(30):
+        session.append_message("user", f"추가 질문 {i}, 어제부터 설사를 해요.")
+        session.append_message("assistant", f"추가 답변 {i}, 수분 섭취가 중요합니다.")
+        asyncio.run(budget.compact(session, summarize))
+        assert session.history_tokens <= 200
+
+    assert calls and calls[1][0] == "요약 1"  # rolling: previous summary is passed on
+    assert session.prompt_messages[0]["content"].endswith(session.summary)
+    assert session.transcript.startswith(f"summary: {session.summary}")
+    assert session.history[-1].content == "추가 답변 29, 수분 섭취가 중요합니다."
+
+
+def test_summary_failure_keeps_history_and_retries():
+    budget = HistoryBudget(max_tokens=10000, max_messages=6)
+    failing = [True]
+
+    async def summarize(previous, messages):
+        if failing[0]:
+            raise RuntimeError("model unavailable")
+        return f"요약 {len(messages)}"
+
+    session = _long_session(5)
+    assert not asyncio.run(budget.compact(session, summarize))
+    assert len(session.history) == 10 and not session.summary
+    assert budget.get_stats()["summary_failures"] == 1
+
+    # 다음 턴에 다시 요약 시도
+    failing[0] = False
+    assert asyncio.run(budget.compact(session, summarize))
+    assert len(session.history) <= 6 and session.summary.startswith("요약")
+
+
+def test_summary_failure_truncates_past_hard_limit():
+    budget = HistoryBudget(max_tokens=10000, max_messages=6, hard_limit_ratio=2.0)
+
+    async def summarize(previous, messages):
+        raise RuntimeError("model unavailable")
+
+    session = _long_session(7)
+    assert asyncio.run(budget.compact(session, summarize))
+    # 요약 없이 예산까지만 잘라냄
+    assert len(session.history) == 6 and not session.summary
+    assert session.history[-1].content == "6번째 답변입니다. 추정진단은 급성 위장염입니다."
+    assert budget.get_stats()["truncations"] == 1
@@ -0,0 +1,124 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import sys
+import asyncio
+import logging
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import usage_ledger
+from usage_ledger import UsageLedger, session_ref, track_request, usage_session, usage_stage
+
+"""
+Unit tests for per-stage / per-session LLM token and latency accounting.
+
+cd src/backend/src/
+pytest test/test_usage_ledger.py -v
+"""
+
+
+def _usage(prompt: int, completion: int, cached: int = 0) -> SimpleNamespace:
+    return SimpleNamespace(
+        prompt_tokens=prompt,
+        completion_tokens=completion,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=cached)
+    )
+
+
+def _call(ledger: UsageLedger, default_stage: str, usage) -> None:
+    with ledger.track("gpt-4o", default_stage) as call:
+        call.usage = usage
+
+
+def test_calls_are_aggregated_per_stage_session_and_request():
+    ledger = UsageLedger()
+
+    async def turn():
+        with track_request("session-1", ledger) as request:
+            _call(ledger, "intent", _usage(300, 5, cached=256))
+            # 동시 작업에도 세션 태그가 따라감
+            with usage_stage("booking_turn"):
+                await asyncio.gather(
+                    asyncio.to_thread(_call, ledger, "rag_answer", _usage(1000, 200)),
+                    asyncio.sleep(0)
+                )
+        return request
+
+    request = asyncio.run(turn())
+    assert (request.calls, request.prompt_tokens, request.completion_tokens) == (2, 1300, 205)
+
+    stats = ledger.get_stats()
+    assert stats["stages"]["intent"]["cached_tokens"] == 256
+    # 호출 지점에서 지정한 단계가 클라이언트 기본 단계보다 우선
+    assert "rag_answer" not in stats["stages"]
+    assert stats["stages"]["booking_turn"]["total_tokens"] == 1200
+    assert stats["deployments"]["gpt-4o"]["calls"] == 2
+    assert stats["requests"]["count"] == 1 and stats["requests"]["avg_tokens"] == 1505
+
+    session = ledger.session_stats(session_ref("session-1"))
+    assert session["requests"] == 1 and session["total_tokens"] == 1505
+    assert set(session["stages"]) == {"intent", "booking_turn"}
+    assert ledger.session_stats("other") is None
+    # 세션 ID(베어러 토큰)는 통계에 노출하지 않음
+    assert "session-1" not in str(stats)
+    assert stats["sessions"]["top"][0]["session"] == session_ref("session-1")
+
+
+def test_errors_and_estimates():
+    ledger = UsageLedger()
+    with pytest.raises(RuntimeError):
+        with ledger.track("gpt-4o", "rag_answer"):
+            raise RuntimeError("429")
+    with ledger.track("gpt-4o", "rag_answer") as call:
+        call.set_estimate(120, 40)
+    # 스트림 소비 중단(BaseException)은 오류로 세지 않음
+    with pytest.raises(GeneratorExit):
+        with ledger.track("gpt-4o", "rag_answer") as call:
+            call.set_estimate(100, 3)
+            raise GeneratorExit
+
+    stage = ledger.get_stats()["stages"]["rag_answer"]
+    assert (stage["calls"], stage["errors"], stage["estimated"]) == (3, 1, 2)
+    assert stage["prompt_tokens"] == 220 and stage["completion_tokens"] == 43
+    assert stage["p50_ms"] is not None
+    # 세션 밖 호출은 세션에 기록되지 않음
+    assert ledger.get_stats()["sessions"]["tracked"] == 0
+
+
+def test_sessions_are_bounded_and_expire(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(usage_ledger.time, "monotonic", lambda: clock[0])
+    ledger = UsageLedger(max_sessions=2, session_ttl_seconds=100, rollup_interval_seconds=1000)
+    for session_id in ("a", "b", "c"):
+        with usage_session(session_id):
+            _call(ledger, "intent", _usage(10, 1))
+    assert ledger.session_stats(session_ref("a")) is None
+    assert ledger.get_stats()["sessions"]["tracked"] == 2
+
+    clock[0] = 50
+    with usage_session("c"):
+        _call(ledger, "intent", _usage(10, 1))
+    clock[0] = 120
+    assert ledger.sweep() == 1
+    assert ledger.session_stats(session_ref("b")) is None and ledger.session_stats(session_ref("c"))["calls"] == 2
+
+
+def test_rollup_logs_and_resets_interval(monkeypatch, caplog):
+    clock = [0.0]
+    monkeypatch.setattr(usage_ledger.time, "monotonic", lambda: clock[0])
+    ledger = UsageLedger(rollup_interval_seconds=300)
+    _call(ledger, "intent", _usage(100, 2))
+
+    caplog.set_level(logging.INFO, logger="usage_ledger")
+    clock[0] = 100
+    ledger.sweep()
+    assert not caplog.records
+    clock[0] = 300
+    ledger.sweep()
+    assert "intent: 1 calls, 100+2 tokens" in caplog.text
+    assert ledger.rollup() == {}
+    # 누적 통계는 유지
+    assert ledger.get_stats()["stages"]["intent"]["calls"] == 1
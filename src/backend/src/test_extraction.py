@@ -5,17 +5,19 @@
 
 import sys
 import os
+import asyncio
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from appointment_orchestrator import AppointmentOrchestrator
-from aoai_client import AOAIClient
+from aoai_client import AsyncAOAIClient
+from models.appointment import BookingInfo
 
 def test_extraction():
     """추출 로직 테스트"""
     
     # AOAI 클라이언트 초기화 (실제 설정 필요)
     try:
-        aoai_client = AOAIClient(
+        aoai_client = AsyncAOAIClient(
             endpoint="https://your-endpoint.openai.azure.com/",
             deployment="your-deployment",
             api_version="2023-12-01-preview"
@@ -39,10 +41,15 @@ def test_extraction():
     print(f"결과: {regex_result}")
     print()
     
-    # LLM 추출 테스트 (실제 호출)
+    # LLM 추출 + 응답 생성 테스트 (실제 호출)
     print("2. LLM 추출 테스트:")
     try:
-        llm_result = orchestrator._extract_booking_info_with_llm(test_message)
+        booking_info = BookingInfo(department="소화기내과")
+        llm_result = asyncio.run(orchestrator._run_booking_turn_with_llm(
+            booking_info=booking_info,
+            missing_fields_str="성함, 연락처, 희망 날짜, 희망 시간",
+            message=test_message
+        ))
         print(f"결과: {llm_result}")
     except Exception as e:
         print(f"LLM 추출 실패: {e}")
@@ -0,0 +1,173 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import logging
+from typing import Awaitable, Callable
+
+"""
+Token-budgeted conversation history.
+
+Counts tokens per message and, once a session's history exceeds its
+budget, folds the oldest turns into a rolling summary so prompt size
+stays bounded however long the consultation runs.
+"""
+
+_logger = logging.getLogger(__name__)
+
+HISTORY_TOKEN_BUDGET = int(os.environ.get("HISTORY_TOKEN_BUDGET", "3000"))
+HISTORY_MAX_MESSAGES = int(os.environ.get("SESSION_HISTORY_MAX_MESSAGES", "14"))
+# Fraction of the budget kept verbatim after a compaction (leaves headroom
+# so the next turns do not trigger another summary right away):
+HISTORY_KEEP_RATIO = float(os.environ.get("HISTORY_KEEP_RATIO", "0.5"))
+# Multiple of the budget the history may grow to while summaries fail;
+# beyond it the oldest turns are dropped without a summary:
+HISTORY_HARD_LIMIT_RATIO = float(os.environ.get("HISTORY_HARD_LIMIT_RATIO", "2.0"))
+TOKEN_ENCODING = os.environ.get("TOKEN_ENCODING", "o200k_base")
+
+# Per-message framing overhead of the chat format:
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            # Optional dependency, exact counts when available:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+        except Exception as e:
+            _logger.info(f"tiktoken unavailable, using heuristic token counts: {e}")
+    return _encoding
+
+
+def count_tokens(
+    text: str
+) -> int:
+    """
+    Count tokens of text (tiktoken if installed, otherwise a conservative estimate).
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # Hangul and other non-ASCII characters take roughly one token each,
+    # ASCII text about four characters per token:
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+def count_message_tokens(
+    content: str
+) -> int:
+    return count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+class HistoryBudget:
+    """
+    Keeps a session's verbatim history within a token (and message) budget.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = HISTORY_TOKEN_BUDGET,
+        max_messages: int = HISTORY_MAX_MESSAGES,
+        keep_ratio: float = HISTORY_KEEP_RATIO,
+        hard_limit_ratio: float = HISTORY_HARD_LIMIT_RATIO
+    ) -> None:
+        self.max_tokens = max_tokens
+        self.max_messages = max_messages
+        self.keep_ratio = keep_ratio
+        self.hard_limit_ratio = hard_limit_ratio
+        self.compactions = 0
+        self.summary_failures = 0
+        self.truncations = 0
+
+    def is_exceeded(
+        self,
+        session
+    ) -> bool:
+        return session.history_tokens > self.max_tokens or len(session.history) > self.max_messages
+
+    def is_over_hard_limit(
+        self,
+        session
+    ) -> bool:
+        return (
+            session.history_tokens > self.max_tokens * self.hard_limit_ratio
+            or len(session.history) > self.max_messages * self.hard_limit_ratio
+        )
+
+    def _messages_to_drop(
+        self,
+        session,
+        ratio: float
+    ) -> int:
+        """
+        Number of oldest messages to remove to get within ratio of the budget.
+        """
+        target_tokens = int(self.max_tokens * ratio)
+        target_messages = int(self.max_messages * ratio)
+        tokens = session.history_tokens
+        remaining = len(session.history)
+        drop = 0
+        # Always keep the last exchange verbatim:
+        while remaining > 2 and (tokens > target_tokens or remaining > target_messages):
+            tokens -= session.message_tokens(drop)
+            remaining -= 1
+            drop += 1
+        return drop
+
+    async def compact(
+        self,
+        session,
+        summarize: Callable[[str, list], Awaitable[str]]
+    ) -> bool:
+        """
+        Fold the oldest messages into session.summary when over budget.
+
+        summarize(previous_summary, dropped_messages) returns the new summary.
+        If it fails, the history is kept and the summary retried on the next
+        turn; only past the hard limit are the oldest turns dropped unsummarized.
+        Returns True when the session changed.
+        """
+        if not self.is_exceeded(session):
+            return False
+
+        drop = self._messages_to_drop(session, self.keep_ratio)
+        if drop == 0:
+            return False
+
+        dropped = session.history[:drop]
+        try:
+            summary = await summarize(session.summary, dropped)
+        except Exception as e:
+            _logger.error(f"History summarization failed: {e}")
+            self.summary_failures += 1
+            if not self.is_over_hard_limit(session):
+                return False
+            # Prompt size must stay bounded; trim back to the budget, the dropped turns are lost from context
+            drop = self._messages_to_drop(session, 1.0)
+            _logger.warning(f"History over hard limit, dropping {drop} messages without summary")
+            session.drop_oldest(drop)
+            self.truncations += 1
+            return True
+
+        session.drop_oldest(drop)
+        session.set_summary(summary)
+        self.compactions += 1
+        return True
+
+    def get_stats(self) -> dict:
+        return {
+            "max_tokens": self.max_tokens,
+            "max_messages": self.max_messages,
+            "compactions": self.compactions,
+            "summary_failures": self.summary_failures,
+            "truncations": self.truncations,
+            "exact_token_counts": _get_encoding() is not None
+        }
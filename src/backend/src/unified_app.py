@@ -2,18 +2,29 @@
 # Licensed under the MIT License.
 import os
 import json
+import asyncio
 import importlib
 import pii_redacter
+import retry_policy
 from json import JSONDecodeError
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse, HTMLResponse
+from typing import Optional
+from fastapi import FastAPI, Query, Request
+from fastapi.concurrency import asynccontextmanager
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from azure.search.documents import SearchClient
 from aoai_client import AOAIClient, get_prompt
 from router.router_type import RouterType
 from unified_conversation_orchestrator import UnifiedConversationOrchestrator
 from utils import get_azure_credential
-from services.appointment_service import appointment_service
+from services.appointment_service import appointment_service, MAX_APPOINTMENT_PAGE_SIZE, MAX_AVAILABILITY_DAYS
+from models.appointment import AppointmentStatus
+from retrieval_cache import create_retrieval_cache
+from session_store import get_session_id, attach_session
+from session_janitor import SessionJanitor, process_memory_bytes
+from single_flight import sync_single_flight
+from deployment_capabilities import capability_registry
+from usage_ledger import usage_ledger, track_request
 
 
 DIST_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "dist"))
@@ -21,8 +32,27 @@ DIST_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "dist"))
 print(f"DIST_DIR: {DIST_DIR}")
 
 
+# Background expiry of abandoned booking sessions and PII mappings, gauges at /metrics/sessions:
+session_janitor = SessionJanitor()
+session_janitor.add_sweep("booking_sessions", appointment_service.cleanup_expired_sessions, blocking=True)
+session_janitor.add_sweep("pii_mappings", pii_redacter.expire_mappings)
+# Idle sessions leave the usage ledger; the per-stage rollup is logged every USAGE_ROLLUP_INTERVAL_SECONDS:
+session_janitor.add_sweep("usage_ledger", usage_ledger.sweep)
+session_janitor.add_gauge("booking_sessions", appointment_service.count_booking_sessions, blocking=True)
+session_janitor.add_gauge("pii_mappings", pii_redacter.get_stats)
+session_janitor.add_gauge("process_memory_bytes", process_memory_bytes)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    session_janitor.start()
+    yield
+    await session_janitor.stop()
+    appointment_service.close()
+
+
 # FastAPI app:
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.mount("/assets", StaticFiles(directory=os.path.join(DIST_DIR, "assets")), name="assets")
 
 
@@ -30,15 +60,22 @@ app.mount("/assets", StaticFiles(directory=os.path.join(DIST_DIR, "assets")), na
 search_client = SearchClient(
     endpoint=os.environ.get("SEARCH_ENDPOINT"),
     index_name=os.environ.get("SEARCH_INDEX_NAME"),
-    credential=get_azure_credential()
+    credential=get_azure_credential(),
+    # Retries are handled by retry_policy (see AOAIClient.search_documents):
+    retry_total=0
 )
 
 
+retrieval_cache = create_retrieval_cache(os.environ.get("SEARCH_INDEX_NAME"))
+
+
 rag_client = AOAIClient(
     endpoint=os.environ.get("AOAI_ENDPOINT"),
     deployment=os.environ.get("AOAI_DEPLOYMENT"),
     use_rag=True,
-    search_client=search_client
+    search_client=search_client,
+    retrieval_cache=retrieval_cache,
+    usage_stage="rag_answer"
 )
 
 
@@ -47,7 +84,8 @@ extract_prompt = get_prompt("extract_utterances.txt")
 extract_client = AOAIClient(
     endpoint=os.environ.get("AOAI_ENDPOINT"),
     deployment=os.environ.get("AOAI_DEPLOYMENT"),
-    system_message=extract_prompt
+    system_message=extract_prompt,
+    usage_stage="extract_utterances"
 )
 
 
@@ -59,7 +97,7 @@ PII_ENABLED = os.environ.get("PII_ENABLED", "false").lower() == "true"
 def fallback_function(
     query: str,
     language: str,
-    id: int
+    id: str
 ) -> str:
     """
     Call RAG client for grounded chat completion.
@@ -82,10 +120,9 @@ orchestrator = UnifiedConversationOrchestrator(
     router_type=router_type,
     fallback_function=fallback_function
 )
-chat_id = 0
 
 
-def orchestrate_chat(message: str) -> list[str]:
+def orchestrate_chat(message: str, chat_id: str) -> list[str]:
     if PII_ENABLED:
         # Redact PII:
         message = pii_redacter.redact(
@@ -179,23 +216,69 @@ async def list_routes():
     return {"routes": routes}
 
 
+@app.get("/metrics/sessions")
+async def session_metrics():
+    """세션 게이지 (예약 세션 수, PII 매핑, 메모리 사용량) 및 만료 작업 통계"""
+    return {**await session_janitor.collect_gauges(), "janitor": session_janitor.get_stats()}
+
+
+@app.get("/diagnostics/capabilities")
+async def capability_diagnostics():
+    """배포별로 확인된 AOAI 기능 (JSON 모드, 도구 호출, 스트리밍; 처음 사용할 때 확인)"""
+    return {"deployments": capability_registry.snapshot()}
+
+
+@app.get("/metrics/upstream")
+async def upstream_metrics():
+    """업스트림(AOAI/검색/Language) 재시도 횟수 및 서킷 브레이커 상태"""
+    return retry_policy.get_stats()
+
+
+@app.get("/metrics/usage")
+async def usage_metrics(session: Optional[str] = None):
+    """LLM 토큰(프롬프트/완료/캐시) 및 소요 시간 집계 (단계별, 배포별, 요청별, 세션별; 세션은 해시 참조로만 표시/조회)"""
+    if session is None:
+        return usage_ledger.get_stats()
+    stats = usage_ledger.session_stats(session)
+    if stats is None:
+        return JSONResponse(status_code=404, content={"error": "세션을 찾을 수 없습니다."})
+    return stats
+
+
+@app.get("/metrics/single-flight")
+async def single_flight_metrics():
+    """동일 요청 병합 통계 (LLM/검색 업스트림 호출 수 대비 병합된 호출 수)"""
+    return sync_single_flight.get_stats()
+
+
+@app.post("/admin/retrieval-cache/invalidate")
+async def invalidate_retrieval_cache():
+    """검색 결과 캐시 무효화 (인덱스 재구성 후 호출)"""
+    if retrieval_cache is None:
+        return {"enabled": False, "removed": 0}
+    return {"enabled": True, "removed": await asyncio.to_thread(retrieval_cache.invalidate)}
+
+
 @app.post("/chat")
 async def chat(request: Request):
     content = await request.json()
     message = content["message"]
+    session_id = get_session_id(request)
 
-    responses = orchestrate_chat(message)
+    with track_request(session_id):
+        responses = orchestrate_chat(message, chat_id=session_id)
 
     print(f"responses: {responses}")
-    return JSONResponse({
-        "messages": responses
-    })
+    return attach_session(JSONResponse({
+        "messages": responses,
+        "session_id": session_id
+    }), session_id)
 
 
 @app.get("/appointments/{appointment_id}")
 async def get_appointment(appointment_id: str):
     """예약 조회 API"""
-    appointment = appointment_service.get_appointment(appointment_id)
+    appointment = await asyncio.to_thread(appointment_service.get_appointment, appointment_id)
     if appointment:
         return {
             "appointment_id": appointment.appointment_id,
@@ -214,35 +297,77 @@ async def get_appointment(appointment_id: str):
 
 
 @app.get("/appointments")
-async def list_appointments():
-    """전체 예약 목록 조회 API"""
-    appointments = []
-    for apt in appointment_service.appointments:
-        appointments.append({
-            "appointment_id": apt.appointment_id,
-            "patient_name": apt.patient_name,
-            "department": apt.department,
-            "appointment_date": apt.preferred_date,
-            "appointment_time": apt.preferred_time,
-            "status": apt.status.value,
-            "created_at": apt.created_at.isoformat()
-        })
+async def list_appointments(
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    department: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    status: Optional[AppointmentStatus] = None,
+    format: str = "json"
+):
+    """예약 목록 조회 API (커서 기반 페이지네이션, 진료과/날짜 범위/상태 필터, format=ndjson 이면 전체 스트리밍)"""
+    if cursor is not None and not cursor.isdigit():
+        return JSONResponse(content={"error": "잘못된 cursor 값입니다."}, status_code=400)
+    filters = {"department": department, "date_from": date_from, "date_to": date_to, "status": status}
     
-    return {"appointments": appointments}
+    if format == "ndjson":
+        # 페이지 단위로 읽어 바로 내보내므로 예약 수와 무관하게 메모리 사용량 일정
+        return StreamingResponse(
+            (
+                json.dumps(apt.to_listing_dict(), ensure_ascii=False) + "\n"
+                for apt in appointment_service.stream_appointments(cursor, **filters)
+            ),
+            media_type="application/x-ndjson"
+        )
+    
+    limit = max(1, min(limit, MAX_APPOINTMENT_PAGE_SIZE))
+    page, next_cursor = await asyncio.to_thread(appointment_service.list_appointments_page, cursor, limit, **filters)
+    return {"appointments": [apt.to_listing_dict() for apt in page], "next_cursor": next_cursor}
+
+
+@app.get("/departments/{department}/availability")
+async def department_availability(
+    department: str,
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to")
+):
+    """진료과 예약 가능 시간 조회 API (from/to: YYYY-MM-DD, 기본 오늘부터 2주)"""
+    schedules = appointment_service.schedules
+    if not schedules.knows(department):
+        return JSONResponse(content={"error": "진료과를 찾을 수 없습니다."}, status_code=404)
+    try:
+        availability = await asyncio.to_thread(appointment_service.get_availability, department, date_from, date_to)
+    except ValueError:
+        return JSONResponse(
+            content={"error": f"from/to는 YYYY-MM-DD 형식이며 조회 기간은 최대 {MAX_AVAILABILITY_DAYS}일입니다."},
+            status_code=400
+        )
+    return {
+        "department": department,
+        "slot_minutes": schedules.get(department).slot_minutes,
+        "days": [{"date": day, "slots": slots} for day, slots in availability.items()]
+    }
 
 
 @app.get("/debug/appointments")
-async def debug_appointments():
-    """디버그: 현재 예약 목록 확인"""
+async def debug_appointments(cursor: Optional[str] = None, limit: int = 50):
+    """디버그: 현재 예약 목록 확인 (페이지 단위)"""
+    if cursor is not None and not cursor.isdigit():
+        return JSONResponse(content={"error": "잘못된 cursor 값입니다."}, status_code=400)
+    page, next_cursor = await asyncio.to_thread(
+        appointment_service.list_appointments_page, cursor, max(1, min(limit, MAX_APPOINTMENT_PAGE_SIZE))
+    )
     return {
-        "total_appointments": len(appointment_service.appointments),
-        "appointment_ids": [apt.appointment_id for apt in appointment_service.appointments],
+        "total_appointments": await asyncio.to_thread(appointment_service.count_appointments),
+        "appointment_ids": [apt.appointment_id for apt in page],
         "appointments": [
             {
                 "appointment_id": apt.appointment_id,
                 "patient_name": apt.patient_name,
                 "department": apt.department
             }
-            for apt in appointment_service.appointments
-        ]
+            for apt in page
+        ],
+        "next_cursor": next_cursor
     }
@@ -7,6 +7,7 @@ from azure.ai.textanalytics import TextAnalyticsClient
 from router.router_type import RouterType
 from router.router_utils import create_router
 from utils import get_azure_credential
+from retry_policy import call_with_retry
 
 
 class UnifiedConversationOrchestrator():
@@ -26,7 +27,9 @@ class UnifiedConversationOrchestrator():
         """
         self.ta_client = TextAnalyticsClient(
             endpoint=os.environ.get("LANGUAGE_ENDPOINT"),
-            credential=get_azure_credential()
+            credential=get_azure_credential(),
+            # Retries are handled by retry_policy:
+            retry_total=0
         )
 
         # Router is Callable[[str, str, str], dict]:
@@ -44,7 +47,10 @@ class UnifiedConversationOrchestrator():
         """
         Detect language of input text using Azure AI Lanuage.
         """
-        result = self.ta_client.detect_language(documents=[text])
+        result = call_with_retry(
+            "language:detect",
+            lambda: self.ta_client.detect_language(documents=[text])
+        )
         language = result[0].primary_language.iso6391_name
         return language
 
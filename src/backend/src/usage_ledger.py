@@ -0,0 +1,431 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+"""
+Token and latency accounting of LLM calls.
+
+Every AOAI call is tagged with its pipeline stage (intent, booking turn,
+RAG answer, history summary, ...) and the session it serves, both taken
+from context variables set by the app, so tags follow the request into
+concurrent tasks without being threaded through every signature. Prompt,
+completion and cached tokens and wall time are aggregated per stage, per
+session and per chat request in an in-process ledger; a rollup of each
+interval is logged from the janitor sweep.
+"""
+
+_logger = logging.getLogger(__name__)
+
+USAGE_LEDGER_MAX_SESSIONS = int(os.environ.get("USAGE_LEDGER_MAX_SESSIONS", "10000"))
+USAGE_LEDGER_SESSION_TTL_SECONDS = float(os.environ.get("USAGE_LEDGER_SESSION_TTL_SECONDS", "7200"))
+USAGE_ROLLUP_INTERVAL_SECONDS = float(os.environ.get("USAGE_ROLLUP_INTERVAL_SECONDS", "300"))
+
+# Latency samples kept per stage for percentiles:
+_LATENCY_SAMPLES = 512
+
+UNKNOWN_STAGE = "unknown"
+
+_stage: ContextVar[Optional[str]] = ContextVar("usage_stage", default=None)
+_session: ContextVar[Optional[str]] = ContextVar("usage_session", default=None)
+_request: ContextVar[Optional["UsageTotals"]] = ContextVar("usage_request", default=None)
+
+
+def session_ref(
+    session_id: str
+) -> str:
+    """
+    Opaque reference of a session in usage stats (session IDs are bearer tokens and never reported).
+    """
+    return hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:16]
+
+
+class UsageTotals:
+    """
+    Summed calls, tokens and wall time.
+    """
+    __slots__ = ("calls", "errors", "estimated", "prompt_tokens", "completion_tokens", "cached_tokens", "wall_ms")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        # Calls without response.usage (streams), counted from the text:
+        self.estimated = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.wall_ms = 0.0
+
+    def add(
+        self,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int,
+        wall_ms: float,
+        error: bool,
+        estimated: bool
+    ) -> None:
+        self.calls += 1
+        self.errors += error
+        self.estimated += estimated
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cached_tokens += cached_tokens
+        self.wall_ms += wall_ms
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "estimated": self.estimated,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "total_tokens": self.total_tokens,
+            "wall_ms": round(self.wall_ms, 1),
+            "avg_ms": round(self.wall_ms / self.calls, 1) if self.calls else None
+        }
+
+
+class _SessionUsage:
+    __slots__ = ("stages", "requests", "last_seen")
+
+    def __init__(self) -> None:
+        self.stages: dict[str, UsageTotals] = {}
+        self.requests = 0
+        self.last_seen = time.monotonic()
+
+    def as_dict(self) -> dict:
+        totals = UsageTotals()
+        for stage in self.stages.values():
+            for slot in UsageTotals.__slots__:
+                setattr(totals, slot, getattr(totals, slot) + getattr(stage, slot))
+        return {
+            "requests": self.requests,
+            **totals.as_dict(),
+            "stages": {name: stage.as_dict() for name, stage in self.stages.items()}
+        }
+
+
+def _percentile(
+    samples: list[float],
+    q: float
+) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+
+def _usage_counts(
+    usage: Any
+) -> tuple[int, int, int]:
+    """
+    (prompt, completion, cached) tokens of an SDK usage object.
+    """
+    details = getattr(usage, "prompt_tokens_details", None)
+    return (
+        getattr(usage, "prompt_tokens", 0) or 0,
+        getattr(usage, "completion_tokens", 0) or 0,
+        getattr(details, "cached_tokens", 0) or 0
+    )
+
+
+class CallTracker:
+    """
+    Times one LLM call; the usage (or an estimate) is set before it ends.
+    """
+
+    def __init__(
+        self,
+        ledger: "UsageLedger",
+        deployment: str,
+        stage: Optional[str]
+    ) -> None:
+        self.ledger = ledger
+        self.deployment = deployment
+        self.stage = stage
+        self.usage = None
+        self._estimate: Optional[tuple[int, int]] = None
+        self._started = 0.0
+
+    def set_estimate(
+        self,
+        prompt_tokens: int,
+        completion_tokens: int
+    ) -> None:
+        self._estimate = (prompt_tokens, completion_tokens)
+
+    def __enter__(self) -> "CallTracker":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        wall_ms = (time.perf_counter() - self._started) * 1000
+        estimated = self.usage is None and self._estimate is not None
+        prompt, completion, cached = _usage_counts(self.usage) if self.usage is not None else (*(self._estimate or (0, 0)), 0)
+        # Cancelled / abandoned calls (BaseException) are not errors of the upstream:
+        error = exc_type is not None and issubclass(exc_type, Exception)
+        self.ledger.record(self.stage, self.deployment, prompt, completion, cached, wall_ms, error=error, estimated=estimated)
+        return False
+
+
+class UsageLedger:
+    """
+    In-process aggregates of LLM usage per stage, session and request.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = USAGE_LEDGER_MAX_SESSIONS,
+        session_ttl_seconds: float = USAGE_LEDGER_SESSION_TTL_SECONDS,
+        rollup_interval_seconds: float = USAGE_ROLLUP_INTERVAL_SECONDS
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.session_ttl_seconds = session_ttl_seconds
+        self.rollup_interval_seconds = rollup_interval_seconds
+        self._lock = threading.Lock()
+        self._stages: dict[str, UsageTotals] = {}
+        self._latencies: dict[str, deque[float]] = {}
+        self._deployments: dict[str, UsageTotals] = {}
+        self._sessions: OrderedDict[str, _SessionUsage] = OrderedDict()
+        self._interval: dict[str, UsageTotals] = {}
+        self._interval_started = time.monotonic()
+        # LLM calls summed per chat request, plus the requests' end-to-end time:
+        self.requests = UsageTotals()
+        self.request_wall_ms = 0.0
+
+    def track(
+        self,
+        deployment: str,
+        default_stage: str = None
+    ) -> CallTracker:
+        """
+        with usage_ledger.track(...) as call: ...; call.usage = response.usage
+        """
+        return CallTracker(self, deployment, _stage.get() or default_stage)
+
+    def record(
+        self,
+        stage: Optional[str],
+        deployment: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int,
+        wall_ms: float,
+        error: bool = False,
+        estimated: bool = False
+    ) -> None:
+        """
+        Add one call, tagged with the session and request of the current context.
+        """
+        stage = stage or UNKNOWN_STAGE
+        counts = (prompt_tokens, completion_tokens, cached_tokens, wall_ms, error, estimated)
+        session_id = _session.get()
+        with self._lock:
+            self._stages.setdefault(stage, UsageTotals()).add(*counts)
+            self._latencies.setdefault(stage, deque(maxlen=_LATENCY_SAMPLES)).append(wall_ms)
+            self._deployments.setdefault(deployment or UNKNOWN_STAGE, UsageTotals()).add(*counts)
+            self._interval.setdefault(stage, UsageTotals()).add(*counts)
+            if session_id:
+                session = self._touch_session(session_id)
+                session.stages.setdefault(stage, UsageTotals()).add(*counts)
+            request = _request.get()
+            if request is not None:
+                request.add(*counts)
+
+    def _touch_session(
+        self,
+        session_id: str
+    ) -> _SessionUsage:
+        # Sessions are kept under their reference only:
+        ref = session_ref(session_id)
+        session = self._sessions.get(ref)
+        if session is None:
+            session = self._sessions[ref] = _SessionUsage()
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(ref)
+        session.last_seen = time.monotonic()
+        return session
+
+    def record_request(
+        self,
+        session_id: Optional[str],
+        totals: UsageTotals,
+        wall_ms: float
+    ) -> None:
+        """
+        Add one chat request: its LLM tokens / time and its end-to-end wall time.
+        """
+        with self._lock:
+            self.requests.add(
+                totals.prompt_tokens, totals.completion_tokens, totals.cached_tokens,
+                totals.wall_ms, False, False
+            )
+            self.request_wall_ms += wall_ms
+            if session_id:
+                self._touch_session(session_id).requests += 1
+
+    def session_stats(
+        self,
+        ref: str
+    ) -> Optional[dict]:
+        """
+        Usage of one session by its reference (see session_ref).
+        """
+        with self._lock:
+            session = self._sessions.get(ref)
+            return None if session is None else {"session": ref, **session.as_dict()}
+
+    def get_stats(
+        self,
+        top_sessions: int = 10
+    ) -> dict:
+        with self._lock:
+            stages = {
+                name: {
+                    **totals.as_dict(),
+                    "p50_ms": _percentile(list(self._latencies[name]), 0.5),
+                    "p95_ms": _percentile(list(self._latencies[name]), 0.95)
+                }
+                for name, totals in self._stages.items()
+            }
+            sessions = sorted(
+                ((ref, session.as_dict()) for ref, session in self._sessions.items()),
+                key=lambda item: item[1]["total_tokens"],
+                reverse=True
+            )[:top_sessions]
+            requests = self.requests.as_dict()
+            return {
+                "stages": stages,
+                "deployments": {name: totals.as_dict() for name, totals in self._deployments.items()},
+                "requests": {
+                    "count": requests["calls"],
+                    "prompt_tokens": requests["prompt_tokens"],
+                    "completion_tokens": requests["completion_tokens"],
+                    "cached_tokens": requests["cached_tokens"],
+                    "avg_tokens": round(requests["total_tokens"] / requests["calls"], 1) if requests["calls"] else None,
+                    "avg_llm_ms": requests["avg_ms"],
+                    "avg_ms": round(self.request_wall_ms / requests["calls"], 1) if requests["calls"] else None
+                },
+                "sessions": {
+                    "tracked": len(self._sessions),
+                    "top": [{"session": ref, **stats} for ref, stats in sessions]
+                }
+            }
+
+    def rollup(self) -> dict:
+        """
+        Log and reset the per-stage usage since the previous rollup.
+        """
+        with self._lock:
+            interval, self._interval = self._interval, {}
+            started, self._interval_started = self._interval_started, time.monotonic()
+        seconds = time.monotonic() - started
+        summary = {name: totals.as_dict() for name, totals in interval.items()}
+        if summary:
+            stages = ", ".join(
+                f"{name}: {stats['calls']} calls, {stats['prompt_tokens']}+{stats['completion_tokens']} tokens "
+                f"({stats['cached_tokens']} cached), avg {stats['avg_ms']}ms"
+                for name, stats in summary.items()
+            )
+            _logger.info(f"LLM usage over {seconds:.0f}s: {stages}")
+        return summary
+
+    def sweep(self) -> int:
+        """
+        Janitor sweep: drop idle sessions, log a rollup once per interval.
+
+        Returns the number of sessions dropped.
+        """
+        now = time.monotonic()
+        removed = 0
+        with self._lock:
+            while self._sessions:
+                ref, session = next(iter(self._sessions.items()))
+                if now - session.last_seen < self.session_ttl_seconds:
+                    break
+                del self._sessions[ref]
+                removed += 1
+            due = now - self._interval_started >= self.rollup_interval_seconds
+        if due:
+            self.rollup()
+        return removed
+
+
+def _reset(
+    var: ContextVar,
+    token: Any
+) -> None:
+    try:
+        var.reset(token)
+    except ValueError:
+        # Streaming generator finalized from another context: nothing to restore there
+        pass
+
+
+@contextmanager
+def usage_stage(
+    stage: str
+) -> Iterator[None]:
+    """
+    Tag the LLM calls made inside the block with a pipeline stage.
+    """
+    token = _stage.set(stage)
+    try:
+        yield
+    finally:
+        _reset(_stage, token)
+
+
+@contextmanager
+def usage_session(
+    session_id: str
+) -> Iterator[None]:
+    """
+    Attribute the LLM calls made inside the block to a session.
+    """
+    token = _session.set(session_id)
+    try:
+        yield
+    finally:
+        _reset(_session, token)
+
+
+@contextmanager
+def track_request(
+    session_id: str,
+    ledger: UsageLedger = None
+) -> Iterator[UsageTotals]:
+    """
+    One chat request: calls inside are attributed to the session and summed
+    into the yielded totals, which are added to the ledger at the end.
+    """
+    ledger = ledger or usage_ledger
+    totals = UsageTotals()
+    started = time.perf_counter()
+    session_token = _session.set(session_id)
+    request_token = _request.set(totals)
+    try:
+        yield totals
+    finally:
+        _reset(_request, request_token)
+        _reset(_session, session_token)
+        ledger.record_request(session_id, totals, (time.perf_counter() - started) * 1000)
+
+
+# Shared by all AOAI clients:
+usage_ledger = UsageLedger()
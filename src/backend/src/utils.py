@@ -2,6 +2,8 @@
 # Licensed under the MIT License.
 import os
 from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
+from azure.identity.aio import DefaultAzureCredential as AsyncDefaultAzureCredential
+from azure.identity.aio import ManagedIdentityCredential as AsyncManagedIdentityCredential
 
 
 def get_azure_credential():
@@ -14,3 +16,15 @@ def get_azure_credential():
         )
 
     return DefaultAzureCredential()
+
+
+def get_async_azure_credential():
+    use_mi_auth = os.environ.get('USE_MI_AUTH', 'false').lower() == 'true'
+
+    if use_mi_auth:
+        mi_client_id = os.environ['MI_CLIENT_ID']
+        return AsyncManagedIdentityCredential(
+            client_id=mi_client_id
+        )
+
+    return AsyncDefaultAzureCredential()
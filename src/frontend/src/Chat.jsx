@@ -9,6 +9,8 @@ const Chat = () => {
     const [needMoreInfo, setNeedMoreInfo] = useState(false);
     const [isWelcomeStreaming, setIsWelcomeStreaming] = useState(false);
     const [streamedWelcome, setStreamedWelcome] = useState('');
+    // Conversation history is kept server-side per session
+    const sessionIdRef = useRef(null);
 
     const messageEndRef = useRef(null);
     const welcomeMessage = `안녕하세요! 의료 상담 AI입니다. 🩺
@@ -51,52 +53,101 @@ const Chat = () => {
     }, [messages]);
 
     const createSystemInput = (userMessageContent) => {
+        const headers = {
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream"
+        };
+        if (sessionIdRef.current) {
+            headers["X-Session-Id"] = sessionIdRef.current;
+        }
 
-        // Send last 14 messages to maintain conversation context (7 user + 7 system)
-        const historyMessages = messages.slice(-14);
-        console.log("Sending history messages:", historyMessages);
-
+        // Only the new message is sent; the server keeps the transcript
         return {
             method: "POST",
-            headers: {
-                "Content-Type": "application/json",
-                "Accept": "application/json"
-            },
+            headers: headers,
             body: JSON.stringify({
                 message: userMessageContent,
-                history: historyMessages,
             })
         };
     };
 
-    const parseSystemResponse = (systemResponse) => {
-        return {
-            messages: systemResponse["messages"] || [],
-            needMoreInfo: systemResponse["need_more_info"] || false
-        };
+    const parseServerSentEvent = (rawEvent) => {
+        let event = "message";
+        let data = "";
+        for (const line of rawEvent.split("\n")) {
+            if (line.startsWith("event:")) {
+                event = line.slice(6).trim();
+            } else if (line.startsWith("data:")) {
+                data += line.slice(5).trim();
+            }
+        }
+        return { event, data: data ? JSON.parse(data) : {} };
+    };
+
+    const appendToLastMessage = (delta) => {
+        setMessages((prevMessages) => {
+            const lastMessage = prevMessages[prevMessages.length - 1];
+            return [
+                ...prevMessages.slice(0, -1),
+                { ...lastMessage, content: lastMessage.content + delta }
+            ];
+        });
     };
 
-    const chatWithSystem = async (userMessageContent) => {
+    // Stream system response from /chat/stream (server-sent events)
+    const streamChatWithSystem = async (userMessageContent) => {
+        let isStreamingMessage = false;
         try {
             const response = await fetch(
-                `/chat`,
+                `/chat/stream`,
                 createSystemInput(userMessageContent)
             );
 
-            if (!response.ok) {
+            if (!response.ok || !response.body) {
                 throw new Error("Oops! Bad chat response.");
             }
+            sessionIdRef.current = response.headers.get("X-Session-Id") || sessionIdRef.current;
 
-            const systemResponse = await response.json();
-            const { messages, needMoreInfo } = parseSystemResponse(systemResponse);
-
-            console.log("System messages:", messages);
-            setNeedMoreInfo(needMoreInfo);
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = "";
 
-            return { messages };
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) {
+                    break;
+                }
+                buffer += decoder.decode(value, { stream: true });
+
+                let boundary = buffer.indexOf("\n\n");
+                while (boundary !== -1) {
+                    const { event, data } = parseServerSentEvent(buffer.slice(0, boundary));
+                    buffer = buffer.slice(boundary + 2);
+                    boundary = buffer.indexOf("\n\n");
+
+                    if (event === "token") {
+                        if (!isStreamingMessage) {
+                            // First token: replace typing indicator with streamed message
+                            isStreamingMessage = true;
+                            setIsTyping(false);
+                            setMessages((prevMessages) => [
+                                ...prevMessages, { role: "System", content: "" }
+                            ]);
+                        }
+                        appendToLastMessage(data.content);
+                    } else if (event === "message" || event === "error") {
+                        setIsTyping(false);
+                        setMessages((prevMessages) => [
+                            ...prevMessages, { role: "System", content: data.content }
+                        ]);
+                    } else if (event === "done") {
+                        console.log("Stream finished, need_more_info:", data.need_more_info);
+                        setNeedMoreInfo(data.need_more_info || false);
+                    }
+                }
+            }
         } catch (error) {
-            console.error("Error while processing chat: ", error);
-            return { messages: [] };
+            console.error("Error while processing chat stream: ", error);
         }
     };
 
@@ -106,16 +157,9 @@ const Chat = () => {
         ]);
 
         setIsTyping(true);
-        const { messages: systemMessages } = await chatWithSystem(userMessageContent);
+        await streamChatWithSystem(userMessageContent);
         setIsTyping(false);
 
-        for (const msg of systemMessages) {
-            setMessages((prevMessages) => [
-                ...prevMessages, 
-                { role: "System", content: msg }
-            ]);
-        }
-
         // 메시지 전송 후 입력창에 자동 포커스
         setTimeout(() => {
             const input = document.querySelector('.chat-input');